@@ -5,8 +5,16 @@ import os
 from flask import Flask
 from flask_cors import CORS
 
-from backend.src.database.db_connection import get_db_session
-from backend.src.map_service.map_service import fetch_and_store_map_data_if_needed
+from backend.src.database.route_partitions import (
+    ROUTE_MAINTENANCE_ENABLED,
+    start_route_maintenance,
+)
+from backend.src.map_service.map_bootstrap import (
+    MAP_BOOTSTRAP_BACKGROUND,
+    bootstrap_progress,
+    run_map_bootstrap,
+    start_map_bootstrap,
+)
 from backend.src.utils.helpers import get_logging_configuration
 from backend.src.utils.tracing import setup_tracing
 from backend.src.web_backend.controller import health_controller
@@ -14,6 +22,10 @@ from backend.src.web_backend.controller import map_controller
 from backend.src.web_backend.controller import metrics_controller
 from backend.src.web_backend.controller import route_history_controller
 from backend.src.web_backend.controller import user_controller
+from backend.src.web_backend.route_cache_warmer import (
+    ROUTE_CACHE_WARM_ENABLED,
+    start_route_cache_warmer,
+)
 
 logger = get_logging_configuration()
 
@@ -38,10 +50,21 @@ def main():
     logger.info("Starting backend application.")
     app = create_app()
 
-    with get_db_session() as db_session:
-        fetch_and_store_map_data_if_needed(session=db_session)
-
     debug_mode = os.environ.get("FLASK_ENV") == "development"
+    # with the reloader of the development server only its child process serves requests
+    if not debug_mode or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        if MAP_BOOTSTRAP_BACKGROUND:
+            start_map_bootstrap()
+        else:
+            run_map_bootstrap()
+        if ROUTE_MAINTENANCE_ENABLED:
+            start_route_maintenance()
+        if ROUTE_CACHE_WARM_ENABLED:
+            # warms with the maps of a failed bootstrap as well
+            start_route_cache_warmer(
+                ready=lambda: bootstrap_progress.snapshot()["status"] in ("ready", "failed")
+            )
+
     app.run(debug=debug_mode, host="0.0.0.0", port=4243)
 
 
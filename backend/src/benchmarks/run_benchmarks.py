@@ -0,0 +1,223 @@
+"""
+Benchmark suite for the navigation service.
+
+Generates synthetic maps of increasing size, times graph construction, every registered routing
+engine and the full `get_route` call, records peak memory and compares the results against a
+stored baseline file.
+
+Usage:
+    python -m backend.src.benchmarks.run_benchmarks --preset default
+    python -m backend.src.benchmarks.run_benchmarks --sizes 100 1000 --update-baseline
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from random import Random
+
+from backend.src.benchmarks.synthetic_maps import generate_navigation_data
+from backend.src.navigation_service.navigation_service import create_graph, dijkstra, get_route
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Routing engines to benchmark: name -> callable(graph, start_city_id, end_city_id)
+ENGINES = {
+    "dijkstra": dijkstra,
+}
+
+PRESETS = {
+    "quick": [100, 500],
+    "default": [100, 500, 1000, 2000],
+    "full": [100, 1_000, 10_000, 100_000, 1_000_000],
+}
+
+
+@dataclass
+class RegressionThresholds:
+    """Allowed relative growth before a measurement counts as a regression"""
+
+    time: float = 0.25
+    memory: float = 0.25
+    # slowdowns smaller than this (in seconds) are treated as noise
+    time_floor: float = 0.001
+
+
+def _best_time(func, *args, repeat: int = 3) -> float:
+    """Return the best wall-clock time of `repeat` calls of func(*args)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak_memory(func, *args) -> int:
+    """Return the peak number of bytes allocated while running func(*args)"""
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def _pick_queries(cities, count: int, seed: int):
+    """Pick `count` deterministic (start, end) city pairs"""
+    rng = Random(seed)
+    return [(rng.choice(cities), rng.choice(cities)) for _ in range(count)]
+
+
+def _measure(func, queries, repeat: int):
+    """Average best time and peak memory of func over all queries"""
+    seconds = sum(_best_time(func, *query, repeat=repeat) for query in queries) / len(queries)
+    peak_bytes = max(_peak_memory(func, *query) for query in queries)
+    return {"seconds": seconds, "peak_bytes": peak_bytes}
+
+
+def benchmark_map(city_count: int, queries: int = 5, seed: int = 42, repeat: int = 3) -> dict:
+    """Run all benchmarks on one synthetic map and return the measurements"""
+    data = generate_navigation_data(city_count, seed=seed)
+    route_queries = _pick_queries(data["cities"], queries, seed)
+
+    metrics = {"create_graph": _measure(create_graph, [(data,)], repeat)}
+
+    graph = create_graph(data)
+    id_queries = [(graph, start["id"], end["id"]) for start, end in route_queries]
+    for engine_name, engine in ENGINES.items():
+        metrics[engine_name] = _measure(engine, id_queries, repeat)
+
+    name_queries = [(start["name"], end["name"], data, {}) for start, end in route_queries]
+    metrics["get_route"] = _measure(get_route, name_queries, repeat)
+
+    return {
+        "city_count": city_count,
+        "connection_count": len(data["connections"]),
+        "metrics": metrics,
+    }
+
+
+def run_benchmarks(sizes, queries: int = 5, seed: int = 42, repeat: int = 3) -> dict:
+    """Benchmark every map size and return the collected results"""
+    results = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "sizes": {},
+    }
+    for size in sizes:
+        results["sizes"][str(size)] = benchmark_map(size, queries=queries, seed=seed, repeat=repeat)
+    return results
+
+
+def compare_with_baseline(results: dict, baseline: dict, thresholds: RegressionThresholds):
+    """
+    Compare results against a baseline and return a list of human-readable regressions.
+
+    Sizes or metrics missing from the baseline are skipped, so adding new engines or sizes never
+    fails the comparison.
+    """
+    regressions = []
+    for size, result in results["sizes"].items():
+        baseline_result = baseline.get("sizes", {}).get(size)
+        if not baseline_result:
+            continue
+
+        for metric_name, values in result["metrics"].items():
+            baseline_values = baseline_result["metrics"].get(metric_name)
+            if not baseline_values:
+                continue
+
+            allowed_seconds = baseline_values["seconds"] * (1 + thresholds.time)
+            if (
+                values["seconds"] > allowed_seconds
+                and values["seconds"] - baseline_values["seconds"] > thresholds.time_floor
+            ):
+                regressions.append(
+                    f"{metric_name} @ {size} cities: {values['seconds']:.6f}s "
+                    f"(baseline {baseline_values['seconds']:.6f}s)"
+                )
+
+            allowed_bytes = baseline_values["peak_bytes"] * (1 + thresholds.memory)
+            if values["peak_bytes"] > allowed_bytes:
+                regressions.append(
+                    f"{metric_name} @ {size} cities: {values['peak_bytes']} bytes peak "
+                    f"(baseline {baseline_values['peak_bytes']} bytes)"
+                )
+    return regressions
+
+
+def load_baseline(path: str) -> dict:
+    """Load a baseline file, returning an empty baseline if it does not exist"""
+    if not os.path.exists(path):
+        return {"sizes": {}}
+    with open(path, encoding="utf-8") as baseline_file:
+        return json.load(baseline_file)
+
+
+def save_baseline(results: dict, path: str):
+    """Write results to a baseline file"""
+    with open(path, "w", encoding="utf-8") as baseline_file:
+        json.dump(results, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write("\n")
+
+
+def _print_results(results: dict):
+    """Print the results as a table"""
+    print(f"{'cities':>10} {'metric':<14} {'seconds':>12} {'peak KiB':>12}")
+    for size, result in results["sizes"].items():
+        for metric_name, values in result["metrics"].items():
+            print(
+                f"{size:>10} {metric_name:<14} {values['seconds']:>12.6f} "
+                f"{values['peak_bytes'] / 1024:>12.1f}"
+            )
+
+
+def main(argv=None) -> int:
+    """Command line entry point, returns a non-zero exit code on regressions"""
+    parser = argparse.ArgumentParser(description="Navigation service benchmarks")
+    parser.add_argument("--preset", choices=PRESETS.keys(), default="default")
+    parser.add_argument("--sizes", type=int, nargs="+", help="Map sizes, overrides --preset")
+    parser.add_argument("--queries", type=int, default=5, help="Route queries per map")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions per query")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--time-threshold", type=float, default=RegressionThresholds.time)
+    parser.add_argument("--memory-threshold", type=float, default=RegressionThresholds.memory)
+    parser.add_argument("--output", help="Optional path to write the raw results to")
+    args = parser.parse_args(argv)
+
+    # the navigation service logs every query on INFO level, which would dominate the timings
+    logging.disable(logging.INFO)
+
+    sizes = args.sizes or PRESETS[args.preset]
+    results = run_benchmarks(sizes, queries=args.queries, seed=args.seed, repeat=args.repeat)
+    _print_results(results)
+
+    if args.output:
+        save_baseline(results, args.output)
+
+    if args.update_baseline:
+        baseline = load_baseline(args.baseline)
+        baseline.update({key: value for key, value in results.items() if key != "sizes"})
+        baseline.setdefault("sizes", {}).update(results["sizes"])
+        save_baseline(baseline, args.baseline)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    thresholds = RegressionThresholds(time=args.time_threshold, memory=args.memory_threshold)
+    regressions = compare_with_baseline(results, load_baseline(args.baseline), thresholds)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
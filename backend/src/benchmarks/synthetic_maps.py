@@ -0,0 +1,40 @@
+"""Synthetic map data in the format the navigation service receives over RPC"""
+
+from backend.src.map_service.map_generator import MapGeneratorConfig, generate_map
+
+
+def generate_navigation_data(city_count: int, seed: int = 42, degree: int = 3):
+    """
+    Generate a deterministic road network with `city_count` cities.
+
+    The map comes from `map_generator.generate_map` and is converted to the shape of
+    `web_backend_service.marshall_data_for_navigation_service`:
+    {
+        "cities": [{"id", "map_id", "name", "position_x", "position_y"}, ...],
+        "connections": [{"parent_city_id", "child_city_id"}, ...],
+    }
+    """
+    map_data = generate_map(
+        f"Benchmark-{city_count}",
+        MapGeneratorConfig(city_count=city_count, seed=seed, degree=degree),
+    )
+
+    cities = [
+        {
+            "id": index + 1,
+            "map_id": 1,
+            "name": city["name"],
+            "position_x": city["positionX"],
+            "position_y": city["positionY"],
+        }
+        for index, city in enumerate(map_data["cities"])
+    ]
+    city_ids = {city["name"]: city["id"] for city in cities}
+    connections = [
+        {
+            "parent_city_id": city_ids[connection["parent"]],
+            "child_city_id": city_ids[connection["child"]],
+        }
+        for connection in map_data["connections"]
+    ]
+    return {"cities": cities, "connections": connections}
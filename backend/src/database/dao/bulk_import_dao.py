@@ -0,0 +1,151 @@
+"""Dao file for bulk imports of maps"""
+
+import csv
+import io
+import os
+
+from sqlalchemy import delete, insert, text, update
+from sqlalchemy.orm import Session
+
+from backend.src.database.schema.city import City
+from backend.src.database.schema.connection import Connection
+from backend.src.database.schema.map import Map
+from backend.src.utils.helpers import get_logging_configuration
+
+logger = get_logging_configuration()
+
+# set to "false" to import with multi-row INSERT ... RETURNING on PostgreSQL as well
+IMPORT_USE_COPY = os.getenv("IMPORT_USE_COPY", "true").lower() == "true"
+
+
+class BulkImportDao:
+    """
+    Data Access Object for importing maps in bulk.
+
+    Rows are written but not committed, so the caller can import a complete map in one
+    transaction. On PostgreSQL rows are streamed with COPY, other databases use multi-row
+    INSERT ... RETURNING.
+    """
+
+    @staticmethod
+    def insert_map(map_obj: Map, session: Session) -> Map:
+        """Insert a map entry and assign its id."""
+        session.add(map_obj)
+        session.flush()
+        return map_obj
+
+    @staticmethod
+    def insert_cities(map_id: int, cities: list[tuple], session: Session) -> dict[str, int]:
+        """
+        Insert (name, position_x, position_y) rows as cities of a map and return the ids of the
+        new cities by name, without reading the cities back.
+        """
+        if not cities:
+            return {}
+        if _use_copy(session):
+            # ids are taken from the sequence up front, COPY cannot return them
+            city_ids = (
+                session.execute(
+                    text(
+                        "SELECT nextval(pg_get_serial_sequence('cities', 'id')) "
+                        "FROM generate_series(1, :count)"
+                    ),
+                    {"count": len(cities)},
+                )
+                .scalars()
+                .all()
+            )
+            _copy(
+                session,
+                "cities (id, map_id, name, position_x, position_y)",
+                ((city_id, map_id, *city) for city_id, city in zip(city_ids, cities)),
+            )
+            return {name: city_id for city_id, (name, _, _) in zip(city_ids, cities)}
+
+        rows = session.execute(
+            insert(City).returning(City.id, City.name),
+            [
+                {"map_id": map_id, "name": name, "position_x": x, "position_y": y}
+                for name, x, y in cities
+            ],
+        )
+        return {row.name: row.id for row in rows}
+
+    @staticmethod
+    def insert_connections(map_id: int, connections: list[tuple], session: Session) -> int:
+        """Insert (parent_city_id, child_city_id) rows as connections of a map."""
+        if not connections:
+            return 0
+        if _use_copy(session):
+            _copy(
+                session,
+                "connections (map_id, parent_city_id, child_city_id)",
+                ((map_id, *connection) for connection in connections),
+            )
+        else:
+            session.execute(
+                insert(Connection),
+                [
+                    {"map_id": map_id, "parent_city_id": parent, "child_city_id": child}
+                    for parent, child in connections
+                ],
+            )
+        return len(connections)
+
+    @staticmethod
+    def get_connection_rows(map_id: int, session: Session):
+        """Iterate over (id, parent_city_id, child_city_id) rows of all connections of a map."""
+        return (
+            session.query(Connection.id, Connection.parent_city_id, Connection.child_city_id)
+            .filter(Connection.map_id == map_id)
+            .yield_per(10000)
+        )
+
+    @staticmethod
+    def update_city_positions(positions: list[tuple], session: Session) -> int:
+        """Set the position of cities given as (id, position_x, position_y) rows."""
+        if positions:
+            session.execute(
+                update(City),
+                [{"id": city_id, "position_x": x, "position_y": y} for city_id, x, y in positions],
+            )
+        return len(positions)
+
+    @staticmethod
+    def delete_cities(city_ids: list[int], session: Session, batch_size: int = 10000) -> int:
+        """Delete cities by id, their connections have to be deleted first."""
+        for start in range(0, len(city_ids), batch_size):
+            session.execute(
+                delete(City).where(City.id.in_(city_ids[start : start + batch_size])),
+                execution_options={"synchronize_session": False},
+            )
+        return len(city_ids)
+
+    @staticmethod
+    def delete_connections(
+        connection_ids: list[int], session: Session, batch_size: int = 10000
+    ) -> int:
+        """Delete connections by id."""
+        for start in range(0, len(connection_ids), batch_size):
+            session.execute(
+                delete(Connection).where(
+                    Connection.id.in_(connection_ids[start : start + batch_size])
+                ),
+                execution_options={"synchronize_session": False},
+            )
+        return len(connection_ids)
+
+
+def _use_copy(session: Session) -> bool:
+    """whether rows are written with COPY"""
+    return IMPORT_USE_COPY and session.get_bind().dialect.name == "postgresql"
+
+
+def _copy(session: Session, target: str, rows):
+    """stream rows into target ("table (columns)") with COPY in the session's transaction"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    driver_connection = session.connection().connection.driver_connection
+    with driver_connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {target} FROM STDIN WITH (FORMAT csv)", buffer)
@@ -1,6 +1,9 @@
 """Dao file for the City entity"""
 
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
+from backend.src.database.dao.map_dao import MapDao
+from backend.src.database.map_changes import notify_map_changed
 from backend.src.database.schema.city import City
 
 from backend.src.utils.helpers import get_logging_configuration
@@ -16,6 +19,21 @@ class CityDao:
         """Get all cities of a map as a list."""
         return session.query(City).filter_by(map_id=map_id).all()
 
+    @staticmethod
+    def stream_cities_by_map_id(map_id: int, session: Session, batch_size: int = 1000):
+        """
+        Iterate over (id, name, position_x, position_y) rows of all cities of a map, ordered by id.
+
+        Rows are fetched batch_size at a time through a server-side cursor, so memory does not
+        grow with the size of the map. The session must stay open until iteration is finished.
+        """
+        return (
+            session.query(City.id, City.name, City.position_x, City.position_y)
+            .filter(City.map_id == map_id)
+            .order_by(City.id)
+            .yield_per(batch_size)
+        )
+
     @staticmethod
     def get_city_by_name(map_id: int, name: str, session: Session):
         """Get city by name."""
@@ -26,11 +44,59 @@ class CityDao:
         """Get city by id."""
         return session.get(City, city_id)
 
+    @staticmethod
+    def get_nearest_cities(map_id: int, x: float, y: float, limit: int, session: Session):
+        """
+        Get the `limit` cities of a map closest to (x, y), nearest first.
+
+        On PostgreSQL this is a KNN search on the GiST index ix_cities_position_gist,
+        other databases fall back to sorting by the squared distance.
+        """
+        if session.get_bind().dialect.name == "postgresql":
+            distance = func.point(City.position_x, City.position_y).op("<->")(func.point(x, y))
+        else:
+            distance = (City.position_x - x) * (City.position_x - x) + (City.position_y - y) * (
+                City.position_y - y
+            )
+        return (
+            session.query(City).filter(City.map_id == map_id).order_by(distance).limit(limit).all()
+        )
+
+    @staticmethod
+    def get_cities_in_bbox(map_id: int, bbox: tuple, session: Session, limit: int = None):
+        """
+        Get the cities of a map inside the bounding box (min_x, min_y, max_x, max_y).
+
+        The range filter is served by the composite index ix_cities_map_id_position.
+        """
+        min_x, min_y, max_x, max_y = bbox
+        query = (
+            session.query(City)
+            .filter(
+                City.map_id == map_id,
+                City.position_x.between(min_x, max_x),
+                City.position_y.between(min_y, max_y),
+            )
+            .order_by(City.id)
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    @staticmethod
+    def get_cities_by_ids(city_ids, session: Session):
+        """Get all cities with the given ids."""
+        if not city_ids:
+            return []
+        return session.query(City).filter(City.id.in_(city_ids)).order_by(City.id).all()
+
     @staticmethod
     def save_city(city: City, session: Session) -> City:
         """Save a single city and return the saved city."""
         session.add(city)
+        MapDao.increment_versions([city.map_id], session)
         session.commit()
+        notify_map_changed([city.map_id])
         return city
 
     @staticmethod
@@ -38,26 +104,45 @@ class CityDao:
         """Save multiple cities in bulk."""
         try:
             session.bulk_save_objects(cities)
+            MapDao.increment_versions((city.map_id for city in cities), session)
             session.commit()
             logger.info("Successfully inserted %s cities in bulk.", len(cities))
         except Exception as e:
             session.rollback()
             logger.error("Error during bulk insert of cities: %s", e)
             raise
+        notify_map_changed(city.map_id for city in cities)
 
     @staticmethod
     def delete_city(city_id: int, session: Session) -> bool:
         """Delete city if it exists and return True if deleted, else False."""
         city = session.get(City, city_id)
         if city:
+            map_id = city.map_id
             session.delete(city)
+            MapDao.increment_versions([map_id], session)
             session.commit()
+            notify_map_changed([map_id])
             return True
         return False
 
     @staticmethod
-    def get_city_suggestions(session: Session, map_id: int, query: str):
-        """Get city suggestions based on the query."""
+    def get_city_suggestions(session: Session, map_id: int, query: str, limit: int = 10):
+        """
+        Get up to limit cities whose name contains the query, ignoring case. Names starting with
+        the query come first, shorter names before longer ones. On PostgreSQL the pattern is
+        matched with the trigram index on cities.name.
+        """
+        pattern = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
         return (
-            session.query(City).filter(City.map_id == map_id, City.name.ilike(f"%{query}%")).all()
+            session.query(City)
+            .filter(City.map_id == map_id, City.name.ilike(f"%{pattern}%", escape="\\"))
+            .order_by(
+                case((City.name.ilike(f"{pattern}%", escape="\\"), 0), else_=1),
+                func.length(City.name),
+                func.lower(City.name),
+                City.name,
+            )
+            .limit(limit)
+            .all()
         )
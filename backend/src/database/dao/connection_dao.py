@@ -1,6 +1,9 @@
 """Dao file for the Connection entity"""
 
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
+from backend.src.database.dao.map_dao import MapDao
+from backend.src.database.map_changes import notify_map_changed
 from backend.src.database.schema.connection import Connection
 
 from backend.src.utils.helpers import get_logging_configuration
@@ -27,14 +30,47 @@ class ConnectionDao:
         """Save multiple connections in bulk."""
         try:
             session.bulk_save_objects(connections)
+            MapDao.increment_versions((connection.map_id for connection in connections), session)
             session.commit()
             logger.info("Successfully inserted %s connections in bulk.", len(connections))
         except Exception as e:
             session.rollback()
             logger.error("Error during bulk insert of connections: %s", e)
             raise
+        notify_map_changed(connection.map_id for connection in connections)
 
     @staticmethod
     def get_connections_by_map_id(map_id: int, session: Session):
         """get all connections of a map."""
         return session.query(Connection).filter_by(map_id=map_id).all()
+
+    @staticmethod
+    def stream_connections_by_map_id(map_id: int, session: Session, batch_size: int = 1000):
+        """
+        Iterate over (parent_city_id, child_city_id) rows of all connections of a map, ordered by
+        id, fetched batch_size at a time through a server-side cursor.
+        """
+        return (
+            session.query(Connection.parent_city_id, Connection.child_city_id)
+            .filter(Connection.map_id == map_id)
+            .order_by(Connection.id)
+            .yield_per(batch_size)
+        )
+
+    @staticmethod
+    def get_connections_of_cities(map_id: int, city_ids, session: Session):
+        """get all connections of a map starting or ending at one of the given cities."""
+        if not city_ids:
+            return []
+        return (
+            session.query(Connection)
+            .filter(
+                Connection.map_id == map_id,
+                or_(
+                    Connection.parent_city_id.in_(city_ids),
+                    Connection.child_city_id.in_(city_ids),
+                ),
+            )
+            .order_by(Connection.id)
+            .all()
+        )
@@ -2,6 +2,7 @@
 
 from sqlalchemy.orm import Session
 
+from backend.src.database.map_changes import notify_map_changed
 from backend.src.database.schema.map import Map
 
 
@@ -20,10 +21,13 @@ class MapDao:
 
     @staticmethod
     def save_map(map_obj: Map, session: Session) -> Map:
-        """save a map and return saved map"""
+        """save a map and return saved map, updating an existing map bumps its version"""
+        if map_obj.id is not None:
+            map_obj.version = (map_obj.version or 0) + 1
         session.add(map_obj)
         session.commit()
         session.refresh(map_obj)
+        notify_map_changed([map_obj.id])
         return map_obj
 
     @staticmethod
@@ -32,6 +36,20 @@ class MapDao:
         map_obj = MapDao.get_map_by_name(session, map_name)
         return map_obj.id
 
+    @staticmethod
+    def get_map_version(map_id, session: Session) -> int | None:
+        """get the current version of a map without loading the map"""
+        return session.query(Map.version).filter(Map.id == map_id).scalar()
+
+    @staticmethod
+    def increment_versions(map_ids, session: Session):
+        """bump the version of the given maps as part of the caller's transaction"""
+        map_ids = set(map_ids)
+        if map_ids:
+            session.query(Map).filter(Map.id.in_(map_ids)).update(
+                {Map.version: Map.version + 1}, synchronize_session=False
+            )
+
     @staticmethod
     def get_all_maps(session: Session) -> list[Map]:
         """get all maps"""
@@ -0,0 +1,78 @@
+"""Data Access Object for PopularRoutes"""
+
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, desc, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from backend.src.database.schema.popular_route import PopularRoute
+from backend.src.database.schema.route import Route
+
+
+class PopularRouteDao:
+    """Data Access Object for PopularRoutes"""
+
+    @staticmethod
+    def refresh_popular_routes(
+        session: Session, since: datetime = None, limit_per_map: int = 20
+    ) -> int:
+        """
+        Rebuild the popular routes from the route history requested since a point in time (all
+        of it without since): the limit_per_map most requested (start, end) pairs of every map,
+        ties ranked by the latest request. The aggregation runs in the database, the old ranking
+        is replaced in the same transaction. Returns the number of ranked routes.
+        """
+        request_count = func.count().label("request_count")
+        last_requested_at = func.max(Route.created_at).label("last_requested_at")
+        pairs = select(Route.map_id, Route.startpoint, Route.endpoint)
+        if since is not None:
+            pairs = pairs.where(Route.created_at >= since)
+        pairs = pairs.group_by(Route.map_id, Route.startpoint, Route.endpoint).add_columns(
+            request_count,
+            last_requested_at,
+            func.row_number()
+            .over(
+                partition_by=Route.map_id,
+                order_by=(desc(request_count), desc(last_requested_at)),
+            )
+            .label("rank"),
+        )
+        ranked = pairs.subquery()
+
+        session.execute(delete(PopularRoute))
+        session.execute(
+            insert(PopularRoute).from_select(
+                [
+                    "map_id",
+                    "startpoint",
+                    "endpoint",
+                    "request_count",
+                    "last_requested_at",
+                    "rank",
+                    "refreshed_at",
+                ],
+                select(
+                    ranked.c.map_id,
+                    ranked.c.startpoint,
+                    ranked.c.endpoint,
+                    ranked.c.request_count,
+                    ranked.c.last_requested_at,
+                    ranked.c.rank,
+                    literal(datetime.now(timezone.utc)),
+                ).where(ranked.c.rank <= limit_per_map),
+            )
+        )
+        session.commit()
+        return session.query(PopularRoute).count()
+
+    @staticmethod
+    def get_popular_routes(
+        session: Session, map_id: int = None, limit: int = None
+    ) -> list[PopularRoute]:
+        """the ranked popular routes, of one map or of all maps, at most limit per map"""
+        query = session.query(PopularRoute)
+        if map_id is not None:
+            query = query.filter(PopularRoute.map_id == map_id)
+        if limit is not None:
+            query = query.filter(PopularRoute.rank <= limit)
+        return query.order_by(PopularRoute.map_id, PopularRoute.rank).all()
@@ -1,13 +1,21 @@
 """Data Access Object for Routes"""
 
+import json
 from typing import cast
 
-from sqlalchemy import desc, asc
-from sqlalchemy.orm import Session
+from sqlalchemy import desc, asc, func, insert, literal, select, tuple_
+from sqlalchemy.dialects.postgresql import JSONPATH
+from sqlalchemy.orm import Session, load_only, raiseload, selectinload
 
+from backend.src.database.dao.route_result_dao import RouteResultDao
 from backend.src.database.dao.user_dao import UserDao
 from backend.src.database.schema.route import Route
 from backend.src.database.schema.route import RouteFilter
+from backend.src.database.schema.route_result import RouteResult
+
+SORT_FIELDS = ("created_at", "startpoint", "endpoint")
+ROUTE_FIELDS = ("id", "user_id", "map_id", "startpoint", "endpoint", "created_at", "route")
+MAX_ROUTES_LIMIT = 100
 
 
 class RouteDao:
@@ -20,6 +28,15 @@ class RouteDao:
         session.commit()
         return route
 
+    @staticmethod
+    def save_routes(rows: list[dict], session: Session) -> int:
+        """Save routes given as dicts of their columns in one multi-row insert, return the count"""
+        if not rows:
+            return 0
+        session.execute(insert(Route), rows)
+        session.commit()
+        return len(rows)
+
     @staticmethod
     def get_route_by_id(route_id: int, session: Session, map_id: int = None) -> Route | None:
         """
@@ -52,54 +69,38 @@ class RouteDao:
             - to_date: End of the date range for filtering (optional).
             - startpoint: Filter by route starting point (optional).
             - endpoint: Filter by route ending point (optional).
+            - via: Filter by a city the calculated route passes through (optional).
+            - after: Only routes sorted after this (sort value, id) keyset (optional).
+            - fields: Fields of ROUTE_FIELDS to load (optional, default all). Skipping "route"
+            skips reading the route results; id and the sort field are always loaded.
         :param session: Db session.
 
         :return: A list of Route objects matching the filters and sorted by the specified field.
-        :raises ValueError: If an invalid sorting field is provided.
+        :raises ValueError: If an invalid sorting field or an unknown field is provided.
         """
-        (
-            user_id,
-            field,
-            limit,
-            descending,
-            map_id,
-            from_date,
-            to_date,
-            startpoint,
-            endpoint,
-        ) = filter_params.destructure()
-
-        # Enforce a max limit of 100
-        limit = min(limit, 100)
-
-        # Validate the sorting field
-        if field not in ["created_at", "startpoint", "endpoint"]:
-            raise ValueError(f"Invalid sorting field: {field}")
-
-        # Dynamically determine the sorting column
-        sort_column = getattr(Route, field)
-        order = desc(sort_column) if descending else asc(sort_column)
-
-        # Build dynamic filter conditions
-        conditions = [Route.user_id == user_id]
+        limit = min(filter_params.limit, MAX_ROUTES_LIMIT)
+        return cast(list[Route], _routes_query(filter_params, session).limit(limit).all())
 
-        if map_id:
-            conditions.append(Route.map_id == map_id)
-        if from_date:
-            conditions.append(Route.created_at >= from_date)
-        if to_date:
-            conditions.append(Route.created_at <= to_date)
-        if startpoint:
-            conditions.append(Route.startpoint == startpoint)
-        if endpoint:
-            conditions.append(Route.endpoint == endpoint)
-
-        # Apply conditions and sorting, then limit results - handle everything in one go,
-        # letting the DBMS optimize as much as possible
-        return cast(
-            list[Route],
-            session.query(Route).filter(*conditions).order_by(order).limit(limit).all(),
-        )
+    @staticmethod
+    def get_routes_page(
+        filter_params: RouteFilter, session: Session
+    ) -> tuple[list[Route], tuple | None]:
+        """
+        Retrieve one page of get_routes using keyset pagination.
+
+        Returns the routes and the (sort value, id) keyset of the last one, which is passed as
+        filter_params.after to get the next page; the keyset is None on the last page. The page
+        is located with an index range scan, so its cost does not depend on its depth.
+        """
+        limit = min(filter_params.limit, MAX_ROUTES_LIMIT)
+        if limit < 1:
+            return [], None
+        # one more route tells whether there is a next page
+        routes = _routes_query(filter_params, session).limit(limit + 1).all()
+        if len(routes) <= limit:
+            return routes, None
+        last = routes[limit - 1]
+        return routes[:limit], (getattr(last, filter_params.field), last.id)
 
     @staticmethod
     def delete_route_by_id(route_id: int, session: Session, map_id: int = None) -> bool:
@@ -109,6 +110,7 @@ class RouteDao:
         route_id: The ID of the route to retrieve.
         map_id: (Optional) The ID of the map to restrict the query to.
         return True if a route is found and deleted, else False
+        Its route result is deleted as well unless another route shares it.
         """
         query = session.query(Route).filter_by(id=route_id)
         if map_id:
@@ -117,8 +119,11 @@ class RouteDao:
         route = query.first()
 
         if route:
+            result_id = route.result_id
             session.delete(route)
-            session.commit()
+            session.flush()
+            # commits the deletion together with the result if no other route shares it
+            RouteResultDao.delete_unreferenced_route_results(session, result_ids=[result_id])
             return True
         return False
 
@@ -138,6 +143,7 @@ class RouteDao:
     ) -> int:
         """
         Delete all routes for a user by user_id or username and return the number of routes deleted.
+        Their route results are deleted as well unless other routes share them.
         """
         if not user_id and not username:
             raise ValueError("Either 'user_id' or 'username' must be provided.")
@@ -152,6 +158,103 @@ class RouteDao:
         if map_id:
             query = query.filter(Route.map_id == map_id)
 
+        result_ids = [row.result_id for row in query.with_entities(Route.result_id).distinct()]
         deleted_count = query.delete()
-        session.commit()
+        # commits the deletion together with the results no other route shares
+        RouteResultDao.delete_unreferenced_route_results(session, result_ids=result_ids)
         return deleted_count
+
+
+def _routes_query(filter_params: RouteFilter, session: Session):
+    """filtered routes of get_routes in sort order, with the id as tie breaker"""
+    (
+        user_id,
+        field,
+        _,
+        descending,
+        map_id,
+        from_date,
+        to_date,
+        startpoint,
+        endpoint,
+    ) = filter_params.destructure()
+
+    # Validate the sorting field
+    if field not in SORT_FIELDS:
+        raise ValueError(f"Invalid sorting field: {field}")
+
+    # Dynamically determine the sorting column
+    sort_column = getattr(Route, field)
+    direction = desc if descending else asc
+
+    # Build dynamic filter conditions
+    query = session.query(Route)
+    conditions = [Route.user_id == user_id]
+
+    if map_id:
+        conditions.append(Route.map_id == map_id)
+    if from_date:
+        conditions.append(Route.created_at >= from_date)
+    if to_date:
+        conditions.append(Route.created_at <= to_date)
+    if startpoint:
+        conditions.append(Route.startpoint == startpoint)
+    if endpoint:
+        conditions.append(Route.endpoint == endpoint)
+    if filter_params.optional_filters.via:
+        query = query.join(Route.result)
+        conditions.append(_passes_through(filter_params.optional_filters.via, session))
+    if filter_params.after is not None:
+        conditions.extend(_keyset_conditions(filter_params))
+
+    fields = ROUTE_FIELDS if filter_params.fields is None else filter_params.fields
+    unknown = set(fields) - set(ROUTE_FIELDS)
+    if unknown:
+        raise ValueError(f"Invalid fields: {', '.join(sorted(unknown))}")
+    if "route" in fields:
+        # routes sharing a result load it once, in one query for the whole page
+        query = query.options(selectinload(Route.result))
+    else:
+        query = query.options(raiseload(Route.result))
+    if filter_params.fields is not None:
+        # the route is read through result_id
+        columns = {"id", field, *fields} - {"route"} | (
+            {"result_id"} if "route" in fields else set()
+        )
+        # columns that were not selected raise on access instead of being loaded one by one
+        query = query.options(
+            load_only(*(getattr(Route, column) for column in sorted(columns)), raiseload=True)
+        )
+
+    # Apply conditions and sorting in one query, letting the DBMS optimize as much as possible
+    return query.filter(*conditions).order_by(direction(sort_column), direction(Route.id))
+
+
+def _keyset_conditions(filter_params: RouteFilter) -> list:
+    """conditions for the routes sorted after the keyset filter_params.after"""
+    sort_column = getattr(Route, filter_params.field)
+    keyset, after = tuple_(sort_column, Route.id), tuple(filter_params.after)
+    if filter_params.descending:
+        conditions = [keyset < after]
+    else:
+        conditions = [keyset > after]
+    if filter_params.field == "created_at":
+        # implied by the keyset, but only plain comparisons let PostgreSQL skip the monthly
+        # partitions of routes beyond the page
+        if filter_params.descending:
+            conditions.append(Route.created_at <= after[0])
+        else:
+            conditions.append(Route.created_at >= after[0])
+    return conditions
+
+
+def _passes_through(city: str, session: Session):
+    """
+    condition for route results whose route contains the city. On PostgreSQL this is a jsonpath
+    match served by the GIN index ix_route_results_result_gin, other databases scan the route.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        path = f"$.route.* ? (@ == {json.dumps(city)})"
+        return RouteResult.result.op("@?")(literal(path).cast(JSONPATH))
+    cities = func.json_each(RouteResult.result, "$.route").table_valued("value")
+    return select(cities.c.value).where(cities.c.value == city).exists()
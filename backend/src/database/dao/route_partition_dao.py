@@ -0,0 +1,88 @@
+"""Data Access Object for the monthly partitions of the routes table (PostgreSQL only)"""
+
+import re
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# partitions are named after their month, e.g. routes_y2026m10
+PARTITION_NAME = "routes_y{year:04d}m{month:02d}"
+PARTITION_PATTERN = re.compile(r"^routes_y(\d{4})m(\d{2})$")
+DEFAULT_PARTITION = "routes_default"
+
+
+def partition_name(month: date) -> str:
+    """name of the partition of a month"""
+    return PARTITION_NAME.format(year=month.year, month=month.month)
+
+
+class RoutePartitionDao:
+    """
+    Data Access Object for the monthly partitions of the routes table.
+
+    Statements are executed but not committed.
+    """
+
+    @staticmethod
+    def is_partitioned(session: Session) -> bool:
+        """whether routes is a partitioned table"""
+        if session.get_bind().dialect.name != "postgresql":
+            return False
+        return bool(
+            session.execute(
+                text(
+                    "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+                    "WHERE partrelid = to_regclass('routes'))"
+                )
+            ).scalar()
+        )
+
+    @staticmethod
+    def lock_partitions(session: Session):
+        """serialize partition maintenance of concurrent processes until the transaction ends"""
+        session.execute(text("SELECT pg_advisory_xact_lock(hashtext('routes_partitions'))"))
+
+    @staticmethod
+    def get_partition_months(session: Session) -> list[date]:
+        """first day of the month of every monthly partition, in order"""
+        names = session.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE pg_inherits.inhparent = to_regclass('routes')"
+            )
+        ).scalars()
+        matches = (PARTITION_PATTERN.match(name) for name in names)
+        return sorted(date(int(m.group(1)), int(m.group(2)), 1) for m in matches if m)
+
+    @staticmethod
+    def create_partition(month: date, next_month: date, session: Session):
+        """
+        Create the partition of a month. Routes of the month that were stored in the default
+        partition meanwhile are moved into it.
+        """
+        name = partition_name(month)
+        bounds = {"start": month, "end": next_month}
+        session.execute(
+            text(f"CREATE TABLE {name} (LIKE routes INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        )
+        session.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                "WHERE created_at >= :start AND created_at < :end RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            ),
+            bounds,
+        )
+        session.execute(
+            text(
+                f"ALTER TABLE routes ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')"
+            )
+        )
+
+    @staticmethod
+    def drop_partition(month: date, session: Session):
+        """drop the partition of a month with all its routes"""
+        session.execute(text(f"DROP TABLE IF EXISTS {partition_name(month)}"))
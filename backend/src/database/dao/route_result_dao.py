@@ -0,0 +1,116 @@
+"""Data Access Object for RouteResults"""
+
+from sqlalchemy import exists, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend.src.database.schema.route import Route
+from backend.src.database.schema.route_result import RouteResult
+
+# result ids checked per statement when deleting unreferenced results
+DELETE_BATCH_SIZE = 1000
+
+
+class RouteResultDao:
+    """Data Access Object for RouteResults"""
+
+    @staticmethod
+    def get_route_result_by_hash(content_hash: str, session: Session) -> RouteResult | None:
+        """get a route result by its content hash"""
+        return session.query(RouteResult).filter(RouteResult.content_hash == content_hash).first()
+
+    @staticmethod
+    def get_or_create_route_result(
+        map_id: int, startpoint: str, endpoint: str, result, session: Session
+    ) -> RouteResult:
+        """
+        Return the stored route result with this content, storing it first if it is new.
+
+        A result that is already stored costs one lookup of its hash and is not written again.
+        The new result is flushed, not committed.
+        """
+        content_hash = RouteResult.content_hash_of(map_id, startpoint, endpoint, result)
+        route_result = RouteResultDao.get_route_result_by_hash(content_hash, session)
+        if route_result:
+            return route_result
+
+        route_result = RouteResult(
+            content_hash=content_hash,
+            map_id=map_id,
+            startpoint=startpoint,
+            endpoint=endpoint,
+            result=result,
+        )
+        try:
+            with session.begin_nested():
+                session.add(route_result)
+        except IntegrityError:
+            # stored by a concurrent request in the meantime
+            return RouteResultDao.get_route_result_by_hash(content_hash, session)
+        return route_result
+
+    @staticmethod
+    def get_or_create_route_results(items: list[dict], session: Session) -> list[int]:
+        """
+        Batch version of get_or_create_route_result for dicts of map_id, startpoint, endpoint and
+        result: return the id of the stored result of each item, storing the new ones with one
+        multi-row insert. Nothing is committed.
+        """
+        hashes = [RouteResult.content_hash_of(**item) for item in items]
+        result_ids = _result_ids(set(hashes), session)
+        new_items = {
+            content_hash: item
+            for content_hash, item in zip(hashes, items)
+            if content_hash not in result_ids
+        }
+        if new_items:
+            dialect = session.get_bind().dialect.name
+            insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+            # results stored concurrently by another process are read back below
+            session.execute(
+                insert(RouteResult).on_conflict_do_nothing(index_elements=["content_hash"]),
+                [{"content_hash": key, **item} for key, item in new_items.items()],
+            )
+            result_ids.update(_result_ids(set(new_items), session))
+        return [result_ids[content_hash] for content_hash in hashes]
+
+    @staticmethod
+    def delete_unreferenced_route_results(
+        session: Session, map_id: int = None, result_ids=None
+    ) -> int:
+        """
+        Delete the route results no route refers to, return the number deleted. With result_ids
+        only these results are checked, e.g. the results of deleted routes.
+        """
+        if result_ids is None:
+            candidates = [None]
+        else:
+            result_ids = list(result_ids)
+            candidates = [
+                result_ids[start : start + DELETE_BATCH_SIZE]
+                for start in range(0, len(result_ids), DELETE_BATCH_SIZE)
+            ]
+        deleted_count = 0
+        for batch in candidates:
+            query = session.query(RouteResult).filter(
+                ~exists().where(Route.result_id == RouteResult.id)
+            )
+            if map_id:
+                query = query.filter(RouteResult.map_id == map_id)
+            if batch is not None:
+                query = query.filter(RouteResult.id.in_(batch))
+            deleted_count += query.delete(synchronize_session=False)
+        session.commit()
+        return deleted_count
+
+
+def _result_ids(hashes: set[str], session: Session) -> dict[str, int]:
+    """ids of the stored route results by content hash"""
+    if not hashes:
+        return {}
+    rows = session.execute(
+        select(RouteResult.content_hash, RouteResult.id).where(RouteResult.content_hash.in_(hashes))
+    )
+    return {row.content_hash: row.id for row in rows}
@@ -1,6 +1,7 @@
 """handles connection sessions to the database"""
 
 import os
+import threading
 from contextlib import contextmanager
 
 from sqlalchemy import create_engine
@@ -10,21 +11,25 @@ from backend.src.utils.helpers import get_logging_configuration
 
 logger = get_logging_configuration()
 
+# connection pool of the per-process engine, see DatabaseConnection.pool_options
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+# seconds after which connections are replaced, -1 keeps them forever
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# one DatabaseConnection (and so one engine and pool) per database url and process
+_connections: dict[str, "DatabaseConnection"] = {}
+_connections_lock = threading.Lock()
+
 
 class DatabaseConnection:
     """Database connection class"""
 
     def __init__(self, config=None):
         """Initialize a database connection with specified parameters or fallback to environment"""
-        env_config = {
-            "user": os.getenv("DB_USER"),
-            "password": os.getenv("DB_PASSWORD"),
-            "host": os.getenv("DB_HOST"),
-            "port": os.getenv("DB_PORT"),
-            "database": os.getenv("DB_DATABASE"),
-        }
-
-        final_config = update_config_with_parameter_values(config, env_config)
+        final_config = update_config_with_parameter_values(config, _env_config())
         logger.debug("Final config: %s", final_config)
 
         # Assign final values to instance variables
@@ -37,11 +42,27 @@ class DatabaseConnection:
         self._check_missing_parameters()
 
         # Create the engine and session maker
-        self.engine = create_engine(
+        self.engine = create_engine(self.url, **self.pool_options())
+        self.session_local = sessionmaker(bind=self.engine)
+
+    @property
+    def url(self):
+        """connection url of the configured database"""
+        return (
             f"postgresql+psycopg2://{self.user}:{self.password}@{self.host}:"
             f"{self.port}/{self.database}"
         )
-        self.session_local = sessionmaker(bind=self.engine)
+
+    @staticmethod
+    def pool_options():
+        """keyword arguments for create_engine configuring the connection pool"""
+        return {
+            "pool_size": POOL_SIZE,
+            "max_overflow": MAX_OVERFLOW,
+            "pool_timeout": POOL_TIMEOUT,
+            "pool_recycle": POOL_RECYCLE,
+            "pool_pre_ping": POOL_PRE_PING,
+        }
 
     def _check_missing_parameters(self):
         """Helper method to check and raise an error if any parameters are missing"""
@@ -69,11 +90,72 @@ class DatabaseConnection:
         logger.debug("Getting session maker")
         return self.session_local
 
+    def get_pool_statistics(self) -> dict:
+        """Current size, checked out and overflow connections of the connection pool"""
+        pool = self.engine.pool
+        # only queue based pools know their size and overflow
+        return {
+            name: getattr(pool, name)()
+            for name in ("size", "checkedin", "checkedout", "overflow")
+            if hasattr(pool, name)
+        }
+
+
+def get_database_connection(config=None) -> DatabaseConnection:
+    """
+    Return the DatabaseConnection of this process for the configured database.
+
+    The engine and its connection pool are created on first use and shared by all sessions.
+    """
+    candidate = update_config_with_parameter_values(config, _env_config())
+    key = "{user}:{password}@{host}:{port}/{database}".format(**candidate)
+    db_connection = _connections.get(key)
+    if db_connection is None:
+        with _connections_lock:
+            db_connection = _connections.get(key)
+            if db_connection is None:
+                db_connection = DatabaseConnection(config)
+                _connections[key] = db_connection
+                logger.info(
+                    "Database engine created with pool options %s", db_connection.pool_options()
+                )
+    return db_connection
+
+
+def get_engine(config=None):
+    """Get the engine shared by this process"""
+    return get_database_connection(config).get_engine()
+
+
+def get_pool_statistics() -> dict:
+    """Connection pool statistics of all engines of this process, summed up"""
+    totals = {}
+    for db_connection in list(_connections.values()):
+        for name, value in db_connection.get_pool_statistics().items():
+            totals[name] = totals.get(name, 0) + value
+    return totals
+
+
+def _reset_pools_after_fork():
+    """
+    Forked worker processes must not reuse the parent's pooled connections, they would share
+    the same sockets. close=False leaves them open for the parent and only drops them from the pool.
+    """
+    global _connections_lock  # pylint: disable=global-statement
+    # the lock might have been held by another thread of the parent while forking
+    _connections_lock = threading.Lock()
+    for db_connection in list(_connections.values()):
+        db_connection.get_engine().dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
 
 @contextmanager
 def get_db_session(config=None) -> Session:
     """Getter for DB session with the configured parameters"""
-    db_connection = DatabaseConnection(config)
+    db_connection = get_database_connection(config)
     session_local = db_connection.get_session_local()
     db = session_local()
     logger.debug("Database session opened")
@@ -84,6 +166,17 @@ def get_db_session(config=None) -> Session:
         logger.debug("Database session closed")
 
 
+def _env_config():
+    """database parameters from the environment"""
+    return {
+        "user": os.getenv("DB_USER"),
+        "password": os.getenv("DB_PASSWORD"),
+        "host": os.getenv("DB_HOST"),
+        "port": os.getenv("DB_PORT"),
+        "database": os.getenv("DB_DATABASE"),
+    }
+
+
 def update_config_with_parameter_values(config, env_config):
     """overwrite default db_credentials with given parameters (if any)"""
     # Initialize final_config with values from env_config
@@ -0,0 +1,27 @@
+"""
+Notifications about changed maps.
+
+The DAO write paths report every map whose cities, connections or map entry changed, so derived
+data like the web backend's topology cache can be invalidated without the database layer knowing
+about it.
+"""
+
+from backend.src.utils.helpers import get_logging_configuration
+
+logger = get_logging_configuration()
+
+_listeners = []
+
+
+def on_map_changed(listener):
+    """Register listener(map_id) to be called after a map changed, usable as a decorator"""
+    _listeners.append(listener)
+    return listener
+
+
+def notify_map_changed(map_ids):
+    """Call all listeners once for every changed map id"""
+    for map_id in set(map_ids):
+        logger.debug("Map %s changed.", map_id)
+        for listener in _listeners:
+            listener(map_id)
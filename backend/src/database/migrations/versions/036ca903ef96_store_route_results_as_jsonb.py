@@ -0,0 +1,33 @@
+"""store route results as jsonb and index their contents
+
+Revision ID: 036ca903ef96
+Revises: ff0e27196bb2
+Create Date: 2026-10-19 20:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '036ca903ef96'
+down_revision: Union[str, None] = 'ff0e27196bb2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE route_results ALTER COLUMN result TYPE jsonb USING result::jsonb")
+    # results that are still JSON encoded strings are replaced by the objects they contain
+    op.execute(
+        "UPDATE route_results SET result = (result #>> '{}')::jsonb "
+        "WHERE jsonb_typeof(result) = 'string'"
+    )
+    # jsonpath matches of RouteDao.get_routes (routes via a city) use this index
+    op.execute("CREATE INDEX ix_route_results_result_gin ON route_results USING gin (result)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_route_results_result_gin")
+    op.execute("ALTER TABLE route_results ALTER COLUMN result TYPE json USING result::json")
@@ -0,0 +1,45 @@
+"""add indexes for the hot query paths of cities, connections and routes
+
+Revision ID: 1b568d87e4a7
+Revises: bcaf805ccde4
+Create Date: 2026-10-19 17:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1b568d87e4a7'
+down_revision: Union[str, None] = 'bcaf805ccde4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# CityDao.get_cities_by_map_id is served by ix_cities_map_id_position and
+# UserDao.get_user_by_username by the unique constraint on users.username.
+
+
+def upgrade() -> None:
+    # CityDao.get_city_by_name
+    op.create_index('ix_cities_map_id_name', 'cities', ['map_id', 'name'])
+    # ConnectionDao.get_connections_by_map_id and the map export
+    op.create_index('ix_connections_map_id', 'connections', ['map_id'])
+    # ConnectionDao.get_connection_by_parent_and_child, get_connections_of_cities and the
+    # ON DELETE CASCADE of deleted cities
+    op.create_index(
+        'ix_connections_parent_child', 'connections', ['parent_city_id', 'child_city_id']
+    )
+    op.create_index('ix_connections_child_city_id', 'connections', ['child_city_id'])
+    # RouteDao.get_routes filters by user and map and sorts by creation time
+    op.create_index(
+        'ix_routes_user_id_map_id_created_at', 'routes', ['user_id', 'map_id', 'created_at']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_routes_user_id_map_id_created_at', table_name='routes')
+    op.drop_index('ix_connections_child_city_id', table_name='connections')
+    op.drop_index('ix_connections_parent_child', table_name='connections')
+    op.drop_index('ix_connections_map_id', table_name='connections')
+    op.drop_index('ix_cities_map_id_name', table_name='cities')
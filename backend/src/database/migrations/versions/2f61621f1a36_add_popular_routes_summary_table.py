@@ -0,0 +1,40 @@
+"""add popular_routes summary table ranking the requested routes per map
+
+Revision ID: 2f61621f1a36
+Revises: 47c1350d07a0
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f61621f1a36'
+down_revision: Union[str, None] = '47c1350d07a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # rebuilt from the route history by PopularRouteDao.refresh_popular_routes
+    op.create_table('popular_routes',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('map_id', sa.Integer(), nullable=False),
+    sa.Column('startpoint', sa.String(length=255), nullable=False),
+    sa.Column('endpoint', sa.String(length=255), nullable=False),
+    sa.Column('request_count', sa.Integer(), nullable=False),
+    sa.Column('last_requested_at', sa.DateTime(), nullable=False),
+    sa.Column('rank', sa.Integer(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['map_id'], ['maps.id'], name='popular_routes_map_id_fkey', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_popular_routes_map_id_rank', 'popular_routes', ['map_id', 'rank'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_popular_routes_map_id_rank', table_name='popular_routes')
+    op.drop_table('popular_routes')
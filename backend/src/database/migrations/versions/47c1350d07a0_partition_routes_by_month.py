@@ -0,0 +1,98 @@
+"""partition routes by month of created_at
+
+Revision ID: 47c1350d07a0
+Revises: 036ca903ef96
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '47c1350d07a0'
+down_revision: Union[str, None] = '036ca903ef96'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# months after the current one that get a partition, later ones are created by
+# backend.src.database.route_partitions
+MONTHS_AHEAD = 3
+
+COLUMNS = "id, user_id, map_id, startpoint, endpoint, created_at, result_id"
+INDEXES = {
+    'ix_routes_user_id_map_id_created_at': ['user_id', 'map_id', 'created_at'],
+    'ix_routes_user_id_created_at_id': ['user_id', 'created_at', 'id'],
+    'ix_routes_result_id': ['result_id'],
+}
+
+
+def add_months(month: date, months: int) -> date:
+    """first day of the month months after the month of a date"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_routes_table(partitioned: bool):
+    """the routes table, partitioned tables need the partition key in their primary key"""
+    primary_key = "id, created_at" if partitioned else "id"
+    partition_by = " PARTITION BY RANGE (created_at)" if partitioned else ""
+    op.execute(
+        "CREATE TABLE routes ("
+        "id integer NOT NULL DEFAULT nextval('routes_id_seq'), "
+        "user_id integer NOT NULL, "
+        "map_id integer NOT NULL, "
+        "startpoint varchar(255) NOT NULL, "
+        "endpoint varchar(255) NOT NULL, "
+        "created_at timestamp without time zone NOT NULL, "
+        "result_id integer NOT NULL, "
+        f"CONSTRAINT routes_pkey PRIMARY KEY ({primary_key}), "
+        "CONSTRAINT routes_user_id_fkey FOREIGN KEY (user_id) "
+        "REFERENCES users (id) ON DELETE CASCADE, "
+        "CONSTRAINT routes_map_id_fkey FOREIGN KEY (map_id) "
+        "REFERENCES maps (id) ON DELETE CASCADE, "
+        "CONSTRAINT routes_result_id_fkey FOREIGN KEY (result_id) REFERENCES route_results (id)"
+        f"){partition_by}"
+    )
+    op.execute("ALTER SEQUENCE routes_id_seq OWNED BY routes.id")
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'routes', columns)
+
+
+def replace_routes_table(partitioned: bool):
+    """move the routes into a new routes table, keeping their ids"""
+    for name in INDEXES:
+        op.drop_index(name, table_name='routes')
+    op.execute("ALTER TABLE routes RENAME TO routes_previous")
+    op.execute("ALTER TABLE routes_previous RENAME CONSTRAINT routes_pkey TO routes_previous_pkey")
+    # keep the sequence when the previous table is dropped
+    op.execute("ALTER SEQUENCE routes_id_seq OWNED BY NONE")
+
+    create_routes_table(partitioned)
+    if partitioned:
+        oldest = op.get_bind().execute(sa.text("SELECT min(created_at) FROM routes_previous"))
+        current = add_months(datetime.now(timezone.utc).date(), 0)
+        month = add_months(oldest.scalar() or current, 0)
+        while month <= add_months(current, MONTHS_AHEAD):
+            next_month = add_months(month, 1)
+            op.execute(
+                f"CREATE TABLE routes_y{month.year:04d}m{month.month:02d} PARTITION OF routes "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')"
+            )
+            month = next_month
+        op.execute("CREATE TABLE routes_default PARTITION OF routes DEFAULT")
+
+    op.execute(f"INSERT INTO routes ({COLUMNS}) SELECT {COLUMNS} FROM routes_previous")
+    op.execute("DROP TABLE routes_previous")
+
+
+def upgrade() -> None:
+    replace_routes_table(partitioned=True)
+
+
+def downgrade() -> None:
+    # the partitions are dropped together with the partitioned table
+    replace_routes_table(partitioned=False)
@@ -0,0 +1,28 @@
+"""add keyset index on the route history of users
+
+Revision ID: 6bc1025788c1
+Revises: 73cd7af2198d
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6bc1025788c1'
+down_revision: Union[str, None] = '73cd7af2198d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # pages of RouteDao.get_routes_page over all maps of a user are read in index order
+    op.create_index(
+        'ix_routes_user_id_created_at_id', 'routes', ['user_id', 'created_at', 'id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_routes_user_id_created_at_id', table_name='routes')
@@ -0,0 +1,27 @@
+"""add trigram index on city names for city suggestions
+
+Revision ID: 73cd7af2198d
+Revises: 1b568d87e4a7
+Create Date: 2026-10-19 18:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '73cd7af2198d'
+down_revision: Union[str, None] = '1b568d87e4a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ILIKE '%query%' in CityDao.get_city_suggestions uses this index
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE INDEX ix_cities_name_trgm ON cities USING gin (name gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_cities_name_trgm")
@@ -0,0 +1,29 @@
+"""add spatial index on city positions for nearest city lookups
+
+Revision ID: 8e152b05d11a
+Revises: c79a0d80c0ba
+Create Date: 2026-10-19 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e152b05d11a'
+down_revision: Union[str, None] = 'c79a0d80c0ba'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # KNN ordering with the <-> operator in CityDao.get_nearest_cities uses this index
+    op.execute(
+        "CREATE INDEX ix_cities_position_gist ON cities "
+        "USING gist (point(position_x, position_y))"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_cities_position_gist")
@@ -0,0 +1,28 @@
+"""add version column to maps to track changes of cities and connections
+
+Revision ID: bcaf805ccde4
+Revises: d50b2ffc6419
+Create Date: 2026-10-19 15:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bcaf805ccde4'
+down_revision: Union[str, None] = 'd50b2ffc6419'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'maps', sa.Column('version', sa.Integer(), server_default='1', nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('maps', 'version')
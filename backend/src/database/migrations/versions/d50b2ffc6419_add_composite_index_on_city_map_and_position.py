@@ -0,0 +1,28 @@
+"""add composite index on city map id and position for viewport queries
+
+Revision ID: d50b2ffc6419
+Revises: 8e152b05d11a
+Create Date: 2026-10-19 14:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd50b2ffc6419'
+down_revision: Union[str, None] = '8e152b05d11a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CityDao.get_cities_in_bbox filters by map_id and position range
+    op.create_index(
+        'ix_cities_map_id_position', 'cities', ['map_id', 'position_x', 'position_y']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_cities_map_id_position', table_name='cities')
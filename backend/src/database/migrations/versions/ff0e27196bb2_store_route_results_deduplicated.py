@@ -0,0 +1,137 @@
+"""store route results deduplicated in route_results
+
+Revision ID: ff0e27196bb2
+Revises: 6bc1025788c1
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+import hashlib
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ff0e27196bb2'
+down_revision: Union[str, None] = '6bc1025788c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+routes = sa.table(
+    'routes',
+    sa.column('id', sa.Integer),
+    sa.column('map_id', sa.Integer),
+    sa.column('startpoint', sa.String),
+    sa.column('endpoint', sa.String),
+    sa.column('route', postgresql.JSON),
+    sa.column('result_id', sa.Integer),
+)
+route_results = sa.table(
+    'route_results',
+    sa.column('id', sa.Integer),
+    sa.column('content_hash', sa.String),
+    sa.column('map_id', sa.Integer),
+    sa.column('startpoint', sa.String),
+    sa.column('endpoint', sa.String),
+    sa.column('result', postgresql.JSON),
+)
+# content hash of every route, filled batch by batch before one set-based update of routes
+route_hashes = sa.table(
+    'route_hashes',
+    sa.column('route_id', sa.Integer),
+    sa.column('content_hash', sa.String),
+)
+
+
+def content_hash(map_id, startpoint, endpoint, result) -> str:
+    """same as RouteResult.content_hash_of, copied to keep the migration independent of the code"""
+    content = json.dumps(
+        {"map_id": map_id, "startpoint": startpoint, "endpoint": endpoint, "result": result},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def upgrade() -> None:
+    op.create_table('route_results',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('map_id', sa.Integer(), nullable=False),
+    sa.Column('startpoint', sa.String(length=255), nullable=True),
+    sa.Column('endpoint', sa.String(length=255), nullable=True),
+    sa.Column('result', postgresql.JSON(astext_type=sa.Text()), nullable=True),
+    sa.ForeignKeyConstraint(['map_id'], ['maps.id'], name='route_results_map_id_fkey', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('content_hash')
+    )
+    op.add_column('routes', sa.Column('result_id', sa.Integer(), nullable=True))
+
+    # move the results of the existing routes, every distinct result is stored once. The hashes
+    # are computed here as they have to match RouteResult.content_hash_of, the rows are written
+    # with one multi-row statement per batch and the routes are updated with one statement.
+    op.execute(
+        "CREATE TEMPORARY TABLE route_hashes "
+        "(route_id integer PRIMARY KEY, content_hash varchar(64) NOT NULL)"
+    )
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(routes.c.id, routes.c.map_id, routes.c.startpoint, routes.c.endpoint,
+                      routes.c.route)
+            .where(routes.c.id > last_id).order_by(routes.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        hashes = []
+        results = {}
+        for route_id, map_id, startpoint, endpoint, result in rows:
+            # results used to be stored as JSON encoded strings
+            if isinstance(result, str):
+                result = json.loads(result)
+            key = content_hash(map_id, startpoint, endpoint, result)
+            hashes.append({'route_id': route_id, 'content_hash': key})
+            results.setdefault(key, {
+                'content_hash': key, 'map_id': map_id, 'startpoint': startpoint,
+                'endpoint': endpoint, 'result': result,
+            })
+        # results of earlier batches are already stored
+        connection.execute(
+            postgresql.insert(route_results).on_conflict_do_nothing(
+                index_elements=['content_hash']
+            ),
+            list(results.values()),
+        )
+        connection.execute(sa.insert(route_hashes), hashes)
+        last_id = rows[-1][0]
+
+    op.execute(
+        "UPDATE routes SET result_id = route_results.id FROM route_hashes "
+        "JOIN route_results ON route_results.content_hash = route_hashes.content_hash "
+        "WHERE routes.id = route_hashes.route_id"
+    )
+    op.execute("DROP TABLE route_hashes")
+
+    op.alter_column('routes', 'result_id', nullable=False)
+    op.create_foreign_key('routes_result_id_fkey', 'routes', 'route_results', ['result_id'], ['id'])
+    op.create_index('ix_routes_result_id', 'routes', ['result_id'])
+    op.drop_column('routes', 'route')
+
+
+def downgrade() -> None:
+    op.add_column('routes', sa.Column('route', postgresql.JSON(astext_type=sa.Text()), nullable=True))
+    op.execute(
+        "UPDATE routes SET route = route_results.result "
+        "FROM route_results WHERE route_results.id = routes.result_id"
+    )
+    op.alter_column('routes', 'route', nullable=False)
+    op.drop_index('ix_routes_result_id', table_name='routes')
+    op.drop_constraint('routes_result_id_fkey', 'routes', type_='foreignkey')
+    op.drop_column('routes', 'result_id')
+    op.drop_table('route_results')
@@ -0,0 +1,130 @@
+"""
+Maintenance of the monthly partitions of the routes table on PostgreSQL.
+
+The routes are partitioned by month of created_at (see migration 47c1350d07a0). Partitions are
+created ROUTE_PARTITIONS_AHEAD months in advance, routes outside of all partitions are kept in
+the default partition until the partition of their month is created.
+
+Retention drops whole partitions: with ROUTE_RETENTION_MONTHS set, the partitions of months
+before the last ROUTE_RETENTION_MONTHS months (including the current one) are dropped, instead
+of deleting their routes row by row. Route results no route refers to anymore are deleted
+afterwards.
+
+The web backend runs the maintenance in a daemon thread at startup and then once a day, it can
+also be run from the command line:
+    python -m backend.src.database.route_partitions --retention-months 12
+"""
+
+import argparse
+import os
+import threading
+from datetime import date, datetime, timezone
+
+from backend.src.database.dao.route_partition_dao import RoutePartitionDao
+from backend.src.database.dao.route_result_dao import RouteResultDao
+from backend.src.database.db_connection import get_db_session
+from backend.src.utils.helpers import get_logging_configuration
+
+logger = get_logging_configuration()
+
+ROUTE_PARTITIONS_AHEAD = int(os.getenv("ROUTE_PARTITIONS_AHEAD", "3"))
+# 0 keeps all routes
+ROUTE_RETENTION_MONTHS = int(os.getenv("ROUTE_RETENTION_MONTHS", "0"))
+ROUTE_MAINTENANCE_ENABLED = os.getenv("ROUTE_MAINTENANCE_ENABLED", "true").lower() == "true"
+# seconds between two maintenance runs of the web backend
+MAINTENANCE_INTERVAL = 24 * 60 * 60
+
+
+def add_months(month: date, months: int) -> date:
+    """first day of the month months after the month of a date"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def maintain_route_partitions(
+    session,
+    months_ahead: int = ROUTE_PARTITIONS_AHEAD,
+    retention_months: int = ROUTE_RETENTION_MONTHS,
+    today: date = None,
+) -> dict:
+    """
+    Create the missing partitions up to months_ahead months after the current one and drop the
+    partitions older than retention_months. Returns the created and dropped months, nothing is
+    done if routes is not partitioned.
+    """
+    report = {"created": [], "dropped": [], "route_results_deleted": 0}
+    if not RoutePartitionDao.is_partitioned(session):
+        logger.info("Route partitions: routes is not partitioned, nothing to do.")
+        return report
+
+    current = add_months(today or datetime.now(timezone.utc).date(), 0)
+    RoutePartitionDao.lock_partitions(session)
+    existing = set(RoutePartitionDao.get_partition_months(session))
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month not in existing:
+            RoutePartitionDao.create_partition(month, add_months(month, 1), session)
+            report["created"].append(month)
+
+    if retention_months > 0:
+        oldest_kept = add_months(current, 1 - retention_months)
+        for month in sorted(existing):
+            if month < oldest_kept:
+                RoutePartitionDao.drop_partition(month, session)
+                report["dropped"].append(month)
+    session.commit()
+
+    if report["dropped"]:
+        report["route_results_deleted"] = RouteResultDao.delete_unreferenced_route_results(session)
+    logger.info(
+        "Route partitions: created %s, dropped %s, %s unreferenced route results deleted.",
+        [month.isoformat() for month in report["created"]],
+        [month.isoformat() for month in report["dropped"]],
+        report["route_results_deleted"],
+    )
+    return report
+
+
+def run_route_maintenance():
+    """maintain the partitions in a session of its own, errors are logged"""
+    try:
+        with get_db_session() as session:
+            maintain_route_partitions(session)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.error("Route partition maintenance failed: %s", e)
+
+
+def start_route_maintenance(stop: threading.Event = None) -> threading.Thread:
+    """Run the maintenance now and then every MAINTENANCE_INTERVAL in a daemon thread"""
+    stop = stop or threading.Event()
+
+    def run():
+        while True:
+            run_route_maintenance()
+            if stop.wait(MAINTENANCE_INTERVAL):
+                return
+
+    thread = threading.Thread(target=run, name="route-maintenance", daemon=True)
+    thread.start()
+    return thread
+
+
+def main(argv=None) -> int:
+    """Command line entry point to maintain the route partitions"""
+    parser = argparse.ArgumentParser(description="Create and drop partitions of the routes")
+    parser.add_argument("--months-ahead", type=int, default=ROUTE_PARTITIONS_AHEAD)
+    parser.add_argument(
+        "--retention-months",
+        type=int,
+        default=ROUTE_RETENTION_MONTHS,
+        help="Months of routes to keep including the current one, 0 keeps all",
+    )
+    args = parser.parse_args(argv)
+
+    with get_db_session() as session:
+        maintain_route_partitions(session, args.months_ahead, args.retention_months)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,6 +1,6 @@
 """Python file for database class City"""
 
-from sqlalchemy import ForeignKey, String, Column, Integer
+from sqlalchemy import ForeignKey, String, Column, Integer, Index
 
 from backend.src.database.schema.base import Base
 from backend.src.utils.helpers import get_logging_configuration
@@ -12,6 +12,12 @@ class City(Base):
     """Database class City"""
 
     __tablename__ = "cities"
+    __table_args__ = (
+        # viewport queries filter by map and position range
+        Index("ix_cities_map_id_position", "map_id", "position_x", "position_y"),
+        # lookups by name within a map
+        Index("ix_cities_map_id_name", "map_id", "name"),
+    )
     id: int = Column(Integer, primary_key=True, autoincrement=True)
     map_id: int = Column(
         Integer,
@@ -1,6 +1,6 @@
 """Python file for database class Connection"""
 
-from sqlalchemy import ForeignKey, Column, Integer
+from sqlalchemy import ForeignKey, Column, Index, Integer
 
 from backend.src.database.schema.base import Base
 from backend.src.utils.helpers import get_logging_configuration
@@ -12,6 +12,12 @@ class Connection(Base):
     """Database class Connection"""
 
     __tablename__ = "connections"
+    __table_args__ = (
+        Index("ix_connections_map_id", "map_id"),
+        # lookups by city, also used by the ON DELETE CASCADE of deleted cities
+        Index("ix_connections_parent_child", "parent_city_id", "child_city_id"),
+        Index("ix_connections_child_city_id", "child_city_id"),
+    )
     id: int = Column(Integer, primary_key=True, autoincrement=True)
     map_id: int = Column(
         Integer,
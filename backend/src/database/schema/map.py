@@ -16,6 +16,8 @@ class Map(Base):
     name: str = Column(String(255), unique=True, nullable=False)
     size_x: int = Column(Integer)
     size_y: int = Column(Integer)
+    # bumped on every change of the map, its cities or its connections
+    version: int = Column(Integer, nullable=False, default=1, server_default="1")
 
     def to_dict(self):
         """regular to_dict method for map"""
@@ -24,6 +26,7 @@ class Map(Base):
             "name": self.name,
             "size_x": self.size_x,
             "size_y": self.size_y,
+            "version": self.version,
         }
 
     def __eq__(self, other):
@@ -6,6 +6,8 @@ from backend.src.database.schema.connection import Connection  # noqa
 from backend.src.database.schema.map import Map  # noqa
 from backend.src.database.schema.user import User  # noqa
 from backend.src.database.schema.route import Route  # noqa
+from backend.src.database.schema.route_result import RouteResult  # noqa
+from backend.src.database.schema.popular_route import PopularRoute  # noqa
 
 
 # Register models by importing them
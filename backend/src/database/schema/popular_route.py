@@ -0,0 +1,58 @@
+"""Python file for database class PopularRoute"""
+
+from datetime import datetime
+
+from sqlalchemy import ForeignKey, String, Column, DateTime, Index, Integer
+
+from backend.src.database.schema.base import Base
+from backend.src.utils.helpers import get_logging_configuration
+
+logger = get_logging_configuration()
+
+
+class PopularRoute(Base):
+    """
+    Database class PopularRoute, a (map, start, end) pair of the route history ranked by how
+    often it was requested. The table is a summary rebuilt by PopularRouteDao.refresh_popular_routes
+    """
+
+    __tablename__ = "popular_routes"
+    # the most requested routes of a map in rank order
+    __table_args__ = (Index("ix_popular_routes_map_id_rank", "map_id", "rank"),)
+    id: int = Column(Integer, primary_key=True, autoincrement=True)
+    map_id: int = Column(
+        Integer,
+        ForeignKey("maps.id", name="popular_routes_map_id_fkey", ondelete="CASCADE"),
+        nullable=False,
+    )
+    startpoint: str = Column(String(255), nullable=False)
+    endpoint: str = Column(String(255), nullable=False)
+    request_count: int = Column(Integer, nullable=False)
+    last_requested_at: datetime = Column(DateTime, nullable=False)
+    # 1 is the most requested route of the map
+    rank: int = Column(Integer, nullable=False)
+    refreshed_at: datetime = Column(DateTime, nullable=False)
+
+    def to_dict(self):
+        """Convert the object into dictionary"""
+        popular_route_dict = {
+            "map_id": self.map_id,
+            "startpoint": self.startpoint,
+            "endpoint": self.endpoint,
+            "request_count": self.request_count,
+            "last_requested_at": self.last_requested_at,
+            "rank": self.rank,
+            "refreshed_at": self.refreshed_at,
+        }
+        logger.debug("Converting PopularRoute to dictionary: %s", popular_route_dict)
+        return popular_route_dict
+
+    def __repr__(self):
+        """Returns a string representation of a PopularRoute object"""
+        repr_str = (
+            f"<PopularRoute(map_id={self.map_id}, rank={self.rank}, "
+            f"startpoint={self.startpoint}, endpoint={self.endpoint}, "
+            f"request_count={self.request_count})>"
+        )
+        logger.debug("PopularRoute representation: %s", repr_str)
+        return repr_str
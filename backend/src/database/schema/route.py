@@ -5,10 +5,11 @@ from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Optional, Dict
 
-from sqlalchemy import ForeignKey, String, Column, DateTime, Integer
-from sqlalchemy.dialects.postgresql import JSON
+from sqlalchemy import ForeignKey, String, Column, DateTime, Index, Integer
+from sqlalchemy.orm import relationship
 
 from backend.src.database.schema.base import Base
+from backend.src.database.schema.route_result import RouteResult
 from backend.src.utils.helpers import get_logging_configuration
 
 logger = get_logging_configuration()
@@ -18,6 +19,14 @@ class Route(Base):
     """Database class Route"""
 
     __tablename__ = "routes"
+    # On PostgreSQL the table is partitioned by month of created_at and its primary key is
+    # (id, created_at), see database.route_partitions
+    # route history of a user, optionally per map, sorted by creation time
+    __table_args__ = (
+        Index("ix_routes_user_id_map_id_created_at", "user_id", "map_id", "created_at"),
+        Index("ix_routes_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_routes_result_id", "result_id"),
+    )
     id: int = Column(Integer, primary_key=True, autoincrement=True)
     user_id: int = Column(
         Integer,
@@ -31,8 +40,21 @@ class Route(Base):
     )
     startpoint: str = Column(String(255))
     endpoint: str = Column(String(255))
-    created_at: datetime = Column(DateTime, default=datetime.now(timezone.utc))
-    route: Dict = Column(JSON)
+    created_at: datetime = Column(
+        DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+    # the calculated route, shared with all routes of the same map, endpoints and result
+    result_id: int = Column(
+        Integer,
+        ForeignKey("route_results.id", name="routes_result_id_fkey"),
+        nullable=False,
+    )
+    result = relationship(RouteResult)
+
+    @property
+    def route(self) -> Dict | None:
+        """the calculated route"""
+        return self.result.result if self.result is not None else None
 
     def to_dict(self):
         """Convert the object into dictionary"""
@@ -68,6 +90,8 @@ class OptionalRouteFilters:
     to_date: Optional[datetime] = None
     startpoint: Optional[str] = None
     endpoint: Optional[str] = None
+    # city the route passes through, including its endpoints
+    via: Optional[str] = None
 
 
 @dataclass
@@ -79,6 +103,10 @@ class RouteFilter:
     limit: int = 10
     descending: bool = True
     optional_filters: OptionalRouteFilters = dataclasses.field(default_factory=OptionalRouteFilters)
+    # (sort field value, id) of the last route of the previous page, see RouteDao.get_routes_page
+    after: Optional[tuple] = None
+    # columns to load, None for all; the others are not read and may not be accessed
+    fields: Optional[tuple] = None
 
     def __post_init__(self):
         # Ensure optional_filters is a dictionary
@@ -0,0 +1,77 @@
+"""Python file for database class RouteResult"""
+
+import hashlib
+import json
+from typing import Dict
+
+from sqlalchemy import JSON, ForeignKey, String, Column, Integer
+from sqlalchemy.dialects.postgresql import JSONB
+
+from backend.src.database.schema.base import Base
+from backend.src.utils.helpers import get_logging_configuration
+
+logger = get_logging_configuration()
+
+
+class RouteResult(Base):
+    """
+    Database class RouteResult, a calculated route stored once and shared by every route of the
+    history with the same map, endpoints and result
+    """
+
+    __tablename__ = "route_results"
+    id: int = Column(Integer, primary_key=True, autoincrement=True)
+    # sha256 of map, endpoints and result, see content_hash
+    content_hash: str = Column(String(64), unique=True, nullable=False)
+    map_id: int = Column(
+        Integer,
+        ForeignKey("maps.id", name="route_results_map_id_fkey", ondelete="CASCADE"),
+        nullable=False,
+    )
+    startpoint: str = Column(String(255))
+    endpoint: str = Column(String(255))
+    # JSONB on PostgreSQL, its contents are indexed by ix_route_results_result_gin
+    result: Dict = Column(JSON().with_variant(JSONB(), "postgresql"))
+
+    @staticmethod
+    def content_hash_of(map_id: int, startpoint: str, endpoint: str, result) -> str:
+        """hash identifying a route result, independent of the key order of result"""
+        content = json.dumps(
+            {"map_id": map_id, "startpoint": startpoint, "endpoint": endpoint, "result": result},
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def create(cls, map_id: int, startpoint: str, endpoint: str, result) -> "RouteResult":
+        """new RouteResult with its content hash"""
+        return cls(
+            content_hash=cls.content_hash_of(map_id, startpoint, endpoint, result),
+            map_id=map_id,
+            startpoint=startpoint,
+            endpoint=endpoint,
+            result=result,
+        )
+
+    def to_dict(self):
+        """Convert the object into dictionary"""
+        result_dict = {
+            "id": self.id,
+            "content_hash": self.content_hash,
+            "map_id": self.map_id,
+            "startpoint": self.startpoint,
+            "endpoint": self.endpoint,
+            "result": self.result,
+        }
+        logger.debug("Converting RouteResult to dictionary: %s", result_dict)
+        return result_dict
+
+    def __repr__(self):
+        """Returns a string representation of a RouteResult object"""
+        repr_str = (
+            f"<RouteResult(id={self.id}, content_hash={self.content_hash}, map_id={self.map_id}, "
+            f"startpoint={self.startpoint}, endpoint={self.endpoint})>"
+        )
+        logger.debug("RouteResult representation: %s", repr_str)
+        return repr_str
@@ -11,6 +11,7 @@ from sqlalchemy.orm import sessionmaker
 
 from backend.src.database.schema.models import register_models
 from backend.src.database.schema.route import Route
+from backend.src.database.schema.route_result import RouteResult
 from backend.src.database.schema.user import User
 
 register_models()
@@ -25,6 +26,9 @@ DB_HOST = "localhost"  # Localhost for host connection
 DB_PORT = "5433"  # Port mapped for host according to the docker-compose file, modify if necessary
 DB_DATABASE = os.getenv("DB_DATABASE")
 
+# Map of the seeded routes
+MAP_ID = 1
+
 # Routes to be seeded
 ROUTE_DATA = [
     (
@@ -108,6 +112,7 @@ def seed_data():
     try:
         # Clear existing data
         session.query(Route).delete()
+        session.query(RouteResult).delete()
         session.query(User).delete()
         session.commit()
 
@@ -120,19 +125,24 @@ def seed_data():
         # Fetch users
         user_ids = [user_id for (user_id,) in session.query(User).with_entities(User.id).all()]
 
-        # Add routes for each user
+        # Add routes for each user, sharing one stored result per route
+        results = [
+            RouteResult.create(MAP_ID, startpoint, endpoint, route_data)
+            for startpoint, endpoint, route_data in ROUTE_DATA
+        ]
         now = datetime.now(timezone.utc)
         routes = []
         for user_id in user_ids:
-            for startpoint, endpoint, route_data in ROUTE_DATA:
+            for result in results:
                 days_offset = secrets.randbelow(31)  # Random number from 0 to 30
                 created_at = now - timedelta(days=days_offset)
                 route = Route(
                     user_id=user_id,
-                    startpoint=startpoint,
-                    endpoint=endpoint,
+                    map_id=MAP_ID,
+                    startpoint=result.startpoint,
+                    endpoint=result.endpoint,
                     created_at=created_at,
-                    route=route_data,
+                    result=result,
                 )
                 routes.append(route)
 
@@ -155,6 +165,7 @@ def clear_data():
 
     try:
         session.query(Route).delete()
+        session.query(RouteResult).delete()
         session.query(User).delete()
         session.commit()
         print("Data cleared successfully.")
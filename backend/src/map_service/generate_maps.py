@@ -0,0 +1,67 @@
+"""
+Command line interface for the synthetic map generator.
+
+Usage:
+    python -m backend.src.map_service.generate_maps --name Big --cities 100000 --output big.json.gz
+    python -m backend.src.map_service.generate_maps --name Big --cities 100000 --clusters 20 --store
+"""
+
+import argparse
+
+from backend.src.database.db_connection import get_db_session
+from backend.src.map_service.map_generator import (
+    MapGeneratorConfig,
+    generate_map,
+    write_map_snapshot,
+)
+from backend.src.map_service.map_service import store_map_data
+from backend.src.utils.helpers import get_logging_configuration
+
+logger = get_logging_configuration()
+
+
+def main(argv=None):
+    """Command line entry point to generate a map into a snapshot file or the database"""
+    parser = argparse.ArgumentParser(description="Generate a synthetic road network map")
+    parser.add_argument("--name", required=True, help="Name of the generated map")
+    parser.add_argument("--cities", type=int, required=True, help="Number of cities")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--degree", type=int, default=3)
+    parser.add_argument("--clusters", type=int, default=0)
+    parser.add_argument("--cluster-spread", type=float, default=0.05)
+    parser.add_argument("--size-x", type=int)
+    parser.add_argument("--size-y", type=int)
+    parser.add_argument("--output", help="Snapshot file to write (.json or .json.gz)")
+    parser.add_argument("--store", action="store_true", help="Store the map in the database")
+    args = parser.parse_args(argv)
+
+    if not args.output and not args.store:
+        parser.error("at least one of --output or --store is required")
+
+    config = MapGeneratorConfig(
+        city_count=args.cities,
+        seed=args.seed,
+        degree=args.degree,
+        cluster_count=args.clusters,
+        cluster_spread=args.cluster_spread,
+        size_x=args.size_x,
+        size_y=args.size_y,
+    )
+    map_data = generate_map(args.name, config)
+    logger.info(
+        "Generated map %s with %s cities and %s connections.",
+        args.name,
+        len(map_data["cities"]),
+        len(map_data["connections"]),
+    )
+
+    if args.output:
+        write_map_snapshot(map_data, args.output)
+
+    if args.store:
+        with get_db_session() as session:
+            store_map_data(map_data, session)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Command line interface for importing map files into the database.
+
+Usage:
+    python -m backend.src.map_service.import_maps big.json.gz
+    python -m backend.src.map_service.import_maps cities.csv --batch-size 20000
+    python -m backend.src.map_service.import_maps changed.json --update
+
+See `map_file_import` for the supported JSON and CSV formats.
+"""
+
+import argparse
+
+from backend.src.database.db_connection import get_db_session
+from backend.src.map_service.map_file_import import (
+    FORMATS,
+    MapExistsError,
+    MapFileError,
+    detect_format,
+    import_map_file,
+    open_map_file,
+)
+from backend.src.map_service.map_importer import IMPORT_BATCH_SIZE
+from backend.src.utils.helpers import get_logging_configuration
+
+logger = get_logging_configuration()
+
+
+def main(argv=None) -> int:
+    """Command line entry point to import map files, returns the number of failed imports"""
+    parser = argparse.ArgumentParser(description="Import map files into the database")
+    parser.add_argument("files", nargs="+", help="Map files (.json, .csv, optionally .gz)")
+    parser.add_argument("--format", choices=FORMATS, help="File format, default by extension")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument(
+        "--update", action="store_true", help="Update existing maps, only changes are written"
+    )
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for path in args.files:
+        file_format = args.format or detect_format(path)
+        logger.info("Importing %s file %s.", file_format, path)
+        try:
+            with open_map_file(path) as stream, get_db_session() as session:
+                import_map_file(stream, file_format, session, args.batch_size, args.update)
+        except (MapFileError, MapExistsError, OSError) as e:
+            logger.error("Import of %s failed: %s", path, e)
+            failed += 1
+    return failed
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
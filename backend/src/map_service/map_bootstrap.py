@@ -0,0 +1,147 @@
+"""
+Background bootstrap of the maps at application startup.
+
+The dummy maps are generated and imported in a daemon thread, so the web backend serves requests
+(health checks, maps that already exist) while the import runs. Its progress is tracked in
+bootstrap_progress and reported by the readiness check.
+
+Failed attempts are retried MAP_BOOTSTRAP_ATTEMPTS times in total with exponential backoff, e.g.
+while the database is still starting. A bootstrap that failed for good fails the liveness check,
+so the orchestrator restarts the backend.
+"""
+
+import os
+import threading
+import time
+
+from backend.src.database.db_connection import get_db_session
+from backend.src.map_service.map_service import fetch_and_store_map_data_if_needed
+from backend.src.utils.helpers import get_logging_configuration
+
+logger = get_logging_configuration()
+
+# set to "false" to bootstrap the maps before the server starts
+MAP_BOOTSTRAP_BACKGROUND = os.getenv("MAP_BOOTSTRAP_BACKGROUND", "true").lower() == "true"
+MAP_BOOTSTRAP_ATTEMPTS = int(os.getenv("MAP_BOOTSTRAP_ATTEMPTS", "5"))
+# seconds before the second attempt, doubled for every further one up to MAX_RETRY_DELAY
+MAP_BOOTSTRAP_RETRY_DELAY = float(os.getenv("MAP_BOOTSTRAP_RETRY_DELAY", "2"))
+MAX_RETRY_DELAY = 60.0
+
+
+class BootstrapProgress:
+    """Thread-safe state of the map bootstrap: pending, running, retrying, ready or failed"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = {
+            "status": "pending",
+            "maps_total": 0,
+            "maps_done": 0,
+            "current_map": None,
+            "rows_imported": 0,
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+            "failed_attempts": 0,
+        }
+
+    def start(self, maps_total: int):
+        """the bootstrap starts importing maps_total maps"""
+        with self._lock:
+            self._state.update(
+                status="running",
+                maps_total=maps_total,
+                maps_done=0,
+                rows_imported=0,
+                started_at=time.time(),
+                error=None,
+            )
+
+    def map_started(self, name: str):
+        """the import of a map started"""
+        with self._lock:
+            self._state["current_map"] = name
+
+    def map_done(self, statistics: dict = None):
+        """the current map was imported or skipped"""
+        with self._lock:
+            self._state["maps_done"] += 1
+            self._state["current_map"] = None
+            if statistics:
+                self._state["rows_imported"] += statistics.get("cities", 0) + statistics.get(
+                    "connections", 0
+                )
+
+    def finish(self):
+        """all maps are available"""
+        with self._lock:
+            self._state.update(status="ready", current_map=None, finished_at=time.time())
+
+    def fail(self, error):
+        """the bootstrap was aborted"""
+        with self._lock:
+            self._state.update(
+                status="failed", current_map=None, finished_at=time.time(), error=str(error)
+            )
+
+    def retry(self):
+        """the failed attempt is retried after a delay, its error is kept"""
+        with self._lock:
+            self._state.update(status="retrying", current_map=None)
+            self._state["failed_attempts"] += 1
+
+    @property
+    def ready(self) -> bool:
+        """whether the bootstrap finished successfully"""
+        with self._lock:
+            return self._state["status"] == "ready"
+
+    def snapshot(self) -> dict:
+        """copy of the current state"""
+        with self._lock:
+            return dict(self._state)
+
+
+bootstrap_progress = BootstrapProgress()
+
+
+def run_map_bootstrap(
+    progress: BootstrapProgress = bootstrap_progress,
+    attempts: int = MAP_BOOTSTRAP_ATTEMPTS,
+    retry_delay: float = MAP_BOOTSTRAP_RETRY_DELAY,
+):
+    """
+    Generate and store the dummy maps if needed, reporting to progress. Failed attempts are
+    retried with exponential backoff, the bootstrap fails after attempts failed attempts.
+    """
+    for attempt in range(1, attempts + 1):
+        if _bootstrap_attempt(progress):
+            progress.finish()
+            return
+        if attempt < attempts:
+            delay = min(retry_delay * 2 ** (attempt - 1), MAX_RETRY_DELAY)
+            logger.warning("Map bootstrap attempt %d failed, retrying in %.1fs.", attempt, delay)
+            progress.retry()
+            time.sleep(delay)
+    logger.error("Map bootstrap failed after %d attempts.", attempts)
+
+
+def _bootstrap_attempt(progress: BootstrapProgress) -> bool:
+    """store the dummy maps once, whether it succeeded"""
+    try:
+        with get_db_session() as session:
+            fetch_and_store_map_data_if_needed(session=session, progress=progress)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.error("Map bootstrap failed: %s", e)
+        progress.fail(e)
+    return progress.snapshot()["status"] != "failed"
+
+
+def start_map_bootstrap(progress: BootstrapProgress = bootstrap_progress) -> threading.Thread:
+    """Run the map bootstrap in a daemon thread and return the thread"""
+    thread = threading.Thread(
+        target=run_map_bootstrap, args=(progress,), name="map-bootstrap", daemon=True
+    )
+    thread.start()
+    logger.info("Map bootstrap started in the background.")
+    return thread
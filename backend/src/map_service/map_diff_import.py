@@ -0,0 +1,192 @@
+"""
+Incremental import of a new version of an existing map.
+
+The incoming cities and connections are compared with the stored ones, only the differences are
+written: new cities and connections are inserted, moved cities are updated and cities and
+connections that are no longer part of the map are deleted, all in bulk and in one transaction.
+Cities are identified by their name, connections by the names of their cities.
+"""
+
+import time
+
+from opentelemetry.trace import get_tracer
+from sqlalchemy.orm import Session
+
+from backend.src.database.dao.bulk_import_dao import BulkImportDao
+from backend.src.database.dao.city_dao import CityDao
+from backend.src.database.dao.map_dao import MapDao
+from backend.src.database.map_changes import notify_map_changed
+from backend.src.map_service.map_importer import IMPORT_BATCH_SIZE
+from backend.src.utils.helpers import get_logging_configuration
+
+logger = get_logging_configuration()
+tracer = get_tracer("map-diff-import")
+
+
+def import_map_diff(
+    session: Session, header: dict, records, batch_size: int = IMPORT_BATCH_SIZE
+) -> dict:
+    """
+    Update the stored map named header["name"] to the cities and connections of records and
+    return a report of the changes.
+
+    header and records have the format of map_file_import: {"name", "size_x", "size_y"} and
+    ("city", (name, position_x, position_y)) / ("connection", (parent, child)) tuples.
+    Raises ValueError if the map does not exist.
+    """
+    started = time.perf_counter()
+    map_obj = MapDao.get_map_by_name(session, header["name"])
+    if map_obj is None:
+        raise ValueError(f"Map {header['name']} does not exist")
+    map_id = map_obj.id
+
+    with tracer.start_as_current_span("import_map_diff") as span:
+        span.set_attribute("map_id", map_id)
+        try:
+            report = _apply_diff(session, map_obj, header, records, batch_size)
+            if report["changed"]:
+                MapDao.increment_versions([map_id], session)
+                session.commit()
+            else:
+                session.rollback()
+        except Exception:
+            session.rollback()
+            raise
+        if report["changed"]:
+            notify_map_changed([map_id])
+
+        report["seconds"] = round(time.perf_counter() - started, 3)
+        span.set_attribute("changed", report["changed"])
+
+    logger.info(
+        "Map %s updated: %s/%s/%s cities and %s/%s connections added/updated/removed/added/removed"
+        " in %.2fs.",
+        header["name"],
+        len(report["cities"]["added"]),
+        len(report["cities"]["updated"]),
+        len(report["cities"]["removed"]),
+        len(report["connections"]["added"]),
+        len(report["connections"]["removed"]),
+        report["seconds"],
+    )
+    return report
+
+
+def _apply_diff(session: Session, map_obj, header: dict, records, batch_size: int) -> dict:
+    """write the differences between the stored map and records, without committing"""
+    stored = {city.name: city for city in CityDao.stream_cities_by_map_id(map_obj.id, session)}
+    added, moved, removed, incoming_connections = _compare_cities(stored, records)
+    city_ids = _write_cities(session, map_obj.id, stored, (added, moved, removed), batch_size)
+
+    connections = _compare_connections(map_obj.id, city_ids, incoming_connections, session)
+    # connections of removed cities are deleted before the cities
+    BulkImportDao.delete_connections([row[0] for row in connections[1]], session)
+    BulkImportDao.delete_cities([city.id for city in removed], session)
+    for start in range(0, len(connections[0]), batch_size):
+        BulkImportDao.insert_connections(
+            map_obj.id, connections[0][start : start + batch_size], session
+        )
+
+    size_changed = (map_obj.size_x, map_obj.size_y) != (header["size_x"], header["size_y"])
+    if size_changed:
+        map_obj.size_x, map_obj.size_y = header["size_x"], header["size_y"]
+
+    report = {
+        "map_id": map_obj.id,
+        "size_changed": size_changed,
+        "cities": _city_changes(added, moved, removed),
+        "connections": _connection_changes(stored, city_ids, *connections[:2]),
+        "skipped_connections": connections[2],
+    }
+    report["changed"] = size_changed or any(
+        report[kind][change] for kind in ("cities", "connections") for change in report[kind]
+    )
+    return report
+
+
+def _write_cities(session: Session, map_id: int, stored: dict, changes: tuple, batch_size: int):
+    """insert the added and update the moved cities, returns the ids of the remaining cities"""
+    added, moved, removed = changes
+    removed_names = {city.name for city in removed}
+    city_ids = {name: city.id for name, city in stored.items() if name not in removed_names}
+    for start in range(0, len(added), batch_size):
+        city_ids.update(
+            BulkImportDao.insert_cities(map_id, added[start : start + batch_size], session)
+        )
+    BulkImportDao.update_city_positions([(city.id, x, y) for city, x, y in moved], session)
+    return city_ids
+
+
+def _city_changes(added: list, moved: list, removed: list) -> dict:
+    """report of the changed cities"""
+    return {
+        "added": [name for name, _, _ in added],
+        "updated": [
+            {
+                "name": city.name,
+                "position_x": x,
+                "position_y": y,
+                "previous_position_x": city.position_x,
+                "previous_position_y": city.position_y,
+            }
+            for city, x, y in moved
+        ],
+        "removed": [city.name for city in removed],
+    }
+
+
+def _connection_changes(stored: dict, city_ids: dict, added: list, removed: list) -> dict:
+    """report of the changed connections by city names"""
+    city_names = {city.id: name for name, city in stored.items()}
+    city_names.update({city_id: name for name, city_id in city_ids.items()})
+    return {
+        "added": [
+            {"parent": city_names[parent], "child": city_names[child]} for parent, child in added
+        ],
+        "removed": [
+            {"parent": city_names.get(parent), "child": city_names.get(child)}
+            for _, parent, child in removed
+        ],
+    }
+
+
+def _compare_cities(stored: dict, records) -> tuple:
+    """
+    added (name, x, y) rows, moved (city, x, y), removed cities and the incoming
+    (parent, child) connections of records compared to the stored cities by name
+    """
+    added, moved, seen, incoming_connections = [], [], set(), set()
+    for kind, record in records:
+        if kind == "city":
+            name, position_x, position_y = record
+            seen.add(name)
+            city = stored.get(name)
+            if city is None:
+                added.append(record)
+            elif (city.position_x, city.position_y) != (position_x, position_y):
+                moved.append((city, position_x, position_y))
+        elif kind == "connection":
+            incoming_connections.add(record)
+    removed = [city for name, city in stored.items() if name not in seen]
+    return added, moved, removed, incoming_connections
+
+
+def _compare_connections(
+    map_id: int, city_ids: dict, incoming_connections: set, session: Session
+) -> tuple:
+    """
+    added (parent_id, child_id) connections, removed (id, parent_id, child_id) rows and the number
+    of incoming connections with unknown cities; duplicates of stored connections are removed
+    """
+    wanted = {
+        (city_ids[parent], city_ids[child])
+        for parent, child in incoming_connections
+        if parent in city_ids and child in city_ids
+    }
+    existing, removed = set(), []
+    for connection_id, parent_id, child_id in BulkImportDao.get_connection_rows(map_id, session):
+        if (parent_id, child_id) in wanted and (parent_id, child_id) not in existing:
+            existing.add((parent_id, child_id))
+        else:
+            removed.append((connection_id, parent_id, child_id))
+    return sorted(wanted - existing), removed, len(incoming_connections) - len(wanted)
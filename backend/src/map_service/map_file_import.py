@@ -0,0 +1,340 @@
+"""
+Streaming import of map files with bounded memory.
+
+Two formats are supported:
+
+- JSON in the shape of the map snapshots written by map_generator (optionally gzip compressed):
+  {"name": ..., "mapsizeX": ..., "mapsizeY": ..., "cities": [...], "connections": [...]}
+  name and map size have to precede the cities, the cities have to precede the connections.
+- CSV with one record per line, the first column gives the record type:
+      map,<name>,<size_x>,<size_y>
+      city,<name>,<position_x>,<position_y>
+      connection,<parent city name>,<child city name>
+
+Files are parsed incrementally and every record is validated as it is read, so only the current
+record, the batches of the MapImporter and the name -> id mapping of the cities are held in memory.
+Records are fed to the MapImporter and written to the database in batches, an invalid record rolls
+back the whole map. With update=True a file for an existing map is imported as a diff against the
+stored map, see `map_diff_import`.
+
+See `import_maps` for the command line interface.
+"""
+
+import csv
+import gzip
+import io
+import json
+
+from sqlalchemy.orm import Session
+
+from backend.src.database.dao.map_dao import MapDao
+from backend.src.map_service.map_diff_import import import_map_diff
+from backend.src.map_service.map_importer import IMPORT_BATCH_SIZE, MapImporter
+from backend.src.utils.helpers import get_logging_configuration
+
+logger = get_logging_configuration()
+
+FORMATS = ("json", "csv")
+# characters read from the file at once
+READ_SIZE = 64 * 1024
+# a single JSON value (a city, a connection, ...) may not be larger than this
+MAX_VALUE_SIZE = 1024 * 1024
+MAX_NAME_LENGTH = 255
+
+
+class MapFileError(ValueError):
+    """A map file is malformed or contains invalid records"""
+
+
+class MapExistsError(ValueError):
+    """A map with the name of the imported map already exists"""
+
+
+def import_map_file(
+    stream,
+    file_format: str,
+    session: Session,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    update: bool = False,
+) -> dict:
+    """
+    Import the map of a text stream in the given format and return the import statistics of
+    MapImporter. Raises MapFileError for invalid files and MapExistsError if the map exists.
+
+    With update=True an existing map is updated to the content of the file instead and the change
+    report of import_map_diff is returned.
+    """
+    if file_format not in FORMATS:
+        raise MapFileError(f"Unsupported map file format: {file_format}")
+    records = iter_json_records(stream) if file_format == "json" else iter_csv_records(stream)
+
+    kind, header = next(records, (None, None))
+    if kind != "map":
+        raise MapFileError("The map file does not contain a map")
+    records = _check_records(records)
+    if MapDao.get_map_by_name(session, header["name"]):
+        if update:
+            return import_map_diff(session, header, records, batch_size)
+        raise MapExistsError(f"Map {header['name']} already exists")
+
+    with MapImporter(
+        session, header["name"], header["size_x"], header["size_y"], batch_size
+    ) as importer:
+        for kind, record in records:
+            if kind == "city":
+                importer.add_city(*record)
+            else:
+                importer.add_connection(*record)
+    return importer.statistics
+
+
+def _check_records(records):
+    """pass on the city and connection records of a map, rejecting duplicate cities"""
+    city_names = set()
+    for kind, record in records:
+        if kind == "city":
+            if record[0] in city_names:
+                raise MapFileError(f"Duplicate city {record[0]}")
+            city_names.add(record[0])
+        elif kind != "connection":
+            raise MapFileError("A map file may only contain one map")
+        yield kind, record
+
+
+def iter_map_data_records(map_data: dict):
+    """
+    Records of a map definition in the JSON shape (see map_service._generate_dummy_map_data),
+    the header is returned as the first record like for map files.
+    """
+    yield "map", {
+        "name": map_data["name"],
+        "size_x": map_data["mapsizeX"],
+        "size_y": map_data["mapsizeY"],
+    }
+    for city in map_data["cities"]:
+        yield "city", (city["name"], city["positionX"], city["positionY"])
+    for connection in map_data["connections"]:
+        yield "connection", (connection["parent"], connection["child"])
+
+
+def open_map_file(path: str):
+    """open a map file as text stream, transparently decompressing .gz files"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")  # pylint: disable=consider-using-with
+
+
+def detect_format(path: str) -> str:
+    """file format by file extension, .gz is ignored"""
+    name = path[: -len(".gz")] if path.endswith(".gz") else path
+    return "csv" if name.endswith(".csv") else "json"
+
+
+def iter_csv_records(stream):
+    """Parse and validate the records of a CSV map file, see the module documentation"""
+    header_read = False
+    for line_number, row in enumerate(csv.reader(stream), start=1):
+        if not row:
+            continue
+        kind, values = row[0].strip(), row[1:]
+        where = f"line {line_number}"
+        if kind == "map" and len(values) == 3:
+            header_read = True
+            yield "map", _map_header(
+                values[0], _int(values[1], where), _int(values[2], where), where
+            )
+        elif not header_read:
+            raise MapFileError(f"{where}: the map record has to be the first record")
+        elif kind == "city" and len(values) == 3:
+            yield "city", _city(values[0], _int(values[1], where), _int(values[2], where), where)
+        elif kind == "connection" and len(values) == 2:
+            yield "connection", _connection(values[0], values[1], where)
+        else:
+            raise MapFileError(f"{where}: invalid record {row[:4]}")
+
+
+def _int(value: str, where: str):
+    """integer CSV field"""
+    try:
+        return int(value)
+    except ValueError as e:
+        raise MapFileError(f"{where}: {value!r} is not an integer") from e
+
+
+def iter_json_records(stream):
+    """Parse and validate the records of a JSON map file, see the module documentation"""
+    reader = _JsonStreamReader(stream)
+    reader.expect("{")
+    header = {}
+    header_read = False
+    if reader.next_is("}"):
+        reader.expect_end()
+        return
+    while True:
+        key = reader.value()
+        if not isinstance(key, str):
+            raise MapFileError(f"{reader.where()}: object keys must be strings")
+        reader.expect(":")
+        if key in ("cities", "connections"):
+            if not header_read:
+                yield "map", _map_header(
+                    header.get("name"), header.get("mapsizeX"), header.get("mapsizeY"), "map"
+                )
+                header_read = True
+            for index, item in enumerate(reader.array_items()):
+                yield _json_record(key, item, f"{key}[{index}]")
+        elif header_read:
+            raise MapFileError(f"{reader.where()}: {key} has to precede cities and connections")
+        else:
+            header[key] = reader.value()
+        if not reader.next_is(","):
+            reader.expect("}")
+            break
+    reader.expect_end()
+    if not header_read:
+        yield "map", _map_header(
+            header.get("name"), header.get("mapsizeX"), header.get("mapsizeY"), "map"
+        )
+
+
+def _json_record(key: str, item, where: str):
+    """validate one element of the cities or connections array"""
+    if not isinstance(item, dict):
+        raise MapFileError(f"{where}: expected an object")
+    if key == "cities":
+        return "city", _city(item.get("name"), item.get("positionX"), item.get("positionY"), where)
+    return "connection", _connection(item.get("parent"), item.get("child"), where)
+
+
+def _map_header(name, size_x, size_y, where: str) -> dict:
+    """validated map record"""
+    _check_name(name, where)
+    for size in (size_x, size_y):
+        if not _is_int(size) or size <= 0:
+            raise MapFileError(f"{where}: the map size must consist of positive integers")
+    return {"name": name, "size_x": size_x, "size_y": size_y}
+
+
+def _city(name, position_x, position_y, where: str) -> tuple:
+    """validated (name, position_x, position_y) of a city"""
+    _check_name(name, where)
+    if not _is_int(position_x) or not _is_int(position_y):
+        raise MapFileError(f"{where}: city positions must be integers")
+    return name, position_x, position_y
+
+
+def _connection(parent, child, where: str) -> tuple:
+    """validated (parent, child) city names of a connection"""
+    _check_name(parent, where)
+    _check_name(child, where)
+    return parent, child
+
+
+def _check_name(name, where: str):
+    """names are non-empty strings fitting into the name columns"""
+    if not isinstance(name, str) or not name or len(name) > MAX_NAME_LENGTH:
+        raise MapFileError(
+            f"{where}: names must be non-empty strings of at most {MAX_NAME_LENGTH} characters"
+        )
+
+
+def _is_int(value) -> bool:
+    """whether value is an integer, JSON booleans are not"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class _JsonStreamReader:
+    """
+    Incremental reader for the structure of a JSON document.
+
+    Only the current value is decoded at a time, the text before it is dropped from the buffer.
+    """
+
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = ""
+        self.position = 0
+        # characters dropped from the buffer, for error positions
+        self.offset = 0
+        self.eof = False
+
+    def where(self) -> str:
+        """current position for error messages"""
+        return f"character {self.offset + self.position}"
+
+    def _read(self) -> bool:
+        """append the next chunk of the stream to the buffer, False at the end of the stream"""
+        if self.eof:
+            return False
+        chunk = self.stream.read(READ_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        if self.position > READ_SIZE:
+            self.offset += self.position
+            self.buffer = self.buffer[self.position :]
+            self.position = 0
+        self.buffer += chunk
+        return True
+
+    def _skip_whitespace(self):
+        """advance to the next non-whitespace character, reading as needed"""
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in " \t\r\n":
+                self.position += 1
+            if self.position < len(self.buffer) or not self._read():
+                return
+
+    def next_is(self, char: str) -> bool:
+        """consume char if it is the next non-whitespace character"""
+        self._skip_whitespace()
+        if self.buffer[self.position : self.position + 1] == char:
+            self.position += 1
+            return True
+        return False
+
+    def expect(self, char: str):
+        """consume char, which has to be the next non-whitespace character"""
+        if not self.next_is(char):
+            raise MapFileError(f"{self.where()}: expected {char!r}")
+
+    def expect_end(self):
+        """only whitespace may follow the end of the document"""
+        self._skip_whitespace()
+        if self.position < len(self.buffer):
+            raise MapFileError(f"{self.where()}: unexpected data after the end of the document")
+
+    def value(self):
+        """decode the next complete JSON value"""
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.position)
+                # a number at the end of the buffer may continue in the next chunk
+                if end < len(self.buffer) or self.eof:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise MapFileError(f"{self.where()}: {e.msg}") from e
+            if len(self.buffer) - self.position > MAX_VALUE_SIZE:
+                raise MapFileError(f"{self.where()}: value exceeds {MAX_VALUE_SIZE} characters")
+            self._read()
+
+    def array_items(self):
+        """iterate over the values of the next array"""
+        self.expect("[")
+        if self.next_is("]"):
+            return
+        while True:
+            yield self.value()
+            if not self.next_is(","):
+                self.expect("]")
+                return
+
+
+def wrap_binary_stream(stream) -> io.TextIOWrapper:
+    """text stream over a binary stream, e.g. a request body"""
+    return io.TextIOWrapper(stream, encoding="utf-8", newline="")
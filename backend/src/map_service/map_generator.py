@@ -0,0 +1,183 @@
+"""
+Deterministic generator for synthetic, road-network-like maps.
+
+Cities are scattered uniformly or around cluster centers and every city is connected to its
+`degree` nearest neighbours (k-nearest-neighbour graph), which yields planar-like networks with
+several alternative paths between most cities. Neighbour lookups use a uniform grid, so maps with
+millions of cities can be generated in linear time.
+
+The generated dicts have the same shape as the former external map JSON, see
+`map_service._generate_dummy_map_data`.
+
+See `generate_maps` for the command line interface.
+"""
+
+import gzip
+import json
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+from random import Random
+from typing import Optional
+
+from backend.src.utils.helpers import get_logging_configuration
+from backend.src.utils.spatial_index import GridIndex
+
+logger = get_logging_configuration()
+
+
+@dataclass
+class MapGeneratorConfig:  # pylint: disable=too-many-instance-attributes
+    """Parameters for generate_map"""
+
+    city_count: int
+    seed: int = 42
+    # number of nearest neighbours every city is connected to
+    degree: int = 3
+    # 0 distributes cities uniformly, otherwise cities are grouped around this many centers
+    cluster_count: int = 0
+    # standard deviation of a cluster as a fraction of the map size
+    cluster_spread: float = 0.05
+    # map dimensions, derived from the city count if not set
+    size_x: Optional[int] = None
+    size_y: Optional[int] = None
+    # join isolated parts of the k-NN graph so every city is reachable
+    connect_components: bool = True
+    city_prefix: str = "City"
+
+
+class _UnionFind:
+    """Disjoint sets over point indices"""
+
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, index):
+        """find the root of index, compressing the path"""
+        root = index
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[index] != root:
+            self.parent[index], index = root, self.parent[index]
+        return root
+
+    def union(self, first, second):
+        """merge the sets of first and second"""
+        self.parent[self.find(first)] = self.find(second)
+
+
+def _generate_positions(config: MapGeneratorConfig, rng: Random, size_x: int, size_y: int):
+    """scatter city positions uniformly or around cluster centers"""
+    if config.cluster_count <= 0:
+        return [
+            (rng.randint(0, size_x - 1), rng.randint(0, size_y - 1))
+            for _ in range(config.city_count)
+        ]
+
+    centers = [
+        (rng.uniform(0, size_x), rng.uniform(0, size_y)) for _ in range(config.cluster_count)
+    ]
+    spread_x, spread_y = config.cluster_spread * size_x, config.cluster_spread * size_y
+    positions = []
+    for _ in range(config.city_count):
+        center_x, center_y = rng.choice(centers)
+        x = min(max(int(rng.gauss(center_x, spread_x)), 0), size_x - 1)
+        y = min(max(int(rng.gauss(center_y, spread_y)), 0), size_y - 1)
+        positions.append((x, y))
+    return positions
+
+
+def _connect_components(grid: GridIndex, edges: set, city_count: int):
+    """add the shortest found edge from every smaller component to another component"""
+    components = _UnionFind(city_count)
+    for first, second in edges:
+        components.union(first, second)
+
+    members = defaultdict(list)
+    for index in range(city_count):
+        members[components.find(index)].append(index)
+    if len(members) <= 1:
+        return
+
+    logger.info("Joining %s disconnected parts of the generated map.", len(members))
+    for component in sorted(members.values(), key=len)[:-1]:
+        root = components.find(component[0])
+        best_distance, bridge = float("inf"), None
+        # probing a handful of members is enough to find a short bridge
+        for index in component[:: max(1, len(component) // 8)]:
+            found = grid.nearest(
+                *grid.points[index],
+                accept=lambda other, root=root: components.find(other) != root,
+            )
+            if found and found[0][0] < best_distance:
+                best_distance, bridge = found[0][0], (index, found[0][1])
+        if bridge:
+            first, second = bridge
+            edges.add((min(first, second), max(first, second)))
+            components.union(first, second)
+
+
+def generate_map(name: str, config: MapGeneratorConfig) -> dict:
+    """Generate one map definition, the same config always yields the same map"""
+    if config.city_count < 1:
+        raise ValueError("city_count must be at least 1")
+    if config.degree < 1:
+        raise ValueError("degree must be at least 1")
+
+    rng = Random(config.seed)
+    default_size = max(10, int(math.sqrt(config.city_count) * 10))
+    size_x = config.size_x or default_size
+    size_y = config.size_y or default_size
+
+    positions = _generate_positions(config, rng, size_x, size_y)
+
+    # roughly two cities per cell on average
+    cell_size = max(1.0, math.sqrt(size_x * size_y / max(1, config.city_count / 2)))
+    grid = GridIndex(positions, cell_size)
+
+    edges = set()
+    degree = min(config.degree, config.city_count - 1)
+    if degree > 0:
+        for index, (x, y) in enumerate(positions):
+            # one extra neighbour because every city is its own nearest neighbour
+            for _, neighbour in grid.nearest(x, y, degree + 1):
+                if neighbour != index:
+                    edges.add((min(index, neighbour), max(index, neighbour)))
+
+    if config.connect_components:
+        _connect_components(grid, edges, config.city_count)
+
+    city_names = [f"{config.city_prefix}_{index + 1}" for index in range(config.city_count)]
+    return {
+        "name": name,
+        "mapsizeX": size_x,
+        "mapsizeY": size_y,
+        "cities": [
+            {"name": city_names[index], "positionX": x, "positionY": y}
+            for index, (x, y) in enumerate(positions)
+        ],
+        "connections": [
+            {"parent": city_names[first], "child": city_names[second]}
+            for first, second in sorted(edges)
+        ],
+    }
+
+
+def _open_snapshot(path: str, mode: str):
+    """open a snapshot file, transparently (de)compressing .gz files"""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")  # pylint: disable=consider-using-with
+
+
+def write_map_snapshot(map_data: dict, path: str):
+    """Write a generated map to a JSON snapshot file (gzip compressed if path ends in .gz)"""
+    with _open_snapshot(path, "w") as snapshot:
+        json.dump(map_data, snapshot)
+    logger.info("Map snapshot %s written to %s.", map_data["name"], path)
+
+
+def load_map_snapshot(path: str) -> dict:
+    """Load a map snapshot written by write_map_snapshot"""
+    with _open_snapshot(path, "r") as snapshot:
+        return json.load(snapshot)
@@ -0,0 +1,129 @@
+"""Bulk import of a map with its cities and connections in one transaction"""
+
+import os
+import time
+
+from opentelemetry.trace import get_tracer
+from sqlalchemy.orm import Session
+
+from backend.src.database.dao.bulk_import_dao import BulkImportDao
+from backend.src.database.map_changes import notify_map_changed
+from backend.src.database.schema.map import Map
+from backend.src.utils.helpers import get_logging_configuration
+
+logger = get_logging_configuration()
+tracer = get_tracer("map-importer")
+
+# cities or connections written per database round trip
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+
+
+class MapImporter:  # pylint: disable=too-many-instance-attributes
+    """
+    Import one map in a single transaction, cities and connections are written in batches.
+
+    Connections refer to cities by name, names are resolved with the ids returned when the cities
+    were written, so only the name -> id mapping of the map is held in memory:
+
+        with MapImporter(session, "Skyrim", 2000, 2000) as importer:
+            importer.add_city("Whiterun", 1000, 1000)
+            importer.add_city("Riften", 1800, 1400)
+            importer.add_connection("Whiterun", "Riften")
+        importer.statistics  # rows, duration and rows per second
+
+    The transaction is committed when the block ends and rolled back if it raises.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        name: str,
+        size_x: int,
+        size_y: int,
+        batch_size: int = IMPORT_BATCH_SIZE,
+    ):
+        self.session = session
+        self.name = name
+        self.map = Map(name=name, size_x=size_x, size_y=size_y)
+        self.batch_size = batch_size
+        self.city_ids: dict[str, int] = {}
+        self.statistics = {"cities": 0, "connections": 0, "skipped_connections": 0}
+        self._cities = []
+        self._connections = []
+        self._started = None
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        BulkImportDao.insert_map(self.map, self.session)
+        self.statistics["map_id"] = self.map.id
+        return self
+
+    def add_city(self, name: str, position_x: int, position_y: int):
+        """Queue a city, written with the next full batch"""
+        self._cities.append((name, position_x, position_y))
+        if len(self._cities) >= self.batch_size:
+            self._write_cities()
+
+    def add_connection(self, parent: str, child: str):
+        """Queue a connection between two cities given by name"""
+        self._connections.append((parent, child))
+        if len(self._connections) >= self.batch_size:
+            self._write_connections()
+
+    def _write_cities(self):
+        """write all queued cities"""
+        self.city_ids.update(BulkImportDao.insert_cities(self.map.id, self._cities, self.session))
+        self.statistics["cities"] += len(self._cities)
+        self._cities = []
+
+    def _write_connections(self):
+        """write all queued connections whose cities exist"""
+        # connections may refer to cities that are still queued
+        self._write_cities()
+        resolved = [
+            (self.city_ids[parent], self.city_ids[child])
+            for parent, child in self._connections
+            if parent in self.city_ids and child in self.city_ids
+        ]
+        self.statistics["skipped_connections"] += len(self._connections) - len(resolved)
+        self.statistics["connections"] += BulkImportDao.insert_connections(
+            self.map.id, resolved, self.session
+        )
+        self._connections = []
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None:
+            self.session.rollback()
+            logger.error("Import of map %s failed, rolled back: %s", self.name, exc)
+            return False
+
+        with tracer.start_as_current_span("commit_map_import") as span:
+            try:
+                self._write_connections()
+                self.session.commit()
+            except Exception:
+                self.session.rollback()
+                raise
+            notify_map_changed([self.statistics["map_id"]])
+
+            seconds = time.perf_counter() - self._started
+            rows = self.statistics["cities"] + self.statistics["connections"]
+            self.statistics["seconds"] = round(seconds, 3)
+            self.statistics["rows_per_second"] = round(rows / seconds) if seconds else rows
+            span.set_attributes(self.statistics)
+
+        logger.info(
+            "Imported map %s: %s cities, %s connections in %.2fs (%s rows/s).",
+            self.name,
+            self.statistics["cities"],
+            self.statistics["connections"],
+            seconds,
+            self.statistics["rows_per_second"],
+        )
+        if self.statistics["skipped_connections"]:
+            logger.warning(
+                "Skipped %s connections of map %s with unknown cities.",
+                self.statistics["skipped_connections"],
+                self.name,
+            )
+        return False
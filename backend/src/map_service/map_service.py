@@ -1,16 +1,19 @@
 """map service to retrieve map information from the provided external map service"""
-from random import Random
 
 import requests
 from opentelemetry.trace import get_tracer
 from sqlalchemy.orm import Session
 
-from backend.src.database.dao.city_dao import CityDao
-from backend.src.database.dao.connection_dao import ConnectionDao
 from backend.src.database.dao.map_dao import MapDao
-from backend.src.database.schema.city import City
-from backend.src.database.schema.connection import Connection
 from backend.src.database.schema.map import Map
+from backend.src.map_service.map_generator import MapGeneratorConfig, generate_map
+from backend.src.map_service.map_diff_import import import_map_diff
+from backend.src.map_service.map_file_import import iter_map_data_records
+from backend.src.map_service.map_importer import MapImporter
+from backend.src.navigation_service.navigation_service import (
+    compute_components,
+    summarize_components,
+)
 from backend.src.utils.helpers import get_logging_configuration
 from backend.src.utils.tracing import set_span_error_flags
 
@@ -40,49 +43,21 @@ def _generate_dummy_map_data():
             ...
         ],
     }
+    Cities are joined to their nearest neighbours, so there are alternative routes to find.
     """
-    rng = Random(42)  # deterministic for reproducibility
-    dummy_maps = []
-
-    for size in DUMMY_MAP_SIZES:
-        map_name = f"Dummy-{size}x{size}"
-        cities = []
-
-        # Generate `size` cities inside the [0, size_x-1] / [0, size_y-1] bounds
-        for i in range(size):
-            # keep it simple but spread a bit over the map
-            x = rng.randint(0, size - 1)
-            y = rng.randint(0, size - 1)
-            cities.append(
-                {
-                    "name": f"City_{size}_{i + 1}",
-                    "positionX": x,
-                    "positionY": y,
-                }
-            )
-
-        # Simple chain connections to ensure the graph is connected:
-        # City_1 -> City_2 -> ... -> City_N
-        connections = []
-        for i in range(len(cities) - 1):
-            connections.append(
-                {
-                    "parent": cities[i]["name"],
-                    "child": cities[i + 1]["name"],
-                }
-            )
-
-        dummy_maps.append(
-            {
-                "name": map_name,
-                "mapsizeX": size,
-                "mapsizeY": size,
-                "cities": cities,
-                "connections": connections,
-            }
+    return [
+        generate_map(
+            f"Dummy-{size}x{size}",
+            MapGeneratorConfig(
+                city_count=size,
+                seed=42,  # deterministic for reproducibility
+                size_x=size,
+                size_y=size,
+                city_prefix=f"City_{size}",
+            ),
         )
-
-    return dummy_maps
+        for size in DUMMY_MAP_SIZES
+    ]
 
 
 # Not used anymore since the map provider endpoint was a university-internal one, yb
@@ -103,12 +78,69 @@ def _generate_dummy_map_data():
 #             logger.error("Error fetching map data: %s", e)
 #             return []
 
-def fetch_and_store_map_data_if_needed(session: Session):
+
+def store_map_data(map_data: dict, session: Session) -> Map:
+    """
+    Store a map definition (same shape as `_generate_dummy_map_data` entries) with its cities
+    and connections in one transaction and return the saved map.
+    """
+    return _import_map_data(map_data, session).map
+
+
+def _import_map_data(map_data: dict, session: Session) -> MapImporter:
+    """import a map definition, the returned importer holds the map and import statistics"""
+    importer = MapImporter(session, map_data["name"], map_data["mapsizeX"], map_data["mapsizeY"])
+    with importer:
+        for city in map_data["cities"]:
+            importer.add_city(city["name"], city["positionX"], city["positionY"])
+        # connections are only stored if both endpoints exist
+        for conn in map_data["connections"]:
+            importer.add_connection(conn["parent"], conn["child"])
+
+    check_map_components(map_data)
+    return importer
+
+
+def update_map_data(map_data: dict, session: Session) -> dict:
+    """
+    Update the stored map of a map definition to its cities and connections, only the
+    differences are written. Returns the change report of import_map_diff.
+    """
+    records = iter_map_data_records(map_data)
+    _, header = next(records)
+    report = import_map_diff(session, header, records)
+    if report["changed"]:
+        check_map_components(map_data)
+    return report
+
+
+def check_map_components(map_data: dict) -> dict:
+    """Log a warning if the cities of a map definition are not all connected to each other"""
+    city_names = [city["name"] for city in map_data["cities"]]
+    components = compute_components(
+        city_names, ((conn["parent"], conn["child"]) for conn in map_data["connections"])
+    )
+    summary = summarize_components(components, {name: name for name in city_names})
+    if summary["component_count"] > 1:
+        logger.warning(
+            "Map %s has %s disconnected components (largest: %s of %s cities, isolated: %s).",
+            map_data["name"],
+            summary["component_count"],
+            summary["largest_component_size"],
+            len(city_names),
+            len(summary["isolated_cities"]),
+        )
+    return summary
+
+
+def fetch_and_store_map_data_if_needed(session: Session, progress=None):
     """
-    Check if maps already exist in the database.
-    - If yes: do nothing.
-    - If no: generate dummy maps (10x10, 25x25, 50x50, 100x100),
-      create cities & connections and store them.
+    Generate the dummy maps (10x10, 25x25, 50x50, 100x100) and store them.
+    - Maps that do not exist yet are created with their cities & connections.
+    - Maps that exist are updated incrementally, only changed cities & connections are written.
+
+    progress is an optional map_bootstrap.BootstrapProgress, it is updated per map and marked
+    as failed if storing a map fails.
     """
     with tracer.start_as_current_span("check_existing_maps") as span:
         existing_maps = MapDao.get_all_maps(session) if hasattr(MapDao, "get_all_maps") else None
@@ -120,73 +152,42 @@ def fetch_and_store_map_data_if_needed(session: Session):
             existing_count = len(existing_maps)
 
         if existing_count > 0:
-            logger.info("Maps already present in DB (%s). Skipping dummy generation.", existing_count)
-            return
-
-        logger.info("No maps found in DB. Generating dummy maps.")
+            logger.info(
+                "Maps already present in DB (%s). Updating existing dummy maps.", existing_count
+            )
+        else:
+            logger.info("No maps found in DB. Generating dummy maps.")
         span.set_attribute("maps_generated", True)
 
     dummy_maps = _generate_dummy_map_data()
+    if progress:
+        progress.start(len(dummy_maps))
 
     with tracer.start_as_current_span("process_dummy_map_data") as span:
         try:
             for dummy in dummy_maps:
                 map_name = dummy["name"]
                 logger.info("Creating dummy map: %s", map_name)
+                if progress:
+                    progress.map_started(map_name)
 
-                # Double-check by name in case of race conditions
                 if MapDao.get_map_by_name(session, map_name):
-                    logger.info("Map %s already exists. Skipping.", map_name)
+                    logger.info("Map %s already exists. Applying changes.", map_name)
+                    update_map_data(dummy, session)
+                    if progress:
+                        progress.map_done()
                     continue
 
-                # Create map entry
-                new_map = Map(
-                    name=map_name,
-                    size_x=dummy["mapsizeX"],
-                    size_y=dummy["mapsizeY"],
-                )
-                new_map = MapDao.save_map(new_map, session)
-                logger.info("Map %s saved successfully (id=%s).", new_map.name, new_map.id)
-
-                # Insert cities
-                cities_to_insert = [
-                    City(
-                        map_id=new_map.id,
-                        name=city["name"],
-                        position_x=city["positionX"],
-                        position_y=city["positionY"],
-                    )
-                    for city in dummy["cities"]
-                ]
-
-                if cities_to_insert:
-                    CityDao.save_cities_bulk(cities_to_insert, session)
-                    logger.info("Inserted %s cities for map %s.", len(cities_to_insert), map_name)
-                inserted_cities = CityDao.get_cities_by_map_id(new_map.id, session)
-                city_map = {city.name: city.id for city in inserted_cities}
-
-                # Insert connections (only if both endpoints exist)
-                new_connections = [
-                    Connection(
-                        map_id=new_map.id,
-                        parent_city_id=city_map[conn["parent"]],
-                        child_city_id=city_map[conn["child"]],
-                    )
-                    for conn in dummy["connections"]
-                    if conn["parent"] in city_map and conn["child"] in city_map
-                ]
-
-                if new_connections:
-                    ConnectionDao.save_connections_bulk(new_connections, session)
-                    logger.info(
-                        "Inserted %s connections for map %s.",
-                        len(new_connections),
-                        map_name,
-                    )
+                importer = _import_map_data(dummy, session)
+                if progress:
+                    progress.map_done(importer.statistics)
 
         except Exception as e:
             logger.error("Error while generating dummy maps: %s", e)
             set_span_error_flags(span, e)
+            if progress:
+                progress.fail(e)
+            return
 
     logger.info("Dummy maps generated and stored successfully.")
 
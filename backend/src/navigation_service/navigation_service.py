@@ -2,7 +2,8 @@
 
 import heapq
 import math
-from collections import defaultdict
+import threading
+from collections import OrderedDict, defaultdict
 from dataclasses import dataclass
 from typing import Dict, List
 
@@ -27,6 +28,11 @@ class UpdateData:
 logger = get_logging_configuration()
 tracer = get_tracer("navigation-service")
 
+# graphs of the most recently routed map versions, see get_graph
+GRAPH_CACHE_SIZE = 4
+_graph_cache: OrderedDict = OrderedDict()
+_graph_cache_lock = threading.Lock()
+
 
 def get_route(start_city_name, end_city_name, data, headers):
     """Calculates the route and returns the results."""
@@ -43,7 +49,13 @@ def get_route(start_city_name, end_city_name, data, headers):
             if not start_city or not end_city:
                 raise ValueError(f"City not found: {start_city_name} or {end_city_name}")
 
-            graph = create_graph(data)
+            graph, components = get_graph(data)
+            # cities in different components can never be connected, skip the search entirely
+            if components[start_city["id"]] != components[end_city["id"]]:
+                raise ValueError(
+                    f"No connection found between {start_city_name} and {end_city_name}"
+                )
+
             path, distance, second_path, second_distance = dijkstra(
                 graph, start_city["id"], end_city["id"]
             )
@@ -95,6 +107,36 @@ def get_route(start_city_name, end_city_name, data, headers):
             return {"error": f"Invalid input data: {ke}"}
 
 
+def get_graph(data):
+    """
+    Return the graph and components of the map data.
+
+    Data sent with "map_id", "version" and "content_hash" is cached, as a map version never
+    changes the same graph is reused by all routes on it until the map is updated. The content
+    hash keeps a map that was recreated with the same id and version, e.g. after a database
+    reset, from getting the graph of the previous one.
+    """
+    key = (data.get("map_id"), data.get("version"), data.get("content_hash"))
+    cacheable = None not in key
+    if cacheable:
+        with _graph_cache_lock:
+            if key in _graph_cache:
+                _graph_cache.move_to_end(key)
+                return _graph_cache[key]
+
+    graph = create_graph(data)
+    components = compute_components(
+        [city["id"] for city in data["cities"]], iterate_graph_edges(graph)
+    )
+    if cacheable:
+        with _graph_cache_lock:
+            _graph_cache[key] = (graph, components)
+            while len(_graph_cache) > GRAPH_CACHE_SIZE:
+                _graph_cache.popitem(last=False)
+        logger.info("Graph of map %s version %s cached.", *key[:2])
+    return graph, components
+
+
 def create_graph(data):
     """add all connections for each city"""
     logger.debug("Creating graph from map data.")
@@ -120,6 +162,75 @@ def create_graph(data):
     return graph
 
 
+def iterate_graph_edges(graph):
+    """yield every edge of a graph created by create_graph as (city_id, neighbor_id)"""
+    for city_id, edges in graph.items():
+        for _, neighbor in edges:
+            yield city_id, neighbor
+
+
+def compute_components(city_ids, edges):
+    """
+    Label every city with the id of its connected component.
+
+    city_ids: all cities of the map, including cities without any connection.
+    edges: iterable of (city_id, city_id) pairs, the direction is ignored.
+    Returns a dict city_id -> component id, component ids are numbered 0..n-1 in order of
+    the first city of each component in city_ids.
+    """
+    parent = {city_id: city_id for city_id in city_ids}
+
+    def find(city_id):
+        while parent[city_id] != city_id:
+            parent[city_id] = parent[parent[city_id]]
+            city_id = parent[city_id]
+        return city_id
+
+    for city_1, city_2 in edges:
+        if city_1 not in parent or city_2 not in parent:
+            continue
+        root_1, root_2 = find(city_1), find(city_2)
+        if root_1 != root_2:
+            parent[root_2] = root_1
+
+    component_ids = {}
+    components = {}
+    for city_id in parent:
+        root = find(city_id)
+        components[city_id] = component_ids.setdefault(root, len(component_ids))
+    return components
+
+
+def summarize_components(components, city_names, sample_size=10):
+    """
+    Summarize a component labelling from compute_components for data quality checks.
+
+    city_names: dict city_id -> city name, used for the city samples of each component.
+    Returns the number of components, the largest component size, the isolated cities and
+    every component with its size and up to sample_size city names, largest first.
+    """
+    members = defaultdict(list)
+    for city_id, component_id in components.items():
+        members[component_id].append(city_id)
+
+    ordered = sorted(members.items(), key=lambda item: (-len(item[1]), item[0]))
+    return {
+        "component_count": len(ordered),
+        "largest_component_size": len(ordered[0][1]) if ordered else 0,
+        "isolated_cities": sorted(
+            city_names[city_ids[0]] for _, city_ids in ordered if len(city_ids) == 1
+        ),
+        "components": [
+            {
+                "id": component_id,
+                "size": len(city_ids),
+                "cities": [city_names[city_id] for city_id in city_ids[:sample_size]],
+            }
+            for component_id, city_ids in ordered
+        ],
+    }
+
+
 def initialize_distances(graph, start_city_id):
     """helper function for dijkstra distances initialization"""
     distances = {city_id: float("inf") for city_id in graph}
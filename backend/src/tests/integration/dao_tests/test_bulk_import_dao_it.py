@@ -0,0 +1,209 @@
+"""integration tests for BulkImportDao and MapImporter"""
+
+import io
+from contextlib import nullcontext
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from backend.src.database.dao.bulk_import_dao import BulkImportDao
+from backend.src.database.dao.city_dao import CityDao
+from backend.src.database.dao.connection_dao import ConnectionDao
+from backend.src.database.dao.map_dao import MapDao
+from backend.src.map_service import import_maps
+from backend.src.map_service.map_file_import import MapExistsError, MapFileError, import_map_file
+from backend.src.map_service.map_generator import (
+    MapGeneratorConfig,
+    generate_map,
+    write_map_snapshot,
+)
+from backend.src.map_service.map_importer import MapImporter
+from backend.src.map_service.map_service import store_map_data
+
+
+def test_map_importer_writes_batches_in_one_transaction(db):
+    """test importing a map in batches resolves connections by the returned city ids"""
+    # Act
+    with MapImporter(db, "Tamriel", 1000, 1000, batch_size=2) as importer:
+        for i, name in enumerate(["Markarth", "Riften", "Whiterun", "Solitude", "Windhelm"]):
+            importer.add_city(name, i * 10, i * 20)
+        importer.add_connection("Markarth", "Riften")
+        importer.add_connection("Riften", "Windhelm")
+        importer.add_connection("Windhelm", "Sovngarde")
+
+    # Assert
+    map_id = importer.statistics["map_id"]
+    assert MapDao.get_map_by_name(db, "Tamriel").id == map_id
+    cities = {city.id: city.name for city in CityDao.get_cities_by_map_id(map_id, db)}
+    assert cities == {city_id: name for name, city_id in importer.city_ids.items()}
+    connections = [
+        (cities[conn.parent_city_id], cities[conn.child_city_id])
+        for conn in ConnectionDao.get_connections_by_map_id(map_id, db)
+    ]
+    assert connections == [("Markarth", "Riften"), ("Riften", "Windhelm")]
+    assert importer.statistics["cities"] == 5
+    assert importer.statistics["connections"] == 2
+    assert importer.statistics["skipped_connections"] == 1
+    assert importer.statistics["rows_per_second"] > 0
+
+
+def test_map_importer_rolls_back_failed_imports(db):
+    """test nothing of a failed import is stored"""
+    # Act
+    with pytest.raises(ValueError):
+        with MapImporter(db, "Tamriel", 1000, 1000, batch_size=1) as importer:
+            importer.add_city("Markarth", 0, 0)
+            raise ValueError("invalid city")
+
+    # Assert
+    assert MapDao.get_map_by_name(db, "Tamriel") is None
+    assert not CityDao.get_cities_by_map_id(1, db)
+
+
+def test_store_map_data(db):
+    """test storing a map definition"""
+    # Act
+    new_map = store_map_data(
+        {
+            "name": "Skyrim",
+            "mapsizeX": 100,
+            "mapsizeY": 100,
+            "cities": [
+                {"name": "Falkreath", "positionX": 10, "positionY": 20},
+                {"name": "Helgen", "positionX": 30, "positionY": 40},
+            ],
+            "connections": [{"parent": "Falkreath", "child": "Helgen"}],
+        },
+        db,
+    )
+
+    # Assert
+    assert new_map.name == "Skyrim"
+    assert len(CityDao.get_cities_by_map_id(new_map.id, db)) == 2
+    assert len(ConnectionDao.get_connections_by_map_id(new_map.id, db)) == 1
+
+
+@patch("backend.src.database.dao.bulk_import_dao.IMPORT_USE_COPY", True)
+def test_insert_cities_with_copy_on_postgresql():
+    """test cities are copied with ids allocated from the sequence on PostgreSQL"""
+    # Arrange
+    session = MagicMock()
+    session.get_bind.return_value.dialect.name = "postgresql"
+    session.execute.return_value.scalars.return_value.all.return_value = [41, 42]
+    driver_connection = session.connection.return_value.connection.driver_connection
+    cursor = driver_connection.cursor.return_value.__enter__.return_value
+
+    # Act
+    city_ids = BulkImportDao.insert_cities(
+        7, [("Dawnstar", 1, 2), ('Fort "Dawnguard"', 3, 4)], session
+    )
+    BulkImportDao.insert_connections(7, [(41, 42)], session)
+
+    # Assert
+    assert city_ids == {"Dawnstar": 41, 'Fort "Dawnguard"': 42}
+    (cities_sql, cities_data), (connections_sql, connections_data) = [
+        call.args for call in cursor.copy_expert.call_args_list
+    ]
+    assert cities_sql.startswith("COPY cities (id, map_id, name, position_x, position_y)")
+    assert cities_data.getvalue().splitlines() == [
+        "41,7,Dawnstar,1,2",
+        '42,7,"Fort ""Dawnguard""",3,4',
+    ]
+    assert connections_sql.startswith("COPY connections")
+    assert connections_data.getvalue().splitlines() == ["7,41,42"]
+
+
+def test_import_map_file(db):
+    """test a CSV map file is imported and existing maps are rejected"""
+    # Arrange
+    text = "map,Skyrim,100,100\ncity,Riften,1,2\ncity,Ivarstead,3,4\nconnection,Riften,Ivarstead\n"
+
+    # Act
+    statistics = import_map_file(io.StringIO(text), "csv", db, batch_size=1)
+
+    # Assert
+    assert statistics["cities"] == 2
+    assert statistics["connections"] == 1
+    assert len(CityDao.get_cities_by_map_id(statistics["map_id"], db)) == 2
+    with pytest.raises(MapExistsError):
+        import_map_file(io.StringIO(text), "csv", db)
+
+
+def test_import_map_file_rolls_back_invalid_files(db):
+    """test an invalid record after the first batches leaves no partial map behind"""
+    # Arrange
+    text = "map,Skyrim,100,100\ncity,Riften,1,2\ncity,Ivarstead,3,4\ncity,Riften,5,6\n"
+
+    # Act
+    with pytest.raises(MapFileError, match="Duplicate city Riften"):
+        import_map_file(io.StringIO(text), "csv", db, batch_size=1)
+
+    # Assert
+    assert MapDao.get_map_by_name(db, "Skyrim") is None
+
+
+def test_import_map_file_updates_existing_maps(db):
+    """test an update only writes the differences and reports them"""
+    # Arrange
+    import_map_file(
+        io.StringIO(
+            "map,Skyrim,100,100\ncity,Riften,1,2\ncity,Ivarstead,3,4\ncity,Helgen,5,6\n"
+            "connection,Riften,Ivarstead\nconnection,Ivarstead,Helgen\n"
+        ),
+        "csv",
+        db,
+    )
+    skyrim = MapDao.get_map_by_name(db, "Skyrim")
+    riften = CityDao.get_city_by_name(skyrim.id, "Riften", db)
+    text = (
+        "map,Skyrim,100,100\ncity,Riften,1,2\ncity,Ivarstead,7,8\ncity,Dawnstar,9,9\n"
+        "connection,Riften,Ivarstead\nconnection,Riften,Dawnstar\nconnection,Riften,Helgen\n"
+    )
+
+    # Act
+    report = import_map_file(io.StringIO(text), "csv", db, batch_size=1, update=True)
+
+    # Assert
+    assert report["changed"]
+    assert report["cities"]["added"] == ["Dawnstar"]
+    assert report["cities"]["removed"] == ["Helgen"]
+    assert report["cities"]["updated"] == [
+        {
+            "name": "Ivarstead",
+            "position_x": 7,
+            "position_y": 8,
+            "previous_position_x": 3,
+            "previous_position_y": 4,
+        }
+    ]
+    assert report["connections"]["added"] == [{"parent": "Riften", "child": "Dawnstar"}]
+    assert report["connections"]["removed"] == [{"parent": "Ivarstead", "child": "Helgen"}]
+    assert report["skipped_connections"] == 1
+    db.expire_all()
+    cities = {city.name: city for city in CityDao.get_cities_by_map_id(skyrim.id, db)}
+    assert sorted(cities) == ["Dawnstar", "Ivarstead", "Riften"]
+    assert cities["Riften"].id == riften.id
+    assert (cities["Ivarstead"].position_x, cities["Ivarstead"].position_y) == (7, 8)
+    assert len(ConnectionDao.get_connections_by_map_id(skyrim.id, db)) == 2
+    assert MapDao.get_map_version(skyrim.id, db) == 2
+
+    # importing the same file again changes nothing
+    report = import_map_file(io.StringIO(text), "csv", db, update=True)
+    assert not report["changed"]
+    assert MapDao.get_map_version(skyrim.id, db) == 2
+
+
+def test_import_maps_command(db, tmp_path):
+    """test the command line interface imports gzip compressed JSON snapshots"""
+    # Arrange
+    path = str(tmp_path / "generated.json.gz")
+    write_map_snapshot(generate_map("Generated", MapGeneratorConfig(city_count=30)), path)
+
+    # Act
+    with patch.object(import_maps, "get_db_session", return_value=nullcontext(db)):
+        failed = import_maps.main([path, str(tmp_path / "missing.csv"), "--batch-size", "7"])
+
+    # Assert
+    assert failed == 1
+    generated = MapDao.get_map_by_name(db, "Generated")
+    assert len(CityDao.get_cities_by_map_id(generated.id, db)) == 30
@@ -116,3 +116,119 @@ def test_save_cities_bulk_exception(db):
         except SQLAlchemyError as e:
             assert str(e) == "Database error"
             db.rollback.assert_called_once()
+
+
+def test_get_nearest_cities(db):
+    """test nearest cities are ordered by distance and restricted to the map"""
+    # Arrange
+    test_map = fabricate_and_commit_map(db)
+    cities = [
+        City(map_id=test_map.id, name="Markarth", position_x=0, position_y=0),
+        City(map_id=test_map.id, name="Whiterun", position_x=50, position_y=50),
+        City(map_id=test_map.id, name="Riften", position_x=100, position_y=100),
+    ]
+    CityDao.save_cities_bulk(cities, db)
+
+    # Act
+    nearest = CityDao.get_nearest_cities(test_map.id, 60, 55, 2, db)
+    other_map = CityDao.get_nearest_cities(test_map.id + 1, 60, 55, 2, db)
+
+    # Assert
+    assert [city.name for city in nearest] == ["Whiterun", "Riften"]
+    assert not other_map
+
+
+def test_get_cities_in_bbox(db):
+    """test bounding box queries return the cities inside the box, bounds inclusive"""
+    # Arrange
+    test_map = fabricate_and_commit_map(db)
+    CityDao.save_cities_bulk(
+        [
+            City(map_id=test_map.id, name="Markarth", position_x=0, position_y=0),
+            City(map_id=test_map.id, name="Whiterun", position_x=50, position_y=50),
+            City(map_id=test_map.id, name="Riften", position_x=100, position_y=100),
+        ],
+        db,
+    )
+
+    # Act
+    inside = CityDao.get_cities_in_bbox(test_map.id, (0, 0, 50, 60), db)
+    limited = CityDao.get_cities_in_bbox(test_map.id, (0, 0, 100, 100), db, limit=1)
+    by_ids = CityDao.get_cities_by_ids({inside[1].id}, db)
+
+    # Assert
+    assert [city.name for city in inside] == ["Markarth", "Whiterun"]
+    assert [city.name for city in limited] == ["Markarth"]
+    assert [city.name for city in by_ids] == ["Whiterun"]
+    assert not CityDao.get_cities_by_ids(set(), db)
+
+
+def test_city_writes_notify_map_changes(db):
+    """test that saving and deleting cities reports the changed map"""
+    # Arrange
+    test_map = fabricate_and_commit_map(db)
+    city = City(map_id=test_map.id, name="Solitude", position_x=10, position_y=20)
+
+    # Act & Assert
+    with patch("backend.src.database.dao.city_dao.notify_map_changed") as notify:
+        CityDao.save_city(city, db)
+        CityDao.delete_city(city.id, db)
+
+    assert [list(call.args[0]) for call in notify.call_args_list] == [
+        [test_map.id],
+        [test_map.id],
+    ]
+
+
+def test_stream_cities_by_map_id(db):
+    """test streaming the cities of a map in batches"""
+    # Arrange
+    test_map = fabricate_and_commit_map(db)
+    names = ["Whiterun", "Riften", "Markarth", "Solitude", "Windhelm"]
+    CityDao.save_cities_bulk(
+        [
+            City(map_id=test_map.id, name=name, position_x=i, position_y=i)
+            for i, name in enumerate(names)
+        ],
+        db,
+    )
+
+    # Act
+    rows = list(CityDao.stream_cities_by_map_id(test_map.id, db, batch_size=2))
+
+    # Assert
+    assert [row.name for row in rows] == names
+    assert rows[1]._asdict() == {
+        "id": rows[1].id,
+        "name": "Riften",
+        "position_x": 1,
+        "position_y": 1,
+    }
+    assert not list(CityDao.stream_cities_by_map_id(test_map.id + 1, db))
+
+
+def test_get_city_suggestions(db):
+    """test suggestions rank prefix matches first, shorter names first, and are limited"""
+    # Arrange
+    test_map = fabricate_and_commit_map(db)
+    names = ["Dawnstar", "Fort Dawnguard", "Stardew", "Dawn", "Windhelm", "Dawn_2", "Dawn%2"]
+    CityDao.save_cities_bulk(
+        [City(map_id=test_map.id, name=name, position_x=0, position_y=0) for name in names],
+        db,
+    )
+
+    # Act
+    suggestions = CityDao.get_city_suggestions(db, test_map.id, "daWn")
+    limited = CityDao.get_city_suggestions(db, test_map.id, "star", limit=1)
+    wildcard = CityDao.get_city_suggestions(db, test_map.id, "n_")
+
+    # Assert
+    assert [city.name for city in suggestions] == [
+        "Dawn",
+        "Dawn%2",
+        "Dawn_2",
+        "Dawnstar",
+        "Fort Dawnguard",
+    ]
+    assert [city.name for city in limited] == ["Stardew"]
+    assert [city.name for city in wildcard] == ["Dawn_2"]
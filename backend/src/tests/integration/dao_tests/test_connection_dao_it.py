@@ -99,3 +99,46 @@ def assert_connections_exist(connections, expected_pairs):
             conn.parent_city_id == parent_id and conn.child_city_id == child_id
             for conn in connections
         )
+
+
+def test_get_connections_of_cities(db):
+    """test connections touching a set of cities in either direction"""
+    # Arrange
+    test_map = fabricate_and_commit_map(db)
+    city1 = City(map_id=test_map.id, name="Falkreath", position_x=100, position_y=200)
+    city2 = City(map_id=test_map.id, name="Windhelm", position_x=500, position_y=600)
+    city3 = City(map_id=test_map.id, name="Solitude", position_x=900, position_y=100)
+    db.add_all([city1, city2, city3])
+    db.flush()
+    ConnectionDao.save_connections_bulk(
+        [
+            Connection(map_id=test_map.id, parent_city_id=city1.id, child_city_id=city2.id),
+            Connection(map_id=test_map.id, parent_city_id=city3.id, child_city_id=city2.id),
+        ],
+        db,
+    )
+
+    # Act
+    connections = ConnectionDao.get_connections_of_cities(test_map.id, {city3.id}, db)
+
+    # Assert
+    assert_connections_exist(connections, [(city3.id, city2.id)])
+    assert len(ConnectionDao.get_connections_of_cities(test_map.id, {city2.id}, db)) == 2
+    assert not ConnectionDao.get_connections_of_cities(test_map.id, set(), db)
+
+
+def test_stream_connections_by_map_id(db):
+    """test streaming the connections of a map in batches"""
+    # Arrange
+    test_map = fabricate_and_commit_map(db)
+    city1 = City(map_id=test_map.id, name="Falkreath", position_x=100, position_y=200)
+    city2 = City(map_id=test_map.id, name="Windhelm", position_x=500, position_y=600)
+    db.add_all([city1, city2])
+    db.flush()
+    ConnectionDao.save_connections_bulk(fabricate_connections(city1, city2, test_map), db)
+
+    # Act
+    rows = list(ConnectionDao.stream_connections_by_map_id(test_map.id, db, batch_size=1))
+
+    # Assert
+    assert [tuple(row) for row in rows] == [(city1.id, city2.id), (city2.id, city1.id)]
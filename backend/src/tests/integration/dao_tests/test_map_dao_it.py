@@ -1,6 +1,10 @@
 """Integration tests for Map and MapDao"""
 
+from backend.src.database.dao.city_dao import CityDao
+from backend.src.database.dao.connection_dao import ConnectionDao
 from backend.src.database.dao.map_dao import MapDao
+from backend.src.database.schema.city import City
+from backend.src.database.schema.connection import Connection
 from backend.src.database.schema.map import Map
 
 
@@ -50,3 +54,28 @@ def test_get_map_id_by_name(db):
 
     # Assert
     assert map_id == map_obj.id
+
+
+def test_map_version_is_bumped_by_writes(db):
+    """Test that writes to cities and connections bump the map version"""
+    # Arrange
+    map_obj = MapDao.save_map(Map(name="Tamriel", size_x=1000, size_y=2000), db)
+    assert MapDao.get_map_version(map_obj.id, db) == 1
+
+    # Act
+    cities = [
+        City(map_id=map_obj.id, name="Markarth", position_x=0, position_y=0),
+        City(map_id=map_obj.id, name="Riften", position_x=10, position_y=10),
+    ]
+    CityDao.save_cities_bulk(cities, db)
+    markarth, riften = CityDao.get_cities_by_map_id(map_obj.id, db)
+    ConnectionDao.save_connections_bulk(
+        [Connection(map_id=map_obj.id, parent_city_id=markarth.id, child_city_id=riften.id)], db
+    )
+    CityDao.delete_city(riften.id, db)
+
+    # Assert
+    db.refresh(map_obj)
+    assert MapDao.get_map_version(map_obj.id, db) == 4
+    assert map_obj.to_dict()["version"] == 4
+    assert MapDao.get_map_version(map_obj.id + 1, db) is None
@@ -0,0 +1,73 @@
+"""integration tests for ranking the popular routes in the PopularRouteDao"""
+
+from datetime import datetime, timedelta, timezone
+
+from backend.src.database.dao.popular_route_dao import PopularRouteDao
+from backend.src.database.schema.map import Map
+from backend.src.database.schema.route import Route
+from backend.src.database.schema.route_result import RouteResult
+from backend.src.database.schema.user import User
+from backend.src.tests.integration.dao_tests.test_connection_dao_it import fabricate_and_commit_map
+
+
+def add_routes(db, user, map_id, requests):
+    """store the requests of routes, given as (startpoint, endpoint) -> (count, created_at)"""
+    for (startpoint, endpoint), (count, created_at) in requests.items():
+        result = RouteResult.create(map_id, startpoint, endpoint, {"route": [startpoint, endpoint]})
+        db.add_all(
+            Route(
+                user_id=user.id,
+                map_id=map_id,
+                startpoint=startpoint,
+                endpoint=endpoint,
+                created_at=created_at,
+                result=result,
+            )
+            for _ in range(count)
+        )
+    db.commit()
+
+
+def test_refresh_popular_routes_ranks_per_map(db):
+    """Test the most requested pairs of every map are ranked, ties by the latest request."""
+    # Arrange
+    first_map = fabricate_and_commit_map(db)
+    second_map = Map(name="second_map")
+    db.add(second_map)
+    user = User(username="test_user")
+    db.add(user)
+    db.commit()
+    now = datetime.now(timezone.utc)
+    add_routes(
+        db,
+        user,
+        first_map.id,
+        {
+            ("Whiterun", "Riften"): (3, now - timedelta(days=2)),
+            ("Markarth", "Riften"): (2, now - timedelta(days=1)),
+            ("Solitude", "Riften"): (2, now - timedelta(days=3)),
+            # outside of the ranked window
+            ("Dawnstar", "Riften"): (9, now - timedelta(days=40)),
+        },
+    )
+    add_routes(db, user, second_map.id, {("Windhelm", "Falkreath"): (1, now)})
+
+    # Act
+    ranked = PopularRouteDao.refresh_popular_routes(
+        db, since=now - timedelta(days=30), limit_per_map=2
+    )
+    ranked_again = PopularRouteDao.refresh_popular_routes(
+        db, since=now - timedelta(days=30), limit_per_map=2
+    )
+
+    # Assert
+    assert ranked == ranked_again == 3
+    popular = PopularRouteDao.get_popular_routes(db)
+    assert [(p.map_id, p.rank, p.startpoint, p.request_count) for p in popular] == [
+        (first_map.id, 1, "Whiterun", 3),
+        (first_map.id, 2, "Markarth", 2),
+        (second_map.id, 1, "Windhelm", 1),
+    ]
+    assert [p.startpoint for p in PopularRouteDao.get_popular_routes(db, first_map.id, 1)] == [
+        "Whiterun"
+    ]
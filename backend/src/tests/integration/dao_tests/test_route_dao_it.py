@@ -3,10 +3,12 @@
 from datetime import datetime, timedelta, timezone
 
 import pytest
+from sqlalchemy.exc import InvalidRequestError
 
 from backend.src.database.dao.route_dao import RouteDao
 from backend.src.database.schema.map import Map
 from backend.src.database.schema.route import Route, RouteFilter, OptionalRouteFilters
+from backend.src.database.schema.route_result import RouteResult
 from backend.src.database.schema.user import User
 from backend.src.tests.integration.dao_tests.test_connection_dao_it import fabricate_and_commit_map
 
@@ -25,7 +27,9 @@ def test_save_route(db):
         user_id=user.id,
         startpoint="Whiterun",
         endpoint="Riften",
-        route={"route": {}, "distance": 100},
+        result=RouteResult.create(
+            test_map.id, "Whiterun", "Riften", {"route": {}, "distance": 100}
+        ),
     )
 
     # Act
@@ -36,6 +40,31 @@ def test_save_route(db):
     assert saved_route.startpoint == "Whiterun"
 
 
+def test_save_route_defaults_created_at_to_now(db):
+    """Test routes saved without created_at get the time they are saved at."""
+    # Arrange
+    test_map = fabricate_and_commit_map(db)
+    user = User(username="test_user")
+    db.add(user)
+    db.commit()
+    before = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    # Act
+    route = RouteDao.save_route(
+        Route(
+            map_id=test_map.id,
+            user_id=user.id,
+            startpoint="Whiterun",
+            endpoint="Riften",
+            result=RouteResult.create(test_map.id, "Whiterun", "Riften", {}),
+        ),
+        db,
+    )
+
+    # Assert
+    assert route.created_at.replace(tzinfo=None) >= before
+
+
 def test_get_route_by_id(db):
     """Test retrieving a route by its ID."""
     # Arrange
@@ -71,7 +100,9 @@ def test_delete_route_by_id_success(db):
         user_id=user.id,
         startpoint="Riften",
         endpoint="Markarth",
-        route={"route": {}, "distance": 300},
+        result=RouteResult.create(
+            test_map.id, "Riften", "Markarth", {"route": {}, "distance": 300}
+        ),
     )
     db.add(route)
     db.commit()
@@ -99,7 +130,9 @@ def test_delete_route_by_id_no_match(db):
         user_id=user.id,
         startpoint="Solitude",
         endpoint="Whiterun",
-        route={"route": {}, "distance": 300},
+        result=RouteResult.create(
+            test_map.id, "Solitude", "Whiterun", {"route": {}, "distance": 300}
+        ),
     )
     db.add(route)
     db.commit()
@@ -130,7 +163,9 @@ def test_delete_user_route_history_by_user_id(db):
             startpoint="Whiterun",
             endpoint="Riften",
             created_at=datetime.now(timezone.utc),
-            route={"route": {}, "distance": 100},
+            result=RouteResult.create(
+                test_map.id, "Whiterun", "Riften", {"route": {}, "distance": 100}
+            ),
         ),
         Route(
             map_id=test_map.id,
@@ -138,7 +173,9 @@ def test_delete_user_route_history_by_user_id(db):
             startpoint="Markarth",
             endpoint="Solitude",
             created_at=datetime.now(timezone.utc) - timedelta(days=1),
-            route={"route": {}, "distance": 200},
+            result=RouteResult.create(
+                test_map.id, "Markarth", "Solitude", {"route": {}, "distance": 200}
+            ),
         ),
     ]
     db.add_all(routes)
@@ -166,7 +203,9 @@ def test_delete_user_route_history_by_username(db):
         user_id=user.id,
         startpoint="Riverwood",
         endpoint="Helgen",
-        route={"route": {}, "distance": 50},
+        result=RouteResult.create(
+            test_map.id, "Riverwood", "Helgen", {"route": {}, "distance": 50}
+        ),
     )
     db.add(route)
     db.commit()
@@ -240,7 +279,9 @@ def test_get_routes_with_combination_filters(db):
             startpoint="Whiterun",
             endpoint="Riften",
             created_at=datetime.now(timezone.utc),
-            route={"route": {}, "distance": 100},
+            result=RouteResult.create(
+                test_map.id, "Whiterun", "Riften", {"route": {}, "distance": 100}
+            ),
         ),
         Route(
             map_id=test_map.id,
@@ -248,7 +289,9 @@ def test_get_routes_with_combination_filters(db):
             startpoint="Markarth",
             endpoint="Solitude",
             created_at=datetime.now(timezone.utc) - timedelta(days=1),
-            route={"route": {}, "distance": 200},
+            result=RouteResult.create(
+                test_map.id, "Markarth", "Solitude", {"route": {}, "distance": 200}
+            ),
         ),
         Route(
             map_id=test_map.id,
@@ -256,7 +299,9 @@ def test_get_routes_with_combination_filters(db):
             startpoint="Riverwood",
             endpoint="Falkreath",
             created_at=datetime.now(timezone.utc) - timedelta(days=2),
-            route={"route": {}, "distance": 50},
+            result=RouteResult.create(
+                test_map.id, "Riverwood", "Falkreath", {"route": {}, "distance": 50}
+            ),
         ),
         Route(
             map_id=test_map.id,
@@ -264,7 +309,9 @@ def test_get_routes_with_combination_filters(db):
             startpoint="Whiterun",
             endpoint="Riften",
             created_at=datetime.now(timezone.utc),
-            route={"route": {}, "distance": 150},
+            result=RouteResult.create(
+                test_map.id, "Whiterun", "Riften", {"route": {}, "distance": 150}
+            ),
         ),
     ]
     db.add_all(routes)
@@ -323,7 +370,9 @@ def test_get_routes_sorted_by_endpoint(db):
             startpoint="Falkreath",
             endpoint="Alduin's Wall",
             created_at=datetime.now(timezone.utc),
-            route={"route": {}, "distance": 500},
+            result=RouteResult.create(
+                test_map.id, "Falkreath", "Alduin's Wall", {"route": {}, "distance": 500}
+            ),
         ),
         Route(
             map_id=test_map.id,
@@ -331,7 +380,9 @@ def test_get_routes_sorted_by_endpoint(db):
             startpoint="Falkreath",
             endpoint="Ivarstead",
             created_at=datetime.now(timezone.utc) - timedelta(hours=1),
-            route={"route": {}, "distance": 300},
+            result=RouteResult.create(
+                test_map.id, "Falkreath", "Ivarstead", {"route": {}, "distance": 300}
+            ),
         ),
     ]
     db.add_all(routes)
@@ -363,7 +414,9 @@ def test_get_routes_limit_and_sorting(db):
             startpoint="Markarth",
             endpoint="Riften",
             created_at=datetime.now(timezone.utc),
-            route={"route": {}, "distance": 150},
+            result=RouteResult.create(
+                test_map.id, "Markarth", "Riften", {"route": {}, "distance": 150}
+            ),
         ),
         Route(
             map_id=test_map.id,
@@ -371,7 +424,9 @@ def test_get_routes_limit_and_sorting(db):
             startpoint="Whiterun",
             endpoint="Winterhold",
             created_at=datetime.now(timezone.utc) - timedelta(days=1),
-            route={"route": {}, "distance": 250},
+            result=RouteResult.create(
+                test_map.id, "Whiterun", "Winterhold", {"route": {}, "distance": 250}
+            ),
         ),
     ]
     db.add_all(routes)
@@ -419,7 +474,9 @@ def test_delete_routes_by_ids(db):
             startpoint="Markarth",
             endpoint="Riften",
             created_at=datetime.now(timezone.utc),
-            route={"route": {}, "distance": 150},
+            result=RouteResult.create(
+                test_map.id, "Markarth", "Riften", {"route": {}, "distance": 150}
+            ),
         ),
         Route(
             map_id=test_map.id,
@@ -427,7 +484,9 @@ def test_delete_routes_by_ids(db):
             startpoint="Whiterun",
             endpoint="Winterhold",
             created_at=datetime.now(timezone.utc) - timedelta(days=1),
-            route={"route": {}, "distance": 250},
+            result=RouteResult.create(
+                test_map.id, "Whiterun", "Winterhold", {"route": {}, "distance": 250}
+            ),
         ),
         Route(
             map_id=test_map.id,
@@ -435,7 +494,9 @@ def test_delete_routes_by_ids(db):
             startpoint="Riverwood",
             endpoint="Helgen",
             created_at=datetime.now(timezone.utc) - timedelta(days=2),
-            route={"route": {}, "distance": 100},
+            result=RouteResult.create(
+                test_map.id, "Riverwood", "Helgen", {"route": {}, "distance": 100}
+            ),
         ),
     ]
     db.add_all(routes)
@@ -456,6 +517,114 @@ def test_delete_routes_by_ids(db):
     assert remaining_routes[0].id == routes[2].id
 
 
+@pytest.mark.parametrize(
+    "field, descending", [("created_at", True), ("created_at", False), ("startpoint", True)]
+)
+def test_get_routes_page_walks_the_whole_history(db, field, descending):
+    """Test keyset pages return every route once, in order, also with equal sort values."""
+    # Arrange
+    test_map = fabricate_and_commit_map(db)
+    user = User(username="test_user")
+    db.add(user)
+    db.commit()
+    created_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    result = RouteResult.create(test_map.id, "City 0", "Helgen", {})
+    db.add_all(
+        Route(
+            user_id=user.id,
+            map_id=test_map.id,
+            startpoint=f"City {i % 4}",
+            endpoint="Helgen",
+            # pairs of routes share their creation time
+            created_at=created_at + timedelta(minutes=i // 2),
+            result=result,
+        )
+        for i in range(23)
+    )
+    db.commit()
+
+    # Act
+    pages, after = [], None
+    while True:
+        route_filter = RouteFilter(user_id=user.id, field=field, limit=5, descending=descending)
+        route_filter.after = after
+        routes, after = RouteDao.get_routes_page(route_filter, db)
+        pages.append(routes)
+        if after is None:
+            break
+
+    # Assert
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    found = [route for page in pages for route in page]
+    expected = RouteDao.get_routes(
+        RouteFilter(user_id=user.id, field=field, limit=100, descending=descending), db
+    )
+    assert [route.id for route in found] == [route.id for route in expected]
+    assert len({route.id for route in found}) == 23
+
+
+def test_get_routes_loads_only_the_selected_fields(db):
+    """Test the route column is not read unless selected and unknown fields are rejected."""
+    # Arrange
+    test_map = fabricate_and_commit_map(db)
+    user = User(username="test_user")
+    db.add(user)
+    db.commit()
+    now = datetime.now(timezone.utc)
+    fabricate_basic_routes_and_commit(db, test_map, now - timedelta(days=1), now, user)
+    user_id = user.id
+    # the routes are read from the database, not taken from the identity map
+    db.expunge_all()
+
+    # Act
+    routes = RouteDao.get_routes(RouteFilter(user_id=user_id, fields=("startpoint",)), db)
+
+    # Assert
+    assert [route.startpoint for route in routes] == ["Riverwood", "Winterhold"]
+    with pytest.raises(InvalidRequestError):
+        _ = routes[0].route
+    with pytest.raises(ValueError, match="Invalid fields: password"):
+        RouteDao.get_routes(RouteFilter(user_id=user_id, fields=("id", "password")), db)
+
+
+def test_get_routes_via_a_city(db):
+    """Test filtering the routes by a city their calculated route passes through."""
+    # Arrange
+    test_map = fabricate_and_commit_map(db)
+    user = User(username="test_user")
+    db.add(user)
+    db.commit()
+    db.add_all(
+        Route(
+            user_id=user.id,
+            map_id=test_map.id,
+            startpoint=path[0],
+            endpoint=path[-1],
+            result=RouteResult.create(
+                test_map.id,
+                path[0],
+                path[-1],
+                {"route": dict(enumerate(path)), "alternative_route": {"0": "Helgen"}},
+            ),
+        )
+        for path in (["Markarth", "Whiterun", "Riften"], ["Solitude", "Morthal"])
+    )
+    db.commit()
+
+    # Act
+    via_whiterun = RouteDao.get_routes(
+        RouteFilter(user_id=user.id, optional_filters=OptionalRouteFilters(via="Whiterun")), db
+    )
+    via_helgen = RouteDao.get_routes(
+        RouteFilter(user_id=user.id, optional_filters=OptionalRouteFilters(via="Helgen")), db
+    )
+
+    # Assert
+    assert [route.startpoint for route in via_whiterun] == ["Markarth"]
+    assert via_whiterun[0].route["route"] == {"0": "Markarth", "1": "Whiterun", "2": "Riften"}
+    assert not via_helgen
+
+
 def fabricate_basic_routes_and_commit(db, test_map: Map, old_date, recent_date, user):
     """Helper to create routes and commit them to the RAM-Database"""
     routes = [
@@ -465,7 +634,9 @@ def fabricate_basic_routes_and_commit(db, test_map: Map, old_date, recent_date,
             startpoint="Riverwood",
             endpoint="Helgen",
             created_at=recent_date,
-            route={"route": {}, "distance": 50},
+            result=RouteResult.create(
+                test_map.id, "Riverwood", "Helgen", {"route": {}, "distance": 50}
+            ),
         ),
         Route(
             user_id=user.id,
@@ -473,7 +644,9 @@ def fabricate_basic_routes_and_commit(db, test_map: Map, old_date, recent_date,
             startpoint="Winterhold",
             endpoint="Dawnstar",
             created_at=old_date,
-            route={"route": {}, "distance": 75},
+            result=RouteResult.create(
+                test_map.id, "Winterhold", "Dawnstar", {"route": {}, "distance": 75}
+            ),
         ),
     ]
     db.add_all(routes)
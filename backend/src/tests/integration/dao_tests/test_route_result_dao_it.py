@@ -0,0 +1,111 @@
+"""integration tests for the deduplicated storage of route results in the RouteResultDao"""
+
+from backend.src.database.dao.route_dao import RouteDao
+from backend.src.database.dao.route_result_dao import RouteResultDao
+from backend.src.database.schema.route import Route, RouteFilter
+from backend.src.database.schema.route_result import RouteResult
+from backend.src.database.schema.user import User
+from backend.src.tests.integration.dao_tests.test_connection_dao_it import fabricate_and_commit_map
+
+
+def test_identical_route_results_are_stored_once(db):
+    """Test all users calculating the same route share one stored result."""
+    # Arrange
+    test_map = fabricate_and_commit_map(db)
+    users = [User(username=f"user_{i}") for i in range(5)]
+    db.add_all(users)
+    db.commit()
+    result = {"route": {"0": "Whiterun", "1": "Riften"}, "distance": 100}
+
+    # Act
+    for user in users:
+        stored = RouteResultDao.get_or_create_route_result(
+            test_map.id, "Whiterun", "Riften", dict(reversed(result.items())), db
+        )
+        RouteDao.save_route(
+            Route(
+                user_id=user.id,
+                map_id=test_map.id,
+                startpoint="Whiterun",
+                endpoint="Riften",
+                result=stored,
+            ),
+            db,
+        )
+    other = RouteResultDao.get_or_create_route_result(
+        test_map.id, "Whiterun", "Riften", {**result, "distance": 101}, db
+    )
+    db.commit()
+
+    # Assert
+    assert db.query(RouteResult).count() == 2
+    assert other.id != stored.id
+    for user in users:
+        routes = RouteDao.get_routes(RouteFilter(user_id=user.id), db)
+        assert [route.route for route in routes] == [result]
+
+
+def test_delete_unreferenced_route_results(db):
+    """Test only results no route refers to anymore are deleted."""
+    # Arrange
+    test_map = fabricate_and_commit_map(db)
+    user = User(username="test_user")
+    db.add(user)
+    db.commit()
+    kept = RouteResultDao.get_or_create_route_result(test_map.id, "Whiterun", "Riften", {}, db)
+    RouteResultDao.get_or_create_route_result(test_map.id, "Markarth", "Riften", {}, db)
+    RouteDao.save_route(
+        Route(
+            user_id=user.id,
+            map_id=test_map.id,
+            startpoint="Whiterun",
+            endpoint="Riften",
+            result=kept,
+        ),
+        db,
+    )
+
+    # Act
+    deleted_count = RouteResultDao.delete_unreferenced_route_results(db)
+
+    # Assert
+    assert deleted_count == 1
+    assert [result.id for result in db.query(RouteResult).all()] == [kept.id]
+
+
+def test_deleting_routes_deletes_their_unshared_results(db):
+    """Test deleting routes deletes their results unless another route still refers to them."""
+    # Arrange
+    test_map = fabricate_and_commit_map(db)
+    first, second = User(username="first_user"), User(username="second_user")
+    db.add_all([first, second])
+    db.commit()
+    shared = RouteResultDao.get_or_create_route_result(test_map.id, "Whiterun", "Riften", {}, db)
+    own = RouteResultDao.get_or_create_route_result(test_map.id, "Markarth", "Riften", {}, db)
+    routes = [
+        Route(
+            user_id=user.id,
+            map_id=test_map.id,
+            startpoint=startpoint,
+            endpoint="Riften",
+            result=result,
+        )
+        for user, startpoint, result in (
+            (first, "Whiterun", shared),
+            (first, "Markarth", own),
+            (second, "Whiterun", shared),
+        )
+    ]
+    for route in routes:
+        RouteDao.save_route(route, db)
+    shared_id = shared.id
+
+    # Act & Assert
+    assert RouteDao.delete_route_by_id(routes[1].id, db)
+    assert {result.id for result in db.query(RouteResult).all()} == {shared_id}
+
+    assert RouteDao.delete_user_route_history(db, user_id=first.id) == 1
+    assert {result.id for result in db.query(RouteResult).all()} == {shared_id}
+
+    assert RouteDao.delete_user_route_history(db, user_id=second.id) == 1
+    assert db.query(RouteResult).count() == 0
@@ -0,0 +1,88 @@
+"""integration tests for the background map bootstrap"""
+
+from contextlib import nullcontext
+from unittest.mock import patch
+
+from backend.src.database.dao.map_dao import MapDao
+from backend.src.map_service import map_bootstrap
+from backend.src.map_service.map_bootstrap import BootstrapProgress, start_map_bootstrap
+from backend.src.map_service.map_service import DUMMY_MAP_SIZES
+
+
+def test_bootstrap_runs_in_a_daemon_thread():
+    """test the bootstrap does not block the caller"""
+    # Arrange
+    progress = BootstrapProgress()
+
+    # Act
+    with patch.object(map_bootstrap, "run_map_bootstrap") as run_map_bootstrap:
+        thread = start_map_bootstrap(progress)
+        thread.join(timeout=10)
+
+    # Assert
+    assert thread.daemon
+    run_map_bootstrap.assert_called_once_with(progress)
+
+
+def test_bootstrap_imports_maps_and_reports_progress(db):
+    """test the bootstrap stores the dummy maps and reports its progress"""
+    # Arrange
+    progress = BootstrapProgress()
+    assert progress.snapshot()["status"] == "pending"
+
+    # Act
+    with patch.object(map_bootstrap, "get_db_session", return_value=nullcontext(db)):
+        map_bootstrap.run_map_bootstrap(progress)
+
+    # Assert
+    state = progress.snapshot()
+    assert progress.ready
+    assert state["maps_done"] == state["maps_total"] == len(DUMMY_MAP_SIZES)
+    assert state["rows_imported"] > sum(DUMMY_MAP_SIZES)
+    assert state["finished_at"] >= state["started_at"]
+    assert len(MapDao.get_all_maps(db)) == len(DUMMY_MAP_SIZES)
+
+    # a second bootstrap finds the unchanged maps and writes nothing
+    versions = [map_obj.version for map_obj in MapDao.get_all_maps(db)]
+    progress = BootstrapProgress()
+    with patch.object(map_bootstrap, "get_db_session", return_value=nullcontext(db)):
+        map_bootstrap.run_map_bootstrap(progress)
+    assert progress.ready
+    assert progress.snapshot()["maps_done"] == len(DUMMY_MAP_SIZES)
+    assert progress.snapshot()["rows_imported"] == 0
+    assert [map_obj.version for map_obj in MapDao.get_all_maps(db)] == versions
+
+
+def test_bootstrap_reports_failures():
+    """test a failing bootstrap is reported as failed"""
+    # Arrange
+    progress = BootstrapProgress()
+
+    # Act
+    with patch.object(map_bootstrap, "get_db_session", side_effect=OSError("database down")):
+        map_bootstrap.run_map_bootstrap(progress, attempts=1)
+
+    # Assert
+    assert not progress.ready
+    assert progress.snapshot()["status"] == "failed"
+    assert progress.snapshot()["error"] == "database down"
+
+
+def test_bootstrap_retries_with_backoff(db):
+    """test failed attempts are retried with growing delays until one succeeds"""
+    # Arrange
+    progress = BootstrapProgress()
+    sessions = [OSError("database starting"), OSError("database starting"), nullcontext(db)]
+
+    # Act
+    with (
+        patch.object(map_bootstrap, "get_db_session", side_effect=sessions),
+        patch.object(map_bootstrap.time, "sleep") as sleep,
+    ):
+        map_bootstrap.run_map_bootstrap(progress, attempts=3, retry_delay=2)
+
+    # Assert
+    assert progress.ready
+    assert progress.snapshot()["failed_attempts"] == 2
+    assert progress.snapshot()["maps_done"] == len(DUMMY_MAP_SIZES)
+    assert [call.args[0] for call in sleep.call_args_list] == [2, 4]
@@ -0,0 +1,38 @@
+"""integration tests for the write-behind route history writer"""
+
+from contextlib import nullcontext
+
+from backend.src.database.dao.route_dao import RouteDao
+from backend.src.database.schema.route import RouteFilter
+from backend.src.database.schema.route_result import RouteResult
+from backend.src.database.schema.user import User
+from backend.src.tests.integration.dao_tests.test_connection_dao_it import fabricate_and_commit_map
+from backend.src.web_backend.route_history_writer import RouteHistoryWriter
+
+
+def test_queued_routes_are_written_in_batches(db):
+    """test the background thread writes the queued routes of all users in batches"""
+    # Arrange
+    test_map = fabricate_and_commit_map(db)
+    users = [User(username=f"user_{i}") for i in range(7)]
+    db.add_all(users)
+    db.commit()
+    user_ids = [user.id for user in users]
+    writer = RouteHistoryWriter(
+        batch_size=3, flush_interval=0.05, session_factory=lambda: nullcontext(db)
+    )
+
+    # Act
+    for user_id in user_ids:
+        writer.submit(user_id, test_map.id, "Whiterun", "Riften", {"distance": 100})
+    writer.stop()
+
+    # Assert
+    statistics = writer.statistics()
+    assert statistics["written"] == 7
+    assert statistics["queued"] == 0
+    assert 3 <= statistics["flushes"] <= 7
+    assert db.query(RouteResult).count() == 1
+    for user_id in user_ids:
+        routes = RouteDao.get_routes(RouteFilter(user_id=user_id), db)
+        assert [route.route for route in routes] == [{"distance": 100}]
@@ -0,0 +1,73 @@
+"""Unit tests for the navigation benchmark suite"""
+
+from backend.src.benchmarks.run_benchmarks import (
+    RegressionThresholds,
+    benchmark_map,
+    compare_with_baseline,
+    load_baseline,
+    save_baseline,
+)
+from backend.src.benchmarks.synthetic_maps import generate_navigation_data
+
+
+def make_results(seconds, peak_bytes):
+    """Build a results dict with a single size and metric"""
+    return {
+        "sizes": {"100": {"metrics": {"dijkstra": {"seconds": seconds, "peak_bytes": peak_bytes}}}}
+    }
+
+
+def test_generate_navigation_data_is_deterministic():
+    """the same seed always yields the same map"""
+    assert generate_navigation_data(50, seed=1) == generate_navigation_data(50, seed=1)
+    assert generate_navigation_data(50, seed=1) != generate_navigation_data(50, seed=2)
+
+
+def test_generate_navigation_data_references_existing_cities():
+    """every connection points to generated cities"""
+    data = generate_navigation_data(37)
+    city_ids = {city["id"] for city in data["cities"]}
+
+    assert len(city_ids) == 37
+    for connection in data["connections"]:
+        assert connection["parent_city_id"] in city_ids
+        assert connection["child_city_id"] in city_ids
+
+
+def test_benchmark_map_records_all_metrics():
+    """a benchmark run measures graph creation, the engines and get_route"""
+    result = benchmark_map(30, queries=2, repeat=1)
+
+    assert result["city_count"] == 30
+    assert {"create_graph", "dijkstra", "get_route"} <= set(result["metrics"])
+    for values in result["metrics"].values():
+        assert values["seconds"] >= 0
+        assert values["peak_bytes"] > 0
+
+
+def test_compare_with_baseline_detects_regressions():
+    """slowdowns and memory growth beyond the thresholds are reported"""
+    baseline = make_results(0.1, 1000)
+    thresholds = RegressionThresholds(time=0.25, memory=0.25)
+
+    assert not compare_with_baseline(make_results(0.12, 1200), baseline, thresholds)
+    assert len(compare_with_baseline(make_results(0.2, 1000), baseline, thresholds)) == 1
+    assert len(compare_with_baseline(make_results(0.2, 2000), baseline, thresholds)) == 2
+
+
+def test_compare_with_baseline_ignores_noise_and_unknown_entries():
+    """tiny absolute slowdowns and sizes without baseline are not regressions"""
+    thresholds = RegressionThresholds(time_floor=0.001)
+
+    assert not compare_with_baseline(make_results(0.0002, 10), make_results(0.0001, 10), thresholds)
+    assert not compare_with_baseline(make_results(5.0, 10), {"sizes": {}}, thresholds)
+
+
+def test_save_and_load_baseline(tmp_path):
+    """baselines round-trip through the file system"""
+    path = tmp_path / "baseline.json"
+    results = make_results(0.1, 1000)
+
+    assert load_baseline(str(path)) == {"sizes": {}}
+    save_baseline(results, str(path))
+    assert load_baseline(str(path)) == results
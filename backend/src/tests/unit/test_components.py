@@ -0,0 +1,58 @@
+"""
+Tests compute_components() and summarize_components()
+"""
+
+from backend.src.navigation_service.navigation_service import (
+    compute_components,
+    iterate_graph_edges,
+    summarize_components,
+)
+
+
+def test_compute_components_single_component():
+    """all cities connected"""
+    components = compute_components([1, 2, 3], [(1, 2), (3, 2)])
+    assert components == {1: 0, 2: 0, 3: 0}
+
+
+def test_compute_components_disconnected():
+    """two groups and one isolated city"""
+    components = compute_components([1, 2, 3, 4, 5], [(1, 2), (4, 3)])
+    assert components[1] == components[2]
+    assert components[3] == components[4]
+    assert len({components[1], components[3], components[5]}) == 3
+
+
+def test_compute_components_ignores_unknown_cities():
+    """edges referencing unknown cities are skipped"""
+    components = compute_components([1, 2], [(1, 99), (2, 1)])
+    assert components == {1: 0, 2: 0}
+
+
+def test_compute_components_from_graph():
+    """components can be derived from a graph built by create_graph"""
+    graph = {1: [(1, 2)], 2: [(1, 1)], 3: []}
+    components = compute_components([1, 2, 3], iterate_graph_edges(graph))
+    assert components[1] == components[2] != components[3]
+
+
+def test_summarize_components():
+    """summary lists components largest first and isolated cities"""
+    components = compute_components(["A", "B", "C", "D", "E"], [("A", "B"), ("B", "C")])
+    summary = summarize_components(components, {name: name for name in "ABCDE"}, sample_size=2)
+
+    assert summary["component_count"] == 3
+    assert summary["largest_component_size"] == 3
+    assert summary["isolated_cities"] == ["D", "E"]
+    assert summary["components"][0] == {"id": 0, "size": 3, "cities": ["A", "B"]}
+
+
+def test_summarize_components_empty_map():
+    """maps without cities have no components"""
+    summary = summarize_components({}, {})
+    assert summary == {
+        "component_count": 0,
+        "largest_component_size": 0,
+        "isolated_cities": [],
+        "components": [],
+    }
@@ -97,3 +97,64 @@ def test_get_route_no_connection_between_cities(mocker):
 
     result = get_route("CityA", "CityD", data, headers={})
     assert result == {"error": "No connection found between CityA and CityD"}
+
+
+def test_get_route_different_components_skips_search(mocker):
+    """
+    Test if method get_route rejects cities in different components without running dijkstra.
+    """
+    mocker.patch(
+        "backend.src.navigation_service.navigation_service.create_graph",
+        side_effect=mock_create_graph,
+    )
+    mock_dijkstra_call = mocker.patch(
+        "backend.src.navigation_service.navigation_service.dijkstra",
+        side_effect=mock_dijkstra,
+    )
+
+    result = get_route("CityA", "CityD", data, headers={})
+    assert result == {"error": "No connection found between CityA and CityD"}
+    mock_dijkstra_call.assert_not_called()
+
+
+def test_get_route_reuses_graph_of_map_version(mocker):
+    """
+    Test if the graph is only created once per map version.
+    """
+    mock_create_graph_call = mocker.patch(
+        "backend.src.navigation_service.navigation_service.create_graph",
+        side_effect=mock_create_graph,
+    )
+    mocker.patch(
+        "backend.src.navigation_service.navigation_service.dijkstra",
+        side_effect=mock_dijkstra,
+    )
+    versioned_data = {**data, "map_id": 99, "version": 1, "content_hash": "a"}
+
+    get_route("CityA", "CityC", versioned_data, headers={})
+    result = get_route("CityA", "CityB", versioned_data, headers={})
+    get_route("CityA", "CityC", {**versioned_data, "version": 2}, headers={})
+
+    assert result["distance"] == 10
+    assert mock_create_graph_call.call_count == 2
+
+
+def test_get_route_rebuilds_graph_of_recreated_map(mocker):
+    """
+    Test if a map recreated with the same id and version, e.g. after a database reset, does not
+    get the graph of the previous map.
+    """
+    mock_create_graph_call = mocker.patch(
+        "backend.src.navigation_service.navigation_service.create_graph",
+        side_effect=mock_create_graph,
+    )
+    mocker.patch(
+        "backend.src.navigation_service.navigation_service.dijkstra",
+        side_effect=mock_dijkstra,
+    )
+    versioned_data = {**data, "map_id": 98, "version": 1, "content_hash": "a"}
+
+    get_route("CityA", "CityC", versioned_data, headers={})
+    get_route("CityA", "CityC", {**versioned_data, "content_hash": "b"}, headers={})
+
+    assert mock_create_graph_call.call_count == 2
@@ -248,3 +248,53 @@ def test_check_all_criteria(
     expected_result["database_connection"] = False
 
     assert result == expected_result, "Expected database connection to fail"
+
+
+def test_liveness_check(client):
+    """
+    Test that the liveness check answers without checking any dependency.
+    """
+    response = client.get("/healthz/live")
+
+    assert response.status_code == 200
+    assert response.get_json() == {"status": "alive"}
+
+
+@patch("backend.src.web_backend.controller.health_controller.bootstrap_progress")
+def test_liveness_check_fails_after_a_failed_bootstrap(mock_bootstrap_progress, client):
+    """
+    Test that a map bootstrap that failed for good fails the liveness check, retries do not.
+    """
+    mock_bootstrap_progress.snapshot.return_value = {"status": "retrying", "error": "down"}
+    assert client.get("/healthz/live").status_code == 200
+
+    mock_bootstrap_progress.snapshot.return_value = {"status": "failed", "error": "down"}
+    response = client.get("/healthz/live")
+    assert response.status_code == 503
+    assert response.get_json()["details"]["bootstrap"]["error"] == "down"
+
+
+@patch("backend.src.web_backend.controller.health_controller.check_database_connection")
+@patch("backend.src.web_backend.controller.health_controller.bootstrap_progress")
+def test_readiness_check(mock_bootstrap_progress, mock_check_database_connection, client):
+    """
+    Test that the readiness check waits for the map bootstrap and the database.
+    """
+    mock_check_database_connection.return_value = {"database_connection": True}
+    mock_bootstrap_progress.snapshot.return_value = {
+        "status": "running",
+        "maps_total": 4,
+        "maps_done": 1,
+    }
+
+    response = client.get("/healthz/ready")
+    assert response.status_code == 503
+    assert response.get_json()["details"]["bootstrap"]["maps_done"] == 1
+
+    mock_bootstrap_progress.snapshot.return_value = {"status": "ready"}
+    response = client.get("/healthz/ready")
+    assert response.status_code == 200
+    assert response.get_json()["status"] == "ready"
+
+    mock_check_database_connection.return_value = {"database_connection": False, "message": "down"}
+    assert client.get("/healthz/ready").status_code == 503
@@ -0,0 +1,53 @@
+"""Unit tests for the level-of-detail map clustering"""
+
+from backend.src.benchmarks.synthetic_maps import generate_navigation_data
+from backend.src.utils.map_clustering import BASE_CELLS, LEVEL_COUNT, build_lod_levels
+
+
+def test_build_lod_levels_bounds_cluster_count():
+    """every level has at most one cluster per grid cell and covers all cities"""
+    data = generate_navigation_data(3000, seed=5)
+
+    levels = build_lod_levels(data["cities"], data["connections"])
+
+    assert [level["zoom"] for level in levels] == list(range(LEVEL_COUNT))
+    for level in levels:
+        assert len(level["clusters"]) <= (BASE_CELLS * 2 ** level["zoom"]) ** 2
+        assert sum(cluster["count"] for cluster in level["clusters"]) == 3000
+    # finer levels show more detail
+    assert len(levels[0]["clusters"]) < len(levels[-1]["clusters"])
+
+
+def test_build_lod_levels_aggregates_clusters_and_connections():
+    """cities of one cell are merged, connections between clusters are counted"""
+    cities = [
+        {"id": 1, "name": "Markarth", "position_x": 0, "position_y": 0},
+        {"id": 2, "name": "Karthwasten", "position_x": 2, "position_y": 2},
+        {"id": 3, "name": "Dragon Bridge", "position_x": 6, "position_y": 4},
+        {"id": 4, "name": "Riften", "position_x": 800, "position_y": 800},
+    ]
+    connections = [
+        {"parent_city_id": 1, "child_city_id": 2},
+        {"parent_city_id": 2, "child_city_id": 4},
+        {"parent_city_id": 4, "child_city_id": 3},
+    ]
+
+    coarsest = build_lod_levels(cities, connections)[0]
+
+    assert len(coarsest["clusters"]) == 2
+    west, east = coarsest["clusters"]
+    assert (west["count"], west["name"], west["bbox"]) == (3, "Karthwasten", [0, 0, 6, 4])
+    assert (west["position_x"], west["position_y"]) == (2.67, 2)
+    assert (east["count"], east["name"], east["city_id"]) == (1, "Riften", 4)
+    # the connection inside the west cluster disappears, the other two are merged
+    assert coarsest["connections"] == [
+        {"parent_cluster_id": west["id"], "child_cluster_id": east["id"], "count": 2}
+    ]
+
+
+def test_build_lod_levels_empty_map():
+    """maps without cities have empty levels"""
+    levels = build_lod_levels([], [])
+
+    assert len(levels) == LEVEL_COUNT
+    assert all(not level["clusters"] for level in levels)
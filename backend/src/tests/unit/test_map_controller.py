@@ -1,12 +1,32 @@
 """Unit tests for the web backend controller."""
 
+import gzip
+import json
 from unittest.mock import patch, MagicMock
 
+import pytest
 from flask.testing import FlaskClient
 from requests.exceptions import RequestException
 from sqlalchemy.exc import SQLAlchemyError
 
 from backend.src.app import main
+from backend.src.map_service.map_file_import import MapExistsError, MapFileError
+from backend.src.web_backend.map_response_cache import map_response_cache
+
+
+@pytest.fixture(name="mock_map_etags", autouse=True)
+def fixture_mock_map_etags(mocker):
+    """Let map endpoints answer without an ETag unless a test sets one."""
+    return (
+        mocker.patch(
+            "backend.src.web_backend.controller.map_controller.service_get_map_etag",
+            return_value=None,
+        ),
+        mocker.patch(
+            "backend.src.web_backend.controller.map_controller.service_get_map_etag_by_name",
+            return_value=None,
+        ),
+    )
 
 
 @patch("backend.src.web_backend.controller.map_controller.get_db_session")
@@ -101,20 +121,17 @@ def test_get_cities(mock_service_get_cities_data, mock_get_db_session, client: F
     assert data["cities"][1]["name"] == "Riften"
 
 
-@patch("backend.src.app.fetch_and_store_map_data_if_needed")
-@patch("backend.src.app.get_db_session")
+@patch("backend.src.app.start_map_bootstrap")
 @patch("backend.src.app.create_app")
-def test_main_script(mock_create_app, mock_get_db_session, mock_fetch_and_store_map_data):
-    """Test the main script block."""
+def test_main_script(mock_create_app, mock_start_map_bootstrap):
+    """Test the main script block starts the server without waiting for the maps."""
     mock_app = MagicMock()
     mock_create_app.return_value = mock_app
-    mock_session = MagicMock()
-    mock_get_db_session.return_value.__enter__.return_value = mock_session
 
     main()
 
     # Assertions
-    mock_fetch_and_store_map_data.assert_called_once_with(session=mock_session)
+    mock_start_map_bootstrap.assert_called_once_with()
     mock_app.run.assert_called_once_with(debug=False, host="0.0.0.0", port=4243)
 
 
@@ -257,3 +274,334 @@ def test_get_city_suggestions_request_exception(
     assert response.status_code == 500
     data = response.get_json()
     assert data["error"] == "Internal server error"
+
+
+@patch("backend.src.web_backend.controller.map_controller.get_db_session")
+@patch("backend.src.web_backend.controller.map_controller.service_get_map_components")
+def test_get_map_components(
+    mock_service_get_map_components, mock_get_db_session, client: FlaskClient
+):
+    """Test the get_map_components endpoint."""
+    mock_get_db_session.return_value.__enter__.return_value = MagicMock()
+    mock_service_get_map_components.return_value = {
+        "component_count": 2,
+        "largest_component_size": 2,
+        "isolated_cities": ["Riften"],
+        "components": [
+            {"id": 0, "size": 2, "cities": ["Markarth", "Whiterun"]},
+            {"id": 1, "size": 1, "cities": ["Riften"]},
+        ],
+    }
+
+    response = client.get("/maps/1/components")
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["map_id"] == 1
+    assert data["component_count"] == 2
+    assert data["isolated_cities"] == ["Riften"]
+
+
+@patch("backend.src.web_backend.controller.map_controller.get_db_session")
+@patch("backend.src.web_backend.controller.map_controller.service_get_map_components")
+def test_get_map_components_map_not_found(
+    mock_service_get_map_components, mock_get_db_session, client: FlaskClient
+):
+    """Test the get_map_components endpoint with an unknown map."""
+    mock_get_db_session.return_value.__enter__.return_value = MagicMock()
+    mock_service_get_map_components.return_value = None
+
+    response = client.get("/maps/99/components")
+
+    assert response.status_code == 404
+    assert response.get_json()["error"] == "Map not found"
+
+
+@patch("backend.src.web_backend.controller.map_controller.get_db_session")
+@patch("backend.src.web_backend.controller.map_controller.service_get_nearest_cities")
+def test_get_nearest_cities(
+    mock_service_get_nearest_cities, mock_get_db_session, client: FlaskClient
+):
+    """Test the get_nearest_cities endpoint."""
+    mock_session = MagicMock()
+    mock_get_db_session.return_value.__enter__.return_value = mock_session
+    mock_service_get_nearest_cities.return_value = [
+        {"id": 1, "name": "Whiterun", "position_x": 10, "position_y": 20, "distance": 1.5}
+    ]
+
+    response = client.get("/maps/1/cities/nearest?x=11&y=21.5&k=3")
+
+    assert response.status_code == 200
+    assert response.get_json()["cities"][0]["name"] == "Whiterun"
+    mock_service_get_nearest_cities.assert_called_once_with(1, 11.0, 21.5, 3, mock_session)
+
+
+def test_get_nearest_cities_invalid_coordinates(client: FlaskClient):
+    """Test the get_nearest_cities endpoint with missing or invalid coordinates."""
+    assert client.get("/maps/1/cities/nearest?x=11").status_code == 400
+    assert client.get("/maps/1/cities/nearest?x=a&y=2").status_code == 400
+    assert client.get("/maps/1/cities/nearest?x=nan&y=0").status_code == 400
+    assert client.get("/maps/1/cities/nearest?x=inf&y=0").status_code == 400
+
+
+@patch("backend.src.web_backend.controller.map_controller.get_db_session")
+@patch("backend.src.web_backend.controller.map_controller.service_get_viewport")
+def test_get_viewport(mock_service_get_viewport, mock_get_db_session, client: FlaskClient):
+    """Test the get_viewport endpoint."""
+    mock_session = MagicMock()
+    mock_get_db_session.return_value.__enter__.return_value = mock_session
+    mock_service_get_viewport.return_value = {
+        "cities": [{"id": 1, "name": "Whiterun", "position_x": 10, "position_y": 20}],
+        "neighbours": [],
+        "connections": [],
+        "truncated": False,
+    }
+
+    response = client.get("/maps/1/viewport?min_x=0&min_y=0&max_x=100&max_y=50.5")
+
+    assert response.status_code == 200
+    assert response.get_json()["cities"][0]["name"] == "Whiterun"
+    mock_service_get_viewport.assert_called_once_with(1, (0.0, 0.0, 100.0, 50.5), mock_session)
+
+
+def test_get_viewport_invalid_bbox(client: FlaskClient):
+    """Test the get_viewport endpoint with missing, incomplete or inverted bounding boxes."""
+    assert client.get("/maps/1/viewport").status_code == 400
+    assert client.get("/maps/1/viewport?min_x=0&min_y=0&max_x=10").status_code == 400
+    assert client.get("/maps/1/viewport?min_x=20&min_y=0&max_x=10&max_y=10").status_code == 400
+    assert client.get("/maps/1/viewport?min_x=0&min_y=0&max_x=inf&max_y=inf").status_code == 400
+    assert client.get("/maps/1/viewport?min_x=-inf&min_y=0&max_x=1&max_y=1").status_code == 400
+
+
+@pytest.mark.parametrize("max_x", ["nan", "inf"])
+def test_get_cities_non_finite_bbox(client: FlaskClient, max_x):
+    """Test that the cities endpoint rejects bounding boxes that are not finite."""
+    response = client.get(f"/cities?map_id=1&min_x=0&min_y=0&max_x={max_x}&max_y=1")
+
+    assert response.status_code == 400
+    assert "finite" in response.get_json()["error"]
+
+
+@patch("backend.src.web_backend.controller.map_controller.get_db_session")
+@patch("backend.src.web_backend.controller.map_controller.service_get_cities_data")
+def test_get_cities_in_bbox(mock_service_get_cities_data, mock_get_db_session, client: FlaskClient):
+    """Test that the cities endpoint passes an optional bounding box on."""
+    mock_session = MagicMock()
+    mock_get_db_session.return_value.__enter__.return_value = mock_session
+    mock_service_get_cities_data.return_value = []
+
+    response = client.get("/cities?map_id=1&min_x=0&min_y=0&max_x=10&max_y=10")
+
+    assert response.status_code == 200
+    mock_service_get_cities_data.assert_called_once_with(1, mock_session, (0.0, 0.0, 10.0, 10.0))
+
+
+@patch("backend.src.web_backend.controller.map_controller.get_db_session")
+@patch("backend.src.web_backend.controller.map_controller.service_get_map_lod")
+def test_get_map_lod(mock_service_get_map_lod, _mock_get_db_session, client: FlaskClient):
+    """Test the get_map_lod endpoint returns a cacheable zoom level."""
+    mock_service_get_map_lod.return_value = {
+        "zoom": 0,
+        "cell_size": 100.0,
+        "clusters": [{"id": 0, "name": "Whiterun", "count": 12}],
+        "connections": [],
+    }
+
+    response = client.get("/maps/1/lod/0")
+
+    assert response.status_code == 200
+    assert response.get_json()["clusters"][0]["count"] == 12
+    assert "max-age" in response.headers["Cache-Control"]
+
+
+@patch("backend.src.web_backend.controller.map_controller.get_db_session")
+@patch("backend.src.web_backend.controller.map_controller.service_get_map_lod")
+def test_get_map_lod_errors(mock_service_get_map_lod, _mock_get_db_session, client: FlaskClient):
+    """Test the get_map_lod endpoint for unknown maps and zoom levels."""
+    mock_service_get_map_lod.return_value = None
+    assert client.get("/maps/42/lod/0").status_code == 404
+
+    mock_service_get_map_lod.side_effect = ValueError("Zoom level must be between 0 and 3")
+    assert client.get("/maps/1/lod/9").status_code == 400
+
+
+@patch("backend.src.web_backend.controller.map_controller.get_db_session")
+@patch("backend.src.web_backend.controller.map_controller.service_get_cities_data")
+def test_get_cities_sets_etag(
+    mock_service_get_cities_data, _mock_get_db_session, mock_map_etags, client: FlaskClient
+):
+    """Test map responses carry the content hash of the map as ETag."""
+    mock_map_etags[0].return_value = "abc123"
+    mock_service_get_cities_data.return_value = [{"name": "Whiterun"}]
+
+    response = client.get("/cities?map_id=1")
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"abc123"'
+    assert "no-cache" in response.headers["Cache-Control"]
+
+
+@patch("backend.src.web_backend.controller.map_controller.get_db_session")
+@patch("backend.src.web_backend.controller.map_controller.service_get_cities_data")
+@patch("backend.src.web_backend.controller.map_controller.service_get_map_lod")
+def test_map_endpoints_not_modified(
+    mock_service_get_map_lod,
+    mock_service_get_cities_data,
+    _mock_get_db_session,
+    mock_map_etags,
+    client: FlaskClient,
+):
+    """Test a matching If-None-Match is answered with 304 without building the payload."""
+    mock_map_etags[0].return_value = "abc123"
+    mock_service_get_cities_data.return_value = [{"name": "Whiterun"}]
+    headers = {"If-None-Match": '"abc123"'}
+
+    response = client.get("/cities?map_id=1", headers=headers)
+    assert response.status_code == 304
+    assert response.headers["ETag"] == '"abc123"'
+    assert not response.data
+    mock_service_get_cities_data.assert_not_called()
+
+    response = client.get("/maps/1/lod/0", headers=headers)
+    assert response.status_code == 304
+    assert "max-age" in response.headers["Cache-Control"]
+    mock_service_get_map_lod.assert_not_called()
+
+    assert client.get("/cities?map_id=1", headers={"If-None-Match": '"old"'}).status_code == 200
+
+
+@patch("backend.src.web_backend.controller.map_controller.get_db_session")
+@patch("backend.src.web_backend.controller.map_controller.service_get_map_data_by_name")
+def test_get_maps_with_name_not_modified(
+    mock_service_get_map_data_by_name, _mock_get_db_session, mock_map_etags, client: FlaskClient
+):
+    """Test the get_maps endpoint answers conditional requests by map name."""
+    mock_map_etags[1].return_value = "abc123"
+
+    response = client.get("/maps?name=Skyrim", headers={"If-None-Match": '"abc123"'})
+
+    assert response.status_code == 304
+    mock_service_get_map_data_by_name.assert_not_called()
+
+
+@patch("backend.src.web_backend.controller.map_controller.get_db_session")
+@patch("backend.src.web_backend.web_backend_service.service_get_map_data_by_name")
+def test_get_maps_with_name_serves_compressed_body(
+    mock_service_get_map_data_by_name, _mock_get_db_session, mock_map_etags, client: FlaskClient
+):
+    """Test map data is serialized once per content hash and served in the accepted coding."""
+    mock_map_etags[1].return_value = "content-hash-of-skyrim"
+    mock_service_get_map_data_by_name.return_value = (
+        {"name": "Skyrim"},
+        [{"name": "Whiterun"}],
+        [],
+    )
+    map_response_cache.clear()
+
+    compressed = client.get("/maps?name=Skyrim", headers={"Accept-Encoding": "gzip, deflate"})
+    plain = client.get("/maps?name=Skyrim", headers={"Accept-Encoding": "identity"})
+
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["ETag"] == '"content-hash-of-skyrim-gzip"'
+    assert "Accept-Encoding" in compressed.headers["Vary"]
+    assert json.loads(gzip.decompress(compressed.data))["cities"] == [{"name": "Whiterun"}]
+    assert "Content-Encoding" not in plain.headers
+    assert plain.get_json()["map"] == {"name": "Skyrim"}
+    mock_service_get_map_data_by_name.assert_called_once()
+
+    response = client.get(
+        "/maps?name=Skyrim",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": '"content-hash-of-skyrim-gzip"'},
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == '"content-hash-of-skyrim-gzip"'
+    map_response_cache.clear()
+
+
+@patch("backend.src.web_backend.controller.map_controller.get_db_session")
+@patch("backend.src.web_backend.controller.map_controller.service_export_map")
+def test_get_map_export(mock_service_export_map, _mock_get_db_session, client: FlaskClient):
+    """Test the export endpoint streams NDJSON chunks and reports unknown maps."""
+    mock_service_export_map.return_value = iter(
+        ['{"type":"map","id":1}\n', '{"type":"city","id":1}\n{"type":"city","id":2}\n']
+    )
+
+    response = client.get("/maps/1/export")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert [json.loads(line)["type"] for line in response.data.splitlines()] == [
+        "map",
+        "city",
+        "city",
+    ]
+
+    mock_service_export_map.return_value = iter([])
+    assert client.get("/maps/42/export").status_code == 404
+
+
+@patch("backend.src.web_backend.controller.map_controller.get_db_session")
+@patch("backend.src.web_backend.controller.map_controller.service_export_map")
+def test_get_map_export_aborted(mock_service_export_map, _mock_get_db_session, client: FlaskClient):
+    """Test an export failing while streaming ends with an error line."""
+
+    def failing_export():
+        yield '{"type":"map","id":1}\n'
+        raise SQLAlchemyError("connection lost")
+
+    mock_service_export_map.return_value = failing_export()
+
+    response = client.get("/maps/1/export")
+
+    assert response.status_code == 200
+    assert json.loads(response.data.splitlines()[-1])["type"] == "error"
+
+
+@patch("backend.src.web_backend.controller.map_controller.get_db_session")
+@patch("backend.src.web_backend.controller.map_controller.service_import_map_file")
+def test_import_map(mock_service_import_map_file, _mock_get_db_session, client: FlaskClient):
+    """Test map files are imported from the request body, optionally gzip compressed."""
+    mock_service_import_map_file.return_value = {"map_id": 5, "cities": 2, "connections": 1}
+    body = b"map,Skyrim,100,100\ncity,Riften,1,2\n"
+
+    response = client.post(
+        "/maps/import",
+        data=gzip.compress(body),
+        headers={"Content-Type": "text/csv", "Content-Encoding": "gzip"},
+    )
+
+    assert response.status_code == 201
+    assert response.get_json()["map_id"] == 5
+    stream, file_format, _, update = mock_service_import_map_file.call_args.args
+    assert file_format == "csv"
+    assert not update
+    assert stream.read() == body
+
+
+@patch("backend.src.web_backend.controller.map_controller.get_db_session")
+@patch("backend.src.web_backend.controller.map_controller.service_import_map_file")
+def test_import_map_update(mock_service_import_map_file, _mock_get_db_session, client: FlaskClient):
+    """Test existing maps are updated with update=true and the change report is returned."""
+    report = {"map_id": 5, "changed": True, "cities": {"added": ["Riften"]}}
+    mock_service_import_map_file.return_value = report
+
+    response = client.post("/maps/import?update=true", data=b"{}")
+
+    assert response.status_code == 200
+    assert response.get_json() == report
+    assert mock_service_import_map_file.call_args.args[3]
+
+
+@patch("backend.src.web_backend.controller.map_controller.get_db_session")
+@patch("backend.src.web_backend.controller.map_controller.service_import_map_file")
+def test_import_map_errors(mock_service_import_map_file, _mock_get_db_session, client: FlaskClient):
+    """Test invalid files, unknown formats and existing maps are rejected."""
+    assert client.post("/maps/import?format=xml", data=b"<map/>").status_code == 400
+
+    mock_service_import_map_file.side_effect = MapFileError("line 2: invalid record")
+    response = client.post("/maps/import", data=b"{}")
+    assert response.status_code == 400
+    assert "line 2" in response.get_json()["error"]
+
+    mock_service_import_map_file.side_effect = MapExistsError("Map Skyrim already exists")
+    assert client.post("/maps/import", data=b"{}").status_code == 409
@@ -0,0 +1,87 @@
+"""Unit tests for the streaming map file import"""
+
+import io
+import json
+from unittest.mock import patch
+
+import pytest
+
+from backend.src.map_service.map_file_import import (
+    MapFileError,
+    detect_format,
+    iter_csv_records,
+    iter_json_records,
+)
+from backend.src.map_service.map_generator import MapGeneratorConfig, generate_map
+
+
+def test_json_records_are_parsed_across_chunks():
+    """values split between two reads are decoded completely"""
+    map_data = generate_map("Chunked", MapGeneratorConfig(city_count=50, seed=7))
+    text = json.dumps(map_data, indent=1)
+
+    with patch("backend.src.map_service.map_file_import.READ_SIZE", 7):
+        records = list(iter_json_records(io.StringIO(text)))
+
+    assert records[0] == (
+        "map",
+        {"name": "Chunked", "size_x": map_data["mapsizeX"], "size_y": map_data["mapsizeY"]},
+    )
+    cities = [record for kind, record in records if kind == "city"]
+    connections = [record for kind, record in records if kind == "connection"]
+    assert cities == [(c["name"], c["positionX"], c["positionY"]) for c in map_data["cities"]]
+    assert connections == [(c["parent"], c["child"]) for c in map_data["connections"]]
+
+
+def test_json_records_validation():
+    """invalid records and misplaced map entries are reported with their position"""
+    with pytest.raises(MapFileError, match=r"cities\[1\]: city positions must be integers"):
+        list(
+            iter_json_records(
+                io.StringIO(
+                    '{"name": "Skyrim", "mapsizeX": 10, "mapsizeY": 10, "cities": ['
+                    '{"name": "Riften", "positionX": 1, "positionY": 2},'
+                    '{"name": "Ivarstead", "positionX": "far", "positionY": 2}]}'
+                )
+            )
+        )
+    with pytest.raises(MapFileError, match="map size"):
+        list(iter_json_records(io.StringIO('{"name": "Skyrim", "cities": []}')))
+    with pytest.raises(MapFileError, match="expected"):
+        list(iter_json_records(io.StringIO('{"name": "Skyrim", "mapsizeX": 10 "mapsizeY": 1}')))
+
+
+def test_json_records_reject_data_after_the_document():
+    """only whitespace may follow the closing brace of the map object"""
+    text = '{"name": "Skyrim", "mapsizeX": 10, "mapsizeY": 10, "cities": []}'
+
+    assert [kind for kind, _ in iter_json_records(io.StringIO(text + " \n"))] == ["map"]
+    for trailing in ("}", ' {"name": "Riften"}', "\nx"):
+        with pytest.raises(MapFileError, match="unexpected data after the end of the document"):
+            list(iter_json_records(io.StringIO(text + trailing)))
+    with pytest.raises(MapFileError, match="unexpected data"):
+        list(iter_json_records(io.StringIO("{} []")))
+
+
+def test_csv_records():
+    """CSV map files start with the map record, names may be quoted"""
+    text = 'map,Skyrim,100,100\ncity,"Fort ""Dawnguard""",1,2\ncity,Riften,3,4\n\n'
+    text += 'connection,"Fort ""Dawnguard""",Riften\n'
+
+    assert list(iter_csv_records(io.StringIO(text))) == [
+        ("map", {"name": "Skyrim", "size_x": 100, "size_y": 100}),
+        ("city", ('Fort "Dawnguard"', 1, 2)),
+        ("city", ("Riften", 3, 4)),
+        ("connection", ('Fort "Dawnguard"', "Riften")),
+    ]
+    with pytest.raises(MapFileError, match="line 1"):
+        list(iter_csv_records(io.StringIO("city,Riften,3,4\n")))
+    with pytest.raises(MapFileError, match="line 2: 'x' is not an integer"):
+        list(iter_csv_records(io.StringIO("map,Skyrim,100,100\ncity,Riften,x,4\n")))
+
+
+def test_detect_format():
+    """formats are detected by extension"""
+    assert detect_format("maps/skyrim.csv.gz") == "csv"
+    assert detect_format("maps/skyrim.json.gz") == "json"
+    assert detect_format("maps/skyrim.json") == "json"
@@ -0,0 +1,104 @@
+"""Unit tests for the synthetic map generator"""
+
+from collections import defaultdict
+
+import pytest
+
+from backend.src.map_service.map_generator import (
+    MapGeneratorConfig,
+    generate_map,
+    load_map_snapshot,
+    write_map_snapshot,
+)
+
+
+def count_components(map_data):
+    """count the connected parts of a generated map"""
+    neighbours = defaultdict(set)
+    for connection in map_data["connections"]:
+        neighbours[connection["parent"]].add(connection["child"])
+        neighbours[connection["child"]].add(connection["parent"])
+
+    unvisited = {city["name"] for city in map_data["cities"]}
+    components = 0
+    while unvisited:
+        components += 1
+        stack = [unvisited.pop()]
+        while stack:
+            for neighbour in neighbours[stack.pop()]:
+                if neighbour in unvisited:
+                    unvisited.remove(neighbour)
+                    stack.append(neighbour)
+    return components
+
+
+def test_generate_map_is_deterministic():
+    """the same seed always yields the same map, a different seed a different one"""
+    config = MapGeneratorConfig(city_count=200, seed=7)
+
+    assert generate_map("A", config) == generate_map("A", config)
+    assert generate_map("A", config) != generate_map("A", MapGeneratorConfig(200, seed=8))
+
+
+def test_generate_map_shape_and_bounds():
+    """cities stay inside the map and connections reference existing cities"""
+    map_data = generate_map("Test", MapGeneratorConfig(city_count=100, size_x=50, size_y=40))
+    names = {city["name"] for city in map_data["cities"]}
+
+    assert map_data["name"] == "Test"
+    assert (map_data["mapsizeX"], map_data["mapsizeY"]) == (50, 40)
+    assert len(names) == 100
+    for city in map_data["cities"]:
+        assert 0 <= city["positionX"] < 50
+        assert 0 <= city["positionY"] < 40
+    for connection in map_data["connections"]:
+        assert connection["parent"] in names and connection["child"] in names
+        assert connection["parent"] != connection["child"]
+
+
+def test_generate_map_respects_degree():
+    """every city is connected to at least `degree` neighbours"""
+    map_data = generate_map("Test", MapGeneratorConfig(city_count=300, degree=4))
+    degrees = defaultdict(int)
+    for connection in map_data["connections"]:
+        degrees[connection["parent"]] += 1
+        degrees[connection["child"]] += 1
+
+    assert min(degrees.values()) >= 4
+    # unlike a chain there are plenty of alternative paths
+    assert len(map_data["connections"]) > len(map_data["cities"])
+
+
+@pytest.mark.parametrize("cluster_count", [0, 5])
+def test_generate_map_is_connected(cluster_count):
+    """isolated parts of the k-NN graph get joined"""
+    config = MapGeneratorConfig(
+        city_count=500, degree=2, cluster_count=cluster_count, cluster_spread=0.02
+    )
+    assert count_components(generate_map("Test", config)) == 1
+
+
+def test_generate_map_can_keep_components():
+    """joining components can be switched off"""
+    config = MapGeneratorConfig(
+        city_count=500, degree=1, cluster_count=5, cluster_spread=0.01, connect_components=False
+    )
+    assert count_components(generate_map("Test", config)) > 1
+
+
+def test_generate_map_invalid_config():
+    """invalid sizes are rejected"""
+    with pytest.raises(ValueError):
+        generate_map("Test", MapGeneratorConfig(city_count=0))
+    with pytest.raises(ValueError):
+        generate_map("Test", MapGeneratorConfig(city_count=10, degree=0))
+
+
+@pytest.mark.parametrize("file_name", ["map.json", "map.json.gz"])
+def test_snapshot_round_trip(tmp_path, file_name):
+    """snapshots can be written and loaded, optionally gzip compressed"""
+    map_data = generate_map("Snapshot", MapGeneratorConfig(city_count=20))
+    path = str(tmp_path / file_name)
+
+    write_map_snapshot(map_data, path)
+    assert load_map_snapshot(path) == map_data
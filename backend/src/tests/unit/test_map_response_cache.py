@@ -0,0 +1,40 @@
+"""Unit tests for the map response cache"""
+
+import gzip
+import json
+
+from backend.src.web_backend.map_response_cache import EncodedBody, MapResponseCache
+
+
+def test_body_is_compressed_once_per_encoding():
+    """compressed variants are built on first use and reused afterwards"""
+    body = EncodedBody(json.dumps({"cities": ["Whiterun"] * 100}).encode("utf-8"))
+
+    compressed = body.get("gzip")
+
+    assert body.get("gzip") is compressed
+    assert json.loads(gzip.decompress(compressed)) == {"cities": ["Whiterun"] * 100}
+    assert len(compressed) < len(body.get("identity"))
+    assert body.size == len(body.get("identity")) + len(compressed)
+
+
+def test_cache_serializes_once_per_key():
+    """payloads are only built on a miss and least recently used entries are evicted"""
+    cache = MapResponseCache(max_entries=2)
+    builds = []
+
+    def build(name):
+        builds.append(name)
+        return {"map": {"name": name}}
+
+    first = cache.get_or_build(("map", "hash-1"), lambda: build("Skyrim"))
+    assert cache.get_or_build(("map", "hash-1"), lambda: build("Skyrim")) is first
+    assert json.loads(first.get("identity")) == {"map": {"name": "Skyrim"}}
+
+    cache.get_or_build(("map", "hash-2"), lambda: build("Solstheim"))
+    cache.get_or_build(("map", "hash-3"), lambda: build("Cyrodiil"))
+    cache.get_or_build(("map", "hash-1"), lambda: build("Skyrim"))
+
+    assert builds == ["Skyrim", "Solstheim", "Cyrodiil", "Skyrim"]
+    statistics = cache.statistics()
+    assert (statistics["hits"], statistics["misses"], statistics["size"]) == (1, 4, 2)
@@ -0,0 +1,195 @@
+"""Unit tests for the map topology cache"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from redis.exceptions import RedisError
+
+from backend.src.database.map_changes import notify_map_changed
+from backend.src.utils.map_clustering import build_lod_levels
+from backend.src.utils.spatial_index import CitySpatialIndex
+from backend.src.web_backend.map_topology_cache import (
+    MapTopology,
+    MapTopologyCache,
+    map_topology_cache,
+)
+
+
+def make_topology(map_id=1):
+    """small topology with two connected cities"""
+    return MapTopology(
+        {"id": map_id, "name": f"Map {map_id}", "size_x": 100, "size_y": 100, "version": 1},
+        [
+            {"id": 1, "map_id": map_id, "name": "Markarth", "position_x": 0, "position_y": 0},
+            {"id": 2, "map_id": map_id, "name": "Riften", "position_x": 90, "position_y": 90},
+        ],
+        [{"parent_city_id": 1, "child_city_id": 2}],
+    )
+
+
+@pytest.fixture(name="map_version")
+def fixture_map_version():
+    """replace the version lookup, all maps are at version 1"""
+    with patch(
+        "backend.src.web_backend.map_topology_cache.MapDao.get_map_version", return_value=1
+    ) as get_map_version:
+        yield get_map_version
+
+
+@pytest.fixture(name="load")
+def fixture_load(map_version):  # pylint: disable=unused-argument
+    """replace loading from the database"""
+    with patch.object(MapTopology, "load", side_effect=lambda map_id, _: make_topology(map_id)):
+        yield MapTopology.load
+
+
+def test_cache_reads_through_and_counts(load):
+    """the database is only queried on the first access of a map"""
+    cache = MapTopologyCache()
+
+    first = cache.get(1, MagicMock())
+    second = cache.get(1, MagicMock())
+
+    assert first is second
+    assert load.call_count == 1
+    assert cache.statistics() == {
+        "hits": 1,
+        "misses": 1,
+        "redis_hits": 0,
+        "invalidations": 0,
+        "size": 1,
+        "cities": 2,
+    }
+
+
+def test_cache_evicts_least_recently_used_maps(load):
+    """at most max_maps maps are kept"""
+    cache = MapTopologyCache(max_maps=2)
+
+    cache.get(1, None)
+    cache.get(2, None)
+    cache.get(1, None)
+    cache.get(3, None)
+    cache.get(1, None)
+
+    assert load.call_count == 3
+    assert cache.statistics()["size"] == 2
+
+
+def test_cache_does_not_store_unknown_maps(map_version):
+    """map ids without map entry are loaded but not cached"""
+    map_version.return_value = None
+    cache = MapTopologyCache()
+    with patch.object(MapTopology, "load", return_value=MapTopology(None, [], [])) as load:
+        assert cache.get(42, None).map is None
+        cache.get(42, None)
+
+    assert load.call_count == 2
+    assert cache.statistics()["size"] == 0
+
+
+def test_dao_writes_invalidate_the_cache(load):
+    """map changes reported by the DAOs drop the cached entry"""
+    map_topology_cache.clear()
+    map_topology_cache.get(7, None)
+
+    notify_map_changed([7, 7])
+    map_topology_cache.get(7, None)
+
+    assert load.call_count == 2
+    map_topology_cache.clear()
+
+
+def test_cache_reloads_maps_changed_by_other_processes(load, map_version):
+    """a newer map version in the database replaces the cached topology"""
+    cache = MapTopologyCache()
+    cache.get(1, None)
+
+    map_version.return_value = 2
+    cache.get(1, None)
+
+    assert load.call_count == 2
+    assert MapTopologyCache(check_version=False).get(1, None).version == 1
+
+
+def test_cache_redis_tier(load):
+    """entries are shared through Redis and removed from it on invalidation"""
+    redis_client = MagicMock()
+    redis_client.get.return_value = make_topology(5).to_json()
+    cache = MapTopologyCache(redis_client, ttl=60)
+
+    topology = cache.get(5, None)
+
+    assert topology.cities[1]["name"] == "Riften"
+    load.assert_not_called()
+    assert cache.statistics()["redis_hits"] == 1
+
+    cache.invalidate(5)
+    redis_client.get.return_value = None
+    cache.get(5, None)
+
+    redis_client.delete.assert_called_once_with("map_topology_5")
+    redis_client.setex.assert_called_once()
+    assert load.call_count == 1
+
+
+def test_cache_works_without_redis(load):
+    """Redis failures fall back to the database"""
+    redis_client = MagicMock()
+    redis_client.get.side_effect = RedisError("down")
+    redis_client.setex.side_effect = RedisError("down")
+    cache = MapTopologyCache(redis_client)
+
+    assert cache.get(1, None).map["id"] == 1
+    assert load.call_count == 1
+
+
+def test_topology_derived_structures_are_built_once():
+    """spatial index and zoom levels are cached with the topology"""
+    topology = make_topology()
+    module = "backend.src.web_backend.map_topology_cache"
+    with (
+        patch(f"{module}.CitySpatialIndex", wraps=CitySpatialIndex) as spatial_index_class,
+        patch(f"{module}.build_lod_levels", wraps=build_lod_levels) as build_levels,
+    ):
+        spatial_index = topology.spatial_index
+        lod_levels = topology.lod_levels
+
+        assert topology.spatial_index is spatial_index
+        assert topology.lod_levels is lod_levels
+
+    assert spatial_index_class.call_count == 1
+    assert build_levels.call_count == 1
+    assert spatial_index.nearest_cities(80, 80)[0]["name"] == "Riften"
+
+
+def test_content_hash_is_remembered_per_version(load, map_version):
+    """the hash changes with the content and is only recomputed for new map versions"""
+    cache = MapTopologyCache(max_maps=1)
+
+    first = cache.content_hash(1, None)
+    cache.get(2, None)  # evicts the topology of map 1, its hash is kept
+    assert cache.content_hash(1, None) == first
+    assert load.call_count == 2
+
+    changed = make_topology()
+    changed.cities[0]["name"] = "Falkreath"
+    map_version.return_value = 2
+    changed.map["version"] = 2
+    load.side_effect = lambda map_id, _: changed
+    assert cache.content_hash(1, None) != first
+    assert load.call_count == 3
+
+    map_version.return_value = None
+    assert cache.content_hash(42, None) is None
+
+
+def test_content_hash_ignores_the_map_version():
+    """a new version with the same name, size, cities and connections keeps its hash"""
+    bumped = make_topology()
+    bumped.map["version"] = 7
+    moved = make_topology()
+    moved.cities[1]["position_x"] = 80
+
+    assert bumped.content_hash == make_topology().content_hash
+    assert moved.content_hash != make_topology().content_hash
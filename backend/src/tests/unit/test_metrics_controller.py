@@ -33,6 +33,7 @@ def test_metrics_endpoint(client, mocker):
 def test_metrics_endpoint_no_metrics(client, mocker):
     """Test the metrics endpoint with no metrics"""
     mocker.patch.object(metrics_logger.redis_client, "keys", return_value=[])
+    mock_process_statistics(mocker)
 
     response = client.get("/metrics")
     assert response.status_code == 200
@@ -43,7 +44,44 @@ def test_metrics_endpoint_invalid_metric(client, mocker):
     """Test the metrics endpoint with an invalid metric"""
     mocker.patch.object(metrics_logger.redis_client, "keys", return_value=[b"m_invalid_metric"])
     mocker.patch.object(metrics_logger, "get", side_effect=ValueError)
+    mock_process_statistics(mocker)
 
     response = client.get("/metrics")
     assert response.status_code == 200
     assert response.data == b""
+
+
+def test_metrics_endpoint_process_statistics(client, mocker):
+    """Test that the connection pool and map cache statistics of the process are reported"""
+    mocker.patch.object(metrics_logger.redis_client, "keys", return_value=[])
+    mock_process_statistics(
+        mocker,
+        pool={"checkedout": 2, "overflow": -3},
+        cache={"hits": 7},
+        response_cache={"bytes": 512},
+        writer={"last_batch_size": 3},
+        route_cache={"hits": 5},
+    )
+
+    response = client.get("/metrics")
+    assert response.data == (
+        b"m_db_pool_checkedout 2\nm_db_pool_overflow -3\nm_map_cache_hits 7\n"
+        b"m_map_response_cache_bytes 512\nm_route_history_writer_last_batch_size 3\n"
+        b"m_route_cache_hits 5"
+    )
+
+
+def mock_process_statistics(mocker, **statistics):
+    """
+    replace the statistics of the connection pool, map caches, history writer and route cache,
+    given as pool, cache, response_cache, writer and route_cache
+    """
+    controller = "backend.src.web_backend.controller.metrics_controller"
+    mocker.patch(f"{controller}.get_pool_statistics", return_value=statistics.get("pool", {}))
+    for target, name in (
+        ("map_topology_cache", "cache"),
+        ("map_response_cache", "response_cache"),
+        ("route_history_writer", "writer"),
+        ("route_result_cache", "route_cache"),
+    ):
+        mocker.patch(f"{controller}.{target}.statistics", return_value=statistics.get(name, {}))
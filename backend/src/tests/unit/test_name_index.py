@@ -0,0 +1,59 @@
+"""Unit tests for the autocomplete name index"""
+
+from random import Random
+
+import pytest
+
+from backend.src.utils.name_index import NameIndex, rank_key
+
+SYLLABLES = ["wh", "ite", "run", "rif", "ten", "mar", "karth", "sol", "dawn", "star", "helm", "_"]
+
+
+def brute_force_suggest(names, query, limit):
+    """reference implementation: rank all names containing the query"""
+    query = query.lower()
+    prefixed = sorted((name for name in names if name.lower().startswith(query)), key=rank_key)
+    contained = sorted(
+        (name for name in names if query in name.lower() and not name.lower().startswith(query)),
+        key=rank_key,
+    )
+    return (prefixed + contained)[:limit]
+
+
+@pytest.fixture(name="names")
+def random_names():
+    """a few thousand random names"""
+    rng = Random(5)
+    return list(
+        {
+            "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))).capitalize()
+            for _ in range(5000)
+        }
+    )
+
+
+@pytest.mark.parametrize("limit", [1, 10, 50])
+def test_suggest_matches_brute_force(names, limit):
+    """the index finds the same names in the same order as a full scan"""
+    index = NameIndex(names)
+    queries = ["w", "Wh", "RUN", "_", "te", "ite_", "karthsol", "arths", "helmdawn", "xyz"]
+
+    for query in queries:
+        assert index.suggest(query, limit) == brute_force_suggest(names, query, limit)
+
+
+def test_suggest_ranks_prefix_matches_first():
+    """names starting with the query come first, shorter names first within each group"""
+    index = NameIndex(["Fort Dawnguard", "Dawnstar", "Dawn", "Old Dawn", "Windhelm"])
+
+    assert index.suggest("dawn") == ["Dawn", "Dawnstar", "Old Dawn", "Fort Dawnguard"]
+    assert index.suggest("dawn", limit=2) == ["Dawn", "Dawnstar"]
+    assert index.suggest("helm") == ["Windhelm"]
+
+
+def test_suggest_without_query_or_names():
+    """empty queries, limits and indexes return nothing"""
+    assert not NameIndex(["Dawnstar"]).suggest("")
+    assert not NameIndex(["Dawnstar"]).suggest("dawn", limit=0)
+    assert not NameIndex([]).suggest("dawn")
+    assert len(NameIndex(["Dawnstar", "Riften"])) == 2
@@ -0,0 +1,35 @@
+"""Unit tests for keyset pagination cursors"""
+
+from datetime import datetime
+
+import pytest
+
+from backend.src.utils.pagination import decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize("value", [datetime(2026, 10, 19, 12, 30, 5, 123), "Riften", None])
+def test_cursor_round_trip(value):
+    """the keyset of a cursor is restored with its type"""
+    cursor = encode_cursor("created_at", True, (value, 42))
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, "created_at", True) == (value, 42)
+
+
+@pytest.mark.parametrize(
+    "cursor", ["", "!!!", "bm90IGpzb24", encode_cursor("f", True, (1, 2))[:-3]]
+)
+def test_decode_cursor_rejects_malformed_cursors(cursor):
+    """cursors that were not created by encode_cursor are rejected"""
+    with pytest.raises(ValueError, match="Malformed cursor"):
+        decode_cursor(cursor, "f", True)
+
+
+def test_decode_cursor_rejects_other_sort_orders():
+    """a cursor only continues the sort order it was created for"""
+    cursor = encode_cursor("startpoint", True, ("Riften", 1))
+
+    with pytest.raises(ValueError, match="different sort order"):
+        decode_cursor(cursor, "startpoint", False)
+    with pytest.raises(ValueError, match="different sort order"):
+        decode_cursor(cursor, "endpoint", True)
@@ -0,0 +1,101 @@
+"""Unit tests for the route result cache and its warm-up with the popular routes"""
+
+import json
+import os
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from redis.exceptions import RedisError
+
+from backend.src.web_backend.route_cache_warmer import acquire_warm_up_lock, warm_route_cache
+from backend.src.web_backend.route_result_cache import RouteResultCache
+
+WARMER = "backend.src.web_backend.route_cache_warmer"
+
+
+@pytest.fixture(name="cache")
+def fixture_cache():
+    """a route cache with a mocked Redis client"""
+    return RouteResultCache(MagicMock(), ttl=60)
+
+
+@pytest.fixture(name="popular_routes")
+def fixture_popular_routes():
+    """two popular routes of map 1 with content hash c4"""
+    with (
+        patch(f"{WARMER}.PopularRouteDao") as popular_route_dao,
+        patch(f"{WARMER}.get_map_content_hash") as get_map_content_hash,
+    ):
+        popular_route_dao.get_popular_routes.return_value = [
+            SimpleNamespace(map_id=1, startpoint="Whiterun", endpoint="Riften"),
+            SimpleNamespace(map_id=1, startpoint="Markarth", endpoint="Riften"),
+        ]
+        get_map_content_hash.return_value = "c4"
+        yield popular_route_dao
+
+
+def test_route_cache_keys_depend_on_map_content_and_endpoints():
+    """keys differ per map content hash and endpoint order"""
+    key = RouteResultCache.key(1, "c4", "Whiterun", "Riften")
+    assert key.startswith("route_result_1_c4_")
+    assert key != RouteResultCache.key(1, "c5", "Whiterun", "Riften")
+    assert key != RouteResultCache.key(1, "c4", "Riften", "Whiterun")
+
+
+def test_route_cache_redis_errors_are_misses(cache):
+    """an unavailable Redis server neither fails requests nor caches anything"""
+    cache.redis_client.get.side_effect = RedisError("unavailable")
+    cache.redis_client.setex.side_effect = RedisError("unavailable")
+
+    assert cache.get(1, "c4", "Whiterun", "Riften") is None
+    cache.put(1, "c4", "Whiterun", "Riften", {"route": []})
+
+    assert cache.statistics() == {"hits": 0, "misses": 0, "stored": 0, "errors": 2}
+
+
+def test_route_cache_hit(cache):
+    """cached results are decoded"""
+    cache.redis_client.get.return_value = json.dumps({"route": ["Whiterun"]}).encode("utf-8")
+
+    assert cache.get(1, "c4", "Whiterun", "Riften") == {"route": ["Whiterun"]}
+    assert cache.statistics()["hits"] == 1
+
+
+def test_warm_route_cache_calculates_uncached_routes(cache, popular_routes):
+    """only the routes that are not cached are calculated, cached ones keep their entry"""
+    cache.redis_client.expire.side_effect = [True, False]
+    session = MagicMock()
+
+    with patch(f"{WARMER}.fetch_route_from_navigation_service") as fetch_route:
+        fetch_route.return_value = {"route": ["Markarth", "Riften"], "distance": 10}
+        report = warm_route_cache(session, limit_per_map=2, cache=cache)
+
+    assert report == {"warmed": 1, "cached": 1, "failed": 0}
+    popular_routes.get_popular_routes.assert_called_once_with(session, limit=2)
+    fetch_route.assert_called_once_with(1, "Markarth", "Riften", session)
+
+
+@pytest.mark.usefixtures("popular_routes")
+def test_warm_route_cache_counts_failed_routes(cache):
+    """failed calculations are counted and not cached"""
+    cache.redis_client.expire.return_value = False
+
+    with patch(f"{WARMER}.fetch_route_from_navigation_service") as fetch_route:
+        fetch_route.return_value = {"error": "Error during Route Calculation"}
+        report = warm_route_cache(MagicMock(), cache=cache)
+
+    assert report == {"warmed": 0, "cached": 0, "failed": 2}
+
+
+def test_warm_up_lock(cache):
+    """one process warms per interval, all of them do without Redis"""
+    cache.redis_client.set.return_value = None
+    assert not acquire_warm_up_lock(cache, 3600)
+    cache.redis_client.set.assert_called_once_with(
+        "route_cache_warmer_lock", os.getpid(), nx=True, ex=3600
+    )
+
+    cache.redis_client.set.side_effect = RedisError("unavailable")
+    assert acquire_warm_up_lock(cache, 3600)
+    assert acquire_warm_up_lock(RouteResultCache(None), 3600)
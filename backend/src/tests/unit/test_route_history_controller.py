@@ -1,9 +1,11 @@
 """Unit tests for route history controller."""
 
 import json
+from datetime import datetime
 from unittest.mock import patch, MagicMock
 from flask import Flask
 import pytest
+from backend.src.database.schema.route_result import RouteResult
 from backend.src.web_backend.controller.route_history_controller import init_path_routes
 
 
@@ -57,18 +59,101 @@ def test_get_user_history(mock_route_dao, mock_get_db_session, client):
     """Test the get user history endpoint"""
     mock_session = MagicMock()
     mock_get_db_session.return_value.__enter__.return_value = mock_session
-    mock_route_dao.get_routes.return_value = [
-        MagicMock(
-            id=1, startpoint="CityA", endpoint="CityB", route=json.dumps({"route": "mocked_route"})
-        )
-    ]
+    mock_route_dao.get_routes_page.return_value = (
+        [
+            MagicMock(
+                id=1,
+                startpoint="CityA",
+                endpoint="CityB",
+                route=json.dumps({"route": "mocked_route"}),
+            )
+        ],
+        None,
+    )
 
-    response = client.get("/users/1/routes?map_id=1")
+    response = client.get("/users/1/routes?map_id=1&via=CityC")
     assert response.status_code == 200
+    assert mock_route_dao.get_routes_page.call_args.args[0].optional_filters.via == "CityC"
     data = response.get_json()
     assert len(data["routes"]) == 1
     assert data["routes"][0]["startpoint"] == "CityA"
     assert data["routes"][0]["endpoint"] == "CityB"
+    assert data["next_cursor"] is None
+
+
+@patch("backend.src.web_backend.controller.route_history_controller.get_db_session")
+@patch("backend.src.web_backend.controller.route_history_controller.RouteDao")
+def test_get_user_history_pages(mock_route_dao, _mock_get_db_session, client):
+    """Test the route history returns a cursor for the next page and accepts it"""
+    route = MagicMock(id=7, startpoint="CityA", endpoint="CityB", route={})
+    mock_route_dao.get_routes_page.return_value = ([route], ("CityA", 7))
+
+    first = client.get("/users/1/routes?field=startpoint&limit=1").get_json()
+    mock_route_dao.get_routes_page.return_value = ([], None)
+    second = client.get(f"/users/1/routes?field=startpoint&limit=1&cursor={first['next_cursor']}")
+
+    assert second.status_code == 200
+    assert second.get_json() == {"routes": [], "next_cursor": None}
+    filter_params = mock_route_dao.get_routes_page.call_args.args[0]
+    assert filter_params.after == ("CityA", 7)
+
+
+@patch("backend.src.web_backend.controller.route_history_controller.get_db_session")
+@patch("backend.src.web_backend.controller.route_history_controller.RouteDao")
+def test_get_user_history_invalid_cursor(mock_route_dao, _mock_get_db_session, client):
+    """Test malformed cursors and cursors of another sort order are rejected"""
+    mock_route_dao.get_routes_page.return_value = (
+        [MagicMock(id=7, startpoint="CityA", endpoint="CityB", route={})],
+        ("CityA", 7),
+    )
+    cursor = client.get("/users/1/routes?field=startpoint").get_json()["next_cursor"]
+
+    assert client.get("/users/1/routes?cursor=not-a-cursor").status_code == 400
+    response = client.get(f"/users/1/routes?field=endpoint&cursor={cursor}")
+    assert response.status_code == 400
+    assert "sort order" in response.get_json()["error"]
+
+
+@patch("backend.src.web_backend.controller.route_history_controller.get_db_session")
+@patch("backend.src.web_backend.controller.route_history_controller.RouteDao")
+def test_get_user_history_fields(mock_route_dao, _mock_get_db_session, client):
+    """Test the route history returns and loads only the selected fields"""
+    route = MagicMock(id=7, startpoint="CityA", created_at=datetime(2026, 1, 1))
+    mock_route_dao.get_routes_page.return_value = ([route], None)
+
+    response = client.get("/users/1/routes?fields=id,startpoint,created_at")
+
+    assert response.status_code == 200
+    assert response.get_json()["routes"] == [
+        {"id": 7, "startpoint": "CityA", "created_at": "2026-01-01T00:00:00"}
+    ]
+    filter_params = mock_route_dao.get_routes_page.call_args.args[0]
+    assert filter_params.fields == ("id", "startpoint", "created_at")
+    assert client.get("/users/1/routes?fields=id,password").status_code == 400
+
+
+@patch("backend.src.web_backend.controller.route_history_controller.get_db_session")
+@patch("backend.src.web_backend.controller.route_history_controller.RouteDao")
+def test_get_route(mock_route_dao, _mock_get_db_session, client):
+    """Test a route of the history is returned with all fields, only to its user"""
+    mock_route_dao.get_route_by_id.return_value = MagicMock(
+        id=7,
+        user_id=1,
+        map_id=2,
+        startpoint="CityA",
+        endpoint="CityB",
+        created_at=datetime(2026, 1, 1),
+        route={"path": ["CityA", "CityB"]},
+    )
+
+    response = client.get("/users/1/routes/7")
+
+    assert response.status_code == 200
+    assert response.get_json()["route"] == {"path": ["CityA", "CityB"]}
+    assert response.get_json()["created_at"] == "2026-01-01T00:00:00"
+    assert client.get("/users/2/routes/7").status_code == 404
+    mock_route_dao.get_route_by_id.return_value = None
+    assert client.get("/users/1/routes/8").status_code == 404
 
 
 @patch("backend.src.web_backend.controller.route_history_controller.get_db_session")
@@ -130,14 +215,17 @@ def test_calculate_route_error(mock_fetch_route, mock_get_db_session, client):
 @patch(
     "backend.src.web_backend.controller.route_history_controller.fetch_route_from_navigation_service"
 )
+@patch("backend.src.web_backend.controller.route_history_controller.RouteResultDao")
 @patch("backend.src.web_backend.controller.route_history_controller.RouteDao")
 def test_calculate_route_registered_user(
-    mock_route_dao, mock_fetch_route, mock_get_db_session, client
+    mock_route_dao, mock_route_result_dao, mock_fetch_route, mock_get_db_session, client
 ):
     """Test the calculate-route endpoint for a registered user."""
     mock_session = MagicMock()
     mock_get_db_session.return_value.__enter__.return_value = mock_session
     mock_fetch_route.return_value = {"route": "mocked_route"}
+    stored_result = RouteResult.create(1, "CityA", "CityB", {"route": "mocked_route"})
+    mock_route_result_dao.get_or_create_route_result.return_value = stored_result
     mock_saved_route = MagicMock(id=1)
     mock_route_dao.save_route.return_value = mock_saved_route
 
@@ -147,6 +235,35 @@ def test_calculate_route_registered_user(
     assert response.status_code == 201, f"Expected status code 201 but got {response.status_code}"
     data = response.get_json()
     assert data["route"] == "mocked_route"
+    mock_route_result_dao.get_or_create_route_result.assert_called_once_with(
+        1, "CityA", "CityB", {"route": "mocked_route"}, mock_session
+    )
+    assert mock_route_dao.save_route.call_args.args[0].result is stored_result
+
+
+@patch("backend.src.web_backend.controller.route_history_controller.get_db_session")
+@patch(
+    "backend.src.web_backend.controller.route_history_controller.fetch_route_from_navigation_service"
+)
+@patch("backend.src.web_backend.controller.route_history_controller.route_history_writer")
+@patch("backend.src.web_backend.controller.route_history_controller.RouteDao")
+def test_calculate_route_write_behind(
+    mock_route_dao, mock_writer, mock_fetch_route, _mock_get_db_session, client
+):
+    """Test the route of a registered user is queued instead of saved with write-behind"""
+    mock_fetch_route.return_value = {"route": "mocked_route"}
+
+    with patch(
+        "backend.src.web_backend.controller.route_history_controller.ROUTE_HISTORY_WRITE_BEHIND",
+        True,
+    ):
+        response = client.post(
+            "/users/1/maps/1/routes", json={"startpoint": "CityA", "endpoint": "CityB"}
+        )
+
+    assert response.status_code == 201
+    mock_writer.submit.assert_called_once_with(1, 1, "CityA", "CityB", {"route": "mocked_route"})
+    mock_route_dao.save_route.assert_not_called()
 
 
 @patch("backend.src.web_backend.controller.route_history_controller.get_db_session")
@@ -176,3 +293,45 @@ def test_delete_route_not_found(mock_route_dao, mock_get_db_session, client):
     assert response.status_code == 404
     data = response.get_json()
     assert data["error"] == "Route not found"
+
+
+@patch("backend.src.web_backend.controller.route_history_controller.service_snap_to_nearest_city")
+@patch("backend.src.web_backend.controller.route_history_controller.get_db_session")
+@patch(
+    "backend.src.web_backend.controller.route_history_controller.fetch_route_from_navigation_service"
+)
+def test_calculate_route_from_positions(mock_fetch_route, mock_get_db_session, mock_snap, client):
+    """Test that positions are snapped to the nearest cities before calculating the route."""
+    mock_session = MagicMock()
+    mock_get_db_session.return_value.__enter__.return_value = mock_session
+    mock_fetch_route.return_value = {"route": "mocked_route"}
+    mock_snap.side_effect = lambda map_id, x, y, session: "CityA" if x < 50 else "CityB"
+
+    response = client.post(
+        "/maps/1/routes",
+        json={"start_position": {"x": 10, "y": 20}, "end_position": {"x": 90, "y": 20}},
+    )
+
+    assert response.status_code == 201
+    mock_fetch_route.assert_called_once_with(1, "CityA", "CityB", mock_session)
+
+
+def test_calculate_route_invalid_position(client):
+    """Test that malformed positions are rejected."""
+    response = client.post(
+        "/maps/1/routes", json={"startpoint": "CityA", "end_position": {"x": "east"}}
+    )
+
+    assert response.status_code == 400
+    assert "numeric x and y" in response.get_json()["error"]
+
+
+@pytest.mark.parametrize("x", ["nan", "inf", "-Infinity"])
+def test_calculate_route_non_finite_position(client, x):
+    """Test that positions that are not finite are rejected before snapping."""
+    response = client.post(
+        "/maps/1/routes", json={"startpoint": "CityA", "end_position": {"x": x, "y": 0}}
+    )
+
+    assert response.status_code == 400
+    assert "finite numeric x and y" in response.get_json()["error"]
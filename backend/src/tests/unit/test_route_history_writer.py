@@ -0,0 +1,123 @@
+"""Unit tests for the write-behind route history writer"""
+
+import json
+from contextlib import nullcontext
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from backend.src.web_backend.route_history_writer import REDIS_GROUP, RouteHistoryWriter
+
+
+@pytest.fixture(name="daos")
+def fixture_daos():
+    """replace the DAOs, every route refers to route result 1"""
+    with patch("backend.src.web_backend.route_history_writer.RouteResultDao") as result_dao, patch(
+        "backend.src.web_backend.route_history_writer.RouteDao"
+    ) as route_dao:
+        result_dao.get_or_create_route_results.side_effect = lambda items, _: [1] * len(items)
+        yield result_dao, route_dao
+
+
+def make_writer(redis_client=None, **kwargs):
+    """writer without background thread, flushed by the tests"""
+    writer = RouteHistoryWriter(
+        redis_client, session_factory=lambda: nullcontext(MagicMock()), **kwargs
+    )
+    writer._ensure_started = MagicMock()  # pylint: disable=protected-access
+    return writer
+
+
+def submit_routes(writer, count):
+    """submit count routes of user 1"""
+    for i in range(count):
+        writer.submit(1, 2, f"City {i}", "Riften", {"distance": i})
+
+
+def test_routes_are_written_in_batches(daos):
+    """queued routes are written with one multi-row insert per batch"""
+    _, route_dao = daos
+    writer = make_writer(batch_size=2, flush_interval=0)
+    submit_routes(writer, 5)
+
+    assert writer.statistics()["queued"] == 5
+    assert writer.flush() == 5
+
+    batches = [call.args[0] for call in route_dao.save_routes.call_args_list]
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert batches[0][1]["startpoint"] == "City 1"
+    assert batches[0][1]["result_id"] == 1
+    statistics = writer.statistics()
+    assert statistics["queued"] == 0
+    assert statistics["written"] == 5
+    assert statistics["flushes"] == 3
+    assert statistics["last_batch_size"] == 1
+
+
+def test_full_queue_writes_synchronously(daos):
+    """routes that do not fit into the queue are not dropped"""
+    _, route_dao = daos
+    writer = make_writer(queue_size=1)
+
+    submit_routes(writer, 2)
+
+    assert route_dao.save_routes.call_count == 1
+    assert writer.statistics()["written_synchronously"] == 1
+    assert writer.statistics()["queued"] == 1
+
+
+def test_failed_batch_is_written_again(daos):
+    """a batch that could not be written is kept and written by the next flush"""
+    _, route_dao = daos
+    route_dao.save_routes.side_effect = [OperationalError("INSERT", {}, Exception("down")), 3]
+    writer = make_writer(flush_interval=0)
+    submit_routes(writer, 3)
+
+    with pytest.raises(OperationalError):
+        writer.flush()
+    assert writer.statistics()["queued"] == 3
+    assert writer.flush() == 3
+
+    assert writer.statistics()["failed"] == 3
+    assert writer.statistics()["written"] == 3
+
+
+def test_rejected_routes_do_not_block_the_batch(daos):
+    """routes the database rejects are dropped, the others of their batch are written"""
+    _, route_dao = daos
+
+    def save_routes(rows, _):
+        if any(row["startpoint"] == "City 1" for row in rows):
+            raise IntegrityError("INSERT", {}, Exception("foreign key"))
+        return len(rows)
+
+    route_dao.save_routes.side_effect = save_routes
+    writer = make_writer(flush_interval=0)
+    submit_routes(writer, 3)
+
+    writer.flush()
+
+    statistics = writer.statistics()
+    assert statistics["rejected"] == 1
+    assert statistics["written"] == 2
+    assert statistics["queued"] == 0
+
+
+def test_redis_mode_acknowledges_written_routes(daos):
+    """routes are queued in a stream and acknowledged after they are written"""
+    _, route_dao = daos
+    redis_client = MagicMock()
+    writer = make_writer(redis_client)
+
+    writer.submit(1, 2, "Markarth", "Riften", {"distance": 7})
+
+    stream, fields = redis_client.xadd.call_args.args
+    redis_client.xautoclaim.return_value = ["0-0", [], []]
+    redis_client.xreadgroup.side_effect = [[], [[stream, [(b"1-0", {b"route": fields["route"]})]]]]
+    assert writer._flush_batch(block=False) == 1  # pylint: disable=protected-access
+
+    assert json.loads(fields["route"])["startpoint"] == "Markarth"
+    assert route_dao.save_routes.call_args.args[0][0]["endpoint"] == "Riften"
+    redis_client.xack.assert_called_once_with(stream, REDIS_GROUP, b"1-0")
+    redis_client.xdel.assert_called_once_with(stream, b"1-0")
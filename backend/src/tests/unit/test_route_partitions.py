@@ -0,0 +1,78 @@
+"""Unit tests for the maintenance of the monthly route partitions"""
+
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from backend.src.database.dao.route_partition_dao import partition_name
+from backend.src.database.route_partitions import add_months, maintain_route_partitions
+
+
+@pytest.fixture(name="partition_dao")
+def fixture_partition_dao():
+    """partitioned routes with the partitions of August to October 2026"""
+    with patch("backend.src.database.route_partitions.RoutePartitionDao") as partition_dao:
+        partition_dao.is_partitioned.return_value = True
+        partition_dao.get_partition_months.return_value = [
+            date(2026, 8, 1),
+            date(2026, 9, 1),
+            date(2026, 10, 1),
+        ]
+        yield partition_dao
+
+
+@pytest.fixture(name="result_dao")
+def fixture_result_dao():
+    """replace deleting the unreferenced route results"""
+    with patch("backend.src.database.route_partitions.RouteResultDao") as result_dao:
+        result_dao.delete_unreferenced_route_results.return_value = 4
+        yield result_dao
+
+
+def test_add_months():
+    """months are counted across years, the result is the first day of the month"""
+    assert add_months(date(2026, 10, 19), 0) == date(2026, 10, 1)
+    assert add_months(date(2026, 11, 30), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 31), -1) == date(2025, 12, 1)
+    assert partition_name(date(2027, 2, 1)) == "routes_y2027m02"
+
+
+def test_missing_partitions_are_created(partition_dao, result_dao):
+    """partitions are created for the current month and months_ahead months after it"""
+    session = MagicMock()
+
+    report = maintain_route_partitions(session, months_ahead=2, today=date(2026, 10, 19))
+
+    assert report["created"] == [date(2026, 11, 1), date(2026, 12, 1)]
+    assert [call.args[:2] for call in partition_dao.create_partition.call_args_list] == [
+        (date(2026, 11, 1), date(2026, 12, 1)),
+        (date(2026, 12, 1), date(2027, 1, 1)),
+    ]
+    partition_dao.lock_partitions.assert_called_once_with(session)
+    partition_dao.drop_partition.assert_not_called()
+    result_dao.delete_unreferenced_route_results.assert_not_called()
+    session.commit.assert_called_once()
+
+
+def test_expired_partitions_are_dropped(partition_dao, result_dao):
+    """retention drops the partitions older than the kept months and their route results"""
+    session = MagicMock()
+
+    report = maintain_route_partitions(
+        session, months_ahead=0, retention_months=2, today=date(2026, 10, 19)
+    )
+
+    assert report == {"created": [], "dropped": [date(2026, 8, 1)], "route_results_deleted": 4}
+    partition_dao.drop_partition.assert_called_once_with(date(2026, 8, 1), session)
+    result_dao.delete_unreferenced_route_results.assert_called_once_with(session)
+
+
+def test_nothing_is_done_without_partitions(partition_dao):
+    """databases without partitioned routes, e.g. SQLite, are left alone"""
+    partition_dao.is_partitioned.return_value = False
+
+    report = maintain_route_partitions(MagicMock(), retention_months=1)
+
+    assert report == {"created": [], "dropped": [], "route_results_deleted": 0}
+    partition_dao.create_partition.assert_not_called()
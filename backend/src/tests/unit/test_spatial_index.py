@@ -0,0 +1,131 @@
+"""Unit tests for the grid spatial index"""
+
+from random import Random
+
+import pytest
+
+from backend.src.utils.spatial_index import CitySpatialIndex, GridIndex
+
+
+def brute_force_nearest(points, x, y, k):
+    """reference implementation: sort all points by distance"""
+    return sorted(((px - x) ** 2 + (py - y) ** 2, index) for index, (px, py) in enumerate(points))[
+        :k
+    ]
+
+
+@pytest.fixture(name="points")
+def random_points():
+    """a few thousand random points"""
+    rng = Random(3)
+    return [(rng.randint(0, 1000), rng.randint(0, 500)) for _ in range(2000)]
+
+
+@pytest.mark.parametrize("k", [1, 5, 20])
+def test_nearest_matches_brute_force(points, k):
+    """the grid finds the same distances as a full scan, also for queries outside the data"""
+    index = GridIndex(points)
+    rng = Random(4)
+    queries = [(rng.uniform(-200, 1200), rng.uniform(-200, 700)) for _ in range(50)]
+
+    for x, y in queries:
+        found = [distance for distance, _ in index.nearest(x, y, k)]
+        expected = [distance for distance, _ in brute_force_nearest(points, x, y, k)]
+        assert found == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("x, y", [(1e8, 250), (-1e12, -1e12), (500, 1e15)])
+def test_nearest_far_away_from_the_data(points, x, y):
+    """far away queries find the right points without walking the empty cells up to the data"""
+    index = GridIndex(points)
+    ring_calls = []
+    original_ring = index._ring  # pylint: disable=protected-access
+
+    def counting_ring(*args):
+        ring_calls.append(args)
+        return original_ring(*args)
+
+    index._ring = counting_ring  # pylint: disable=protected-access
+    found = [point for _, point in index.nearest(x, y, 3)]
+
+    assert found == [point for _, point in brute_force_nearest(points, x, y, 3)]
+    assert len(ring_calls) <= len(index.cells)
+
+
+def test_nearest_with_k_larger_than_points():
+    """all points are returned if k exceeds the number of points"""
+    index = GridIndex([(0, 0), (10, 10), (5, 5)])
+    assert [point for _, point in index.nearest(6, 6, 10)] == [2, 1, 0]
+
+
+def test_nearest_empty_index():
+    """an empty index returns no results"""
+    assert not GridIndex([]).nearest(1, 1, 3)
+
+
+def test_nearest_with_accept_filter(points):
+    """rejected points are skipped"""
+    index = GridIndex(points)
+    found = index.nearest(500, 250, 5, accept=lambda point: point % 2 == 0)
+    assert len(found) == 5
+    assert all(point % 2 == 0 for _, point in found)
+
+
+def test_city_spatial_index_nearest_cities():
+    """cities are returned nearest first with their distance"""
+    cities = [
+        {"id": 1, "name": "Markarth", "position_x": 0, "position_y": 0},
+        {"id": 2, "name": "Riften", "position_x": 30, "position_y": 40},
+        {"id": 3, "name": "Whiterun", "position_x": 10, "position_y": 0},
+    ]
+    index = CitySpatialIndex(cities)
+
+    result = index.nearest_cities(9, 1, k=2)
+
+    assert len(index) == 3
+    assert [city["name"] for city in result] == ["Whiterun", "Markarth"]
+    assert result[0]["distance"] == 1.41
+
+
+def test_grid_index_within_matches_brute_force():
+    """bounding box queries find exactly the points inside the box"""
+    rng = Random(3)
+    points = [(rng.randint(0, 500), rng.randint(0, 500)) for _ in range(1000)]
+    grid = GridIndex(points)
+
+    for min_x, min_y, max_x, max_y in [(0, 0, 500, 500), (100, 50, 180, 400), (-50, -50, 5, 5)]:
+        expected = [
+            index
+            for index, (x, y) in enumerate(points)
+            if min_x <= x <= max_x and min_y <= y <= max_y
+        ]
+        assert sorted(grid.within(min_x, min_y, max_x, max_y)) == expected
+    assert not grid.within(600, 600, 700, 700)
+    assert not GridIndex([]).within(0, 0, 10, 10)
+
+
+def test_city_spatial_index_viewport():
+    """viewports contain visible cities, touching connections and their outside neighbours"""
+    cities = [
+        {"id": 1, "name": "Markarth", "position_x": 0, "position_y": 0},
+        {"id": 2, "name": "Whiterun", "position_x": 10, "position_y": 10},
+        {"id": 3, "name": "Riften", "position_x": 100, "position_y": 100},
+        {"id": 4, "name": "Dawnstar", "position_x": 200, "position_y": 200},
+    ]
+    connections = [
+        {"parent_city_id": 1, "child_city_id": 2},
+        {"parent_city_id": 2, "child_city_id": 3},
+        {"parent_city_id": 3, "child_city_id": 4},
+    ]
+    index = CitySpatialIndex(cities, connections)
+
+    viewport = index.viewport(-5, -5, 20, 20)
+
+    assert [city["name"] for city in viewport["cities"]] == ["Markarth", "Whiterun"]
+    assert [city["name"] for city in viewport["neighbours"]] == ["Riften"]
+    assert viewport["connections"] == connections[:2]
+    assert not viewport["truncated"]
+
+    truncated = index.viewport(-5, -5, 150, 150, limit=2)
+    assert len(truncated["cities"]) == 2
+    assert truncated["truncated"]
@@ -1,8 +1,12 @@
 """Unit tests for the web_backend service"""
 
+import json
 import xmlrpc
+from collections import namedtuple
 from unittest.mock import patch, MagicMock
 
+import pytest
+
 from sqlalchemy.orm import Session
 
 from backend.src.web_backend.web_backend_service import (
@@ -10,13 +14,42 @@ from backend.src.web_backend.web_backend_service import (
     fetch_cities_as_dicts,
     service_get_map_data,
     service_get_cities_data,
+    service_get_city_suggestions,
     service_get_map_data_by_name,
+    service_get_map_components,
+    service_get_nearest_cities,
+    service_snap_to_nearest_city,
+    service_get_viewport,
+    service_get_map_lod,
+    service_get_map_etag,
+    service_get_map_etag_by_name,
+    service_export_map,
 )
+from backend.src.web_backend.map_topology_cache import map_topology_cache
+from backend.src.web_backend.route_result_cache import RouteResultCache
+
+
+@pytest.fixture(autouse=True)
+def clear_map_topology_cache():
+    """every test starts without cached maps"""
+    map_topology_cache.clear()
+    yield
+    map_topology_cache.clear()
+
+
+@pytest.fixture(name="route_cache", autouse=True)
+def fixture_route_cache():
+    """a route cache with a mocked Redis client that has no routes cached"""
+    redis_client = MagicMock()
+    redis_client.get.return_value = None
+    cache = RouteResultCache(redis_client, ttl=60)
+    with patch("backend.src.web_backend.web_backend_service.route_result_cache", cache):
+        yield cache
 
 
 @patch("backend.src.web_backend.web_backend_service.xmlrpc.client.ServerProxy")
-@patch("backend.src.web_backend.web_backend_service.CityDao")
-@patch("backend.src.web_backend.web_backend_service.ConnectionDao")
+@patch("backend.src.web_backend.map_topology_cache.CityDao")
+@patch("backend.src.web_backend.map_topology_cache.ConnectionDao")
 def test_fetch_route_success(mock_connection_dao, mock_city_dao, mock_server_proxy):
     """Test the scenario where a route is successfully fetched from the navigation service."""
     # Create a mock SQLAlchemy session
@@ -39,10 +72,39 @@ def test_fetch_route_success(mock_connection_dao, mock_city_dao, mock_server_pro
 
 
 @patch("backend.src.web_backend.web_backend_service.xmlrpc.client.ServerProxy")
-@patch("backend.src.web_backend.web_backend_service.CityDao")
-@patch("backend.src.web_backend.web_backend_service.ConnectionDao")
+@patch("backend.src.web_backend.map_topology_cache.CityDao")
+@patch("backend.src.web_backend.map_topology_cache.ConnectionDao")
+@patch("backend.src.web_backend.map_topology_cache.MapDao")
+def test_fetch_route_is_cached_per_map_content(
+    mock_map_dao, mock_connection_dao, mock_city_dao, mock_server_proxy, route_cache
+):
+    """calculated routes are cached for the map content, cached ones skip the navigation service"""
+    mock_map_version(mock_map_dao, 3)
+    mock_city_and_connection_daos(mock_city_dao, mock_connection_dao)
+    mock_proxy_instance = MagicMock()
+    mock_proxy_instance.get_route.return_value = {"route": ["Markarth", "Riften"], "distance": 500}
+    mock_server_proxy.return_value.__enter__.return_value = mock_proxy_instance
+
+    result = fetch_route_from_navigation_service(1, "Markarth", "Riften", create_mock_session())
+
+    content_hash = mock_proxy_instance.get_route.call_args.args[2]["content_hash"]
+    key = RouteResultCache.key(1, content_hash, "Markarth", "Riften")
+    route_cache.redis_client.setex.assert_called_once_with(key, 60, json.dumps(result))
+
+    route_cache.redis_client.get.return_value = json.dumps({"route": ["cached"], "distance": 1})
+    mock_proxy_instance.get_route.reset_mock()
+    result = fetch_route_from_navigation_service(1, "Markarth", "Riften", create_mock_session())
+
+    assert result == {"route": ["cached"], "distance": 1}
+    mock_proxy_instance.get_route.assert_not_called()
+    assert route_cache.statistics() == {"hits": 1, "misses": 1, "stored": 1, "errors": 0}
+
+
+@patch("backend.src.web_backend.web_backend_service.xmlrpc.client.ServerProxy")
+@patch("backend.src.web_backend.map_topology_cache.CityDao")
+@patch("backend.src.web_backend.map_topology_cache.ConnectionDao")
 def test_fetch_route_error_by_route_calculation(
-    mock_connection_dao, mock_city_dao, mock_server_proxy
+    mock_connection_dao, mock_city_dao, mock_server_proxy, route_cache
 ):
     """Test the scenario where the route calculation fails and returns an error."""
     # Create a mock SQLAlchemy session
@@ -59,11 +121,12 @@ def test_fetch_route_error_by_route_calculation(
     # Call the function with mock session and assert results
     result = fetch_route_from_navigation_service(1, "Markarth", "Riften", mock_session)
     assert result == {"error": "Error during Route Calculation"}
+    route_cache.redis_client.setex.assert_not_called()
 
 
 @patch("backend.src.web_backend.web_backend_service.xmlrpc.client.ServerProxy")
-@patch("backend.src.web_backend.web_backend_service.CityDao")
-@patch("backend.src.web_backend.web_backend_service.ConnectionDao")
+@patch("backend.src.web_backend.map_topology_cache.CityDao")
+@patch("backend.src.web_backend.map_topology_cache.ConnectionDao")
 def test_fetch_route_xmlrpc_error(mock_connection_dao, mock_city_dao, mock_server_proxy):
     """Test the scenario where an XML-RPC error occurs."""
     # Create a mock SQLAlchemy session
@@ -83,8 +146,8 @@ def test_fetch_route_xmlrpc_error(mock_connection_dao, mock_city_dao, mock_serve
 
 
 @patch("backend.src.web_backend.web_backend_service.xmlrpc.client.ServerProxy")
-@patch("backend.src.web_backend.web_backend_service.CityDao")
-@patch("backend.src.web_backend.web_backend_service.ConnectionDao")
+@patch("backend.src.web_backend.map_topology_cache.CityDao")
+@patch("backend.src.web_backend.map_topology_cache.ConnectionDao")
 def test_fetch_route_network_error(mock_connection_dao, mock_city_dao, mock_server_proxy):
     """Test the scenario where a network error occurs."""
     # Create a mock SQLAlchemy session
@@ -101,7 +164,7 @@ def test_fetch_route_network_error(mock_connection_dao, mock_city_dao, mock_serv
     assert result == {"error": "Error occurred while fetching the route: A network error occurred"}
 
 
-@patch("backend.src.web_backend.web_backend_service.CityDao")
+@patch("backend.src.web_backend.map_topology_cache.CityDao")
 def test_fetch_cities_as_dicts(mock_city_dao):
     """Test fetching cities as dictionaries."""
     # Create a mock SQLAlchemy session
@@ -123,9 +186,9 @@ def test_fetch_cities_as_dicts(mock_city_dao):
     ]
 
 
-@patch("backend.src.web_backend.web_backend_service.CityDao")
-@patch("backend.src.web_backend.web_backend_service.ConnectionDao")
-@patch("backend.src.web_backend.web_backend_service.MapDao")
+@patch("backend.src.web_backend.map_topology_cache.CityDao")
+@patch("backend.src.web_backend.map_topology_cache.ConnectionDao")
+@patch("backend.src.web_backend.map_topology_cache.MapDao")
 def test_service_get_map_data(mock_map_dao, mock_connection_dao, mock_city_dao):
     """Test fetching map data."""
     # Create a mock SQLAlchemy session
@@ -163,7 +226,7 @@ def test_service_get_map_data(mock_map_dao, mock_connection_dao, mock_city_dao):
     assert connections_data == [{"parent_city_id": 1, "child_city_id": 2}]
 
 
-@patch("backend.src.web_backend.web_backend_service.CityDao")
+@patch("backend.src.web_backend.map_topology_cache.CityDao")
 def test_service_get_cities_data(mock_city_dao):
     """Test fetching cities data."""
     # Create a mock SQLAlchemy session
@@ -213,6 +276,12 @@ def create_mock_session():
     return MagicMock(spec=Session)
 
 
+def mock_map_version(mock_map_dao, version):
+    """Helper to mock a map whose cached topology stays current"""
+    mock_map_dao.get_map_version.return_value = version
+    mock_map_dao.get_map_by_id.return_value.to_dict.return_value = {"id": 1, "version": version}
+
+
 def mock_city_and_connection_daos(mock_city_dao, mock_connection_dao):
     """Helper to mock city and connection DAOs"""
     mock_city_dao.get_cities_by_map_id.return_value = [
@@ -223,8 +292,8 @@ def mock_city_and_connection_daos(mock_city_dao, mock_connection_dao):
 
 
 @patch("backend.src.web_backend.web_backend_service.MapDao")
-@patch("backend.src.web_backend.web_backend_service.CityDao")
-@patch("backend.src.web_backend.web_backend_service.ConnectionDao")
+@patch("backend.src.web_backend.map_topology_cache.CityDao")
+@patch("backend.src.web_backend.map_topology_cache.ConnectionDao")
 def test_service_get_map_data_by_name(mock_connection_dao, mock_city_dao, mock_map_dao):
     """Test fetching map data by map name."""
     # Create a mock SQLAlchemy session
@@ -281,3 +350,225 @@ def test_service_get_map_data_by_name_not_found(mock_map_dao):
     assert map_data is None
     assert cities_data is None
     assert connections_data is None
+
+
+@patch("backend.src.web_backend.map_topology_cache.MapDao")
+@patch("backend.src.web_backend.map_topology_cache.CityDao")
+@patch("backend.src.web_backend.map_topology_cache.ConnectionDao")
+def test_service_get_map_components(mock_connection_dao, mock_city_dao, mock_map_dao):
+    """Test the component analysis of a map."""
+    mock_session = MagicMock(spec=Session)
+    mock_map_dao.get_map_by_id.return_value = MagicMock()
+    mock_city_dao.get_cities_by_map_id.return_value = [
+        create_mock_city("Markarth", 100, 200, 1, city_id=1),
+        create_mock_city("Riften", 300, 400, 1, city_id=2),
+        create_mock_city("Whiterun", 200, 300, 1, city_id=3),
+    ]
+    mock_connection_dao.get_connections_by_map_id.return_value = [create_mock_connection(1, 2)]
+
+    result = service_get_map_components(1, mock_session)
+
+    assert result["component_count"] == 2
+    assert result["largest_component_size"] == 2
+    assert result["isolated_cities"] == ["Whiterun"]
+
+
+@patch("backend.src.web_backend.map_topology_cache.MapDao")
+def test_service_get_map_components_map_not_found(mock_map_dao):
+    """Test the component analysis of an unknown map."""
+    mock_map_dao.get_map_by_id.return_value = None
+
+    assert service_get_map_components(99, MagicMock(spec=Session)) is None
+
+
+@patch("backend.src.web_backend.map_topology_cache.MapDao")
+@patch("backend.src.web_backend.map_topology_cache.CityDao")
+@patch("backend.src.web_backend.map_topology_cache.ConnectionDao")
+def test_service_get_nearest_cities_uses_spatial_index(
+    mock_connection_dao, mock_city_dao, mock_map_dao
+):
+    """Test that nearest city lookups build the spatial index once and reuse it."""
+    mock_session = MagicMock(spec=Session)
+    mock_city_and_connection_daos(mock_city_dao, mock_connection_dao)
+    mock_map_version(mock_map_dao, 1)
+
+    first = service_get_nearest_cities(1, 290, 390, 1, mock_session)
+    second = service_snap_to_nearest_city(1, 90, 190, mock_session)
+
+    assert first[0]["name"] == "Riften"
+    assert first[0]["distance"] == 14.14
+    assert second == "Markarth"
+    mock_city_dao.get_cities_by_map_id.assert_called_once()
+
+
+@patch("backend.src.web_backend.web_backend_service.SPATIAL_INDEX_ENABLED", False)
+@patch("backend.src.web_backend.web_backend_service.CityDao")
+def test_service_get_nearest_cities_database_fallback(mock_city_dao):
+    """Test that nearest city lookups use the DAO when the in-memory index is disabled."""
+    mock_session = MagicMock(spec=Session)
+    mock_city_dao.get_nearest_cities.return_value = [
+        create_mock_city("Riften", 300, 400, 1, city_id=2)
+    ]
+
+    result = service_get_nearest_cities(1, 300, 396, 500, mock_session)
+
+    assert result[0]["name"] == "Riften"
+    assert result[0]["distance"] == 4
+    mock_city_dao.get_nearest_cities.assert_called_once_with(1, 300, 396, 100, mock_session)
+
+
+@patch("backend.src.web_backend.map_topology_cache.CityDao")
+@patch("backend.src.web_backend.map_topology_cache.ConnectionDao")
+def test_service_get_city_suggestions_uses_name_index(mock_connection_dao, mock_city_dao):
+    """Test that city suggestions are answered from the in-memory name index."""
+    mock_session = MagicMock(spec=Session)
+    mock_city_and_connection_daos(mock_city_dao, mock_connection_dao)
+
+    suggestions = service_get_city_suggestions(1, mock_session, "rIF")
+
+    assert suggestions == [{"name": "Riften"}]
+    mock_city_dao.get_city_suggestions.assert_not_called()
+
+
+@patch("backend.src.web_backend.web_backend_service.NAME_INDEX_ENABLED", False)
+@patch("backend.src.web_backend.web_backend_service.MAX_CITY_SUGGESTIONS", 5)
+@patch("backend.src.web_backend.web_backend_service.CityDao")
+def test_service_get_city_suggestions_database_fallback(mock_city_dao):
+    """Test that city suggestions use the DAO when the in-memory index is disabled."""
+    mock_session = MagicMock(spec=Session)
+    mock_city_dao.get_city_suggestions.return_value = [
+        create_mock_city("Riften", 300, 400, 1, city_id=2)
+    ]
+
+    suggestions = service_get_city_suggestions(1, mock_session, "rif")
+
+    assert suggestions == [{"name": "Riften"}]
+    mock_city_dao.get_city_suggestions.assert_called_once_with(mock_session, 1, "rif", 5)
+
+
+@patch("backend.src.web_backend.map_topology_cache.CityDao")
+@patch("backend.src.web_backend.map_topology_cache.ConnectionDao")
+def test_service_get_viewport_uses_spatial_index(mock_connection_dao, mock_city_dao):
+    """Test that viewport queries are answered from the spatial index."""
+    mock_session = MagicMock(spec=Session)
+    mock_city_and_connection_daos(mock_city_dao, mock_connection_dao)
+
+    viewport = service_get_viewport(1, (0, 0, 200, 300), mock_session)
+    cities = service_get_cities_data(1, mock_session, (250, 350, 350, 450))
+
+    assert [city["name"] for city in viewport["cities"]] == ["Markarth"]
+    assert [city["name"] for city in viewport["neighbours"]] == ["Riften"]
+    assert viewport["connections"] == [{"parent_city_id": 1, "child_city_id": 2}]
+    assert not viewport["truncated"]
+    assert cities == [{"name": "Riften", "position_x": 300, "position_y": 400}]
+    mock_city_dao.get_cities_in_bbox.assert_not_called()
+
+
+@patch("backend.src.web_backend.web_backend_service.SPATIAL_INDEX_ENABLED", False)
+@patch("backend.src.web_backend.web_backend_service.MAX_VIEWPORT_CITIES", 1)
+@patch("backend.src.web_backend.web_backend_service.CityDao")
+@patch("backend.src.web_backend.web_backend_service.ConnectionDao")
+def test_service_get_viewport_database_fallback(mock_connection_dao, mock_city_dao):
+    """Test that viewport queries use the DAOs when the in-memory index is disabled."""
+    mock_session = MagicMock(spec=Session)
+    markarth = create_mock_city("Markarth", 100, 200, 1, city_id=1)
+    riften = create_mock_city("Riften", 300, 400, 1, city_id=2)
+    mock_city_dao.get_cities_in_bbox.return_value = [markarth, riften]
+    mock_city_dao.get_cities_by_ids.return_value = [riften]
+    mock_connection_dao.get_connections_of_cities.return_value = [create_mock_connection(1, 2)]
+
+    viewport = service_get_viewport(1, (0, 0, 500, 500), mock_session)
+
+    assert [city["name"] for city in viewport["cities"]] == ["Markarth"]
+    assert [city["name"] for city in viewport["neighbours"]] == ["Riften"]
+    assert viewport["truncated"]
+    mock_city_dao.get_cities_in_bbox.assert_called_once_with(
+        1, (0, 0, 500, 500), mock_session, limit=2
+    )
+    mock_city_dao.get_cities_by_ids.assert_called_once_with({2}, mock_session)
+
+
+@patch("backend.src.web_backend.map_topology_cache.MapDao")
+@patch("backend.src.web_backend.map_topology_cache.CityDao")
+@patch("backend.src.web_backend.map_topology_cache.ConnectionDao")
+def test_service_get_map_lod(mock_connection_dao, mock_city_dao, mock_map_dao):
+    """Test that zoom levels are built once per map and reused."""
+    mock_session = MagicMock(spec=Session)
+    mock_city_and_connection_daos(mock_city_dao, mock_connection_dao)
+    mock_map_version(mock_map_dao, 1)
+
+    coarsest = service_get_map_lod(1, 0, mock_session)
+    finest = service_get_map_lod(1, 3, mock_session)
+
+    assert [cluster["name"] for cluster in coarsest["clusters"]] == ["Markarth", "Riften"]
+    assert coarsest["connections"] == [{"parent_cluster_id": 0, "child_cluster_id": 1, "count": 1}]
+    assert finest["zoom"] == 3
+    mock_city_dao.get_cities_by_map_id.assert_called_once()
+    with pytest.raises(ValueError):
+        service_get_map_lod(1, 4, mock_session)
+
+
+@patch("backend.src.web_backend.map_topology_cache.MapDao")
+@patch("backend.src.web_backend.map_topology_cache.CityDao")
+@patch("backend.src.web_backend.map_topology_cache.ConnectionDao")
+def test_service_get_map_lod_map_not_found(mock_connection_dao, mock_city_dao, mock_map_dao):
+    """Test that zoom levels of unknown maps are reported as missing."""
+    mock_city_dao.get_cities_by_map_id.return_value = []
+    mock_connection_dao.get_connections_by_map_id.return_value = []
+    mock_map_dao.get_map_by_id.return_value = None
+
+    assert service_get_map_lod(42, 0, MagicMock(spec=Session)) is None
+
+
+@patch("backend.src.web_backend.web_backend_service.MapDao")
+@patch("backend.src.web_backend.map_topology_cache.MapDao")
+@patch("backend.src.web_backend.map_topology_cache.CityDao")
+@patch("backend.src.web_backend.map_topology_cache.ConnectionDao")
+def test_service_get_map_etag(
+    mock_connection_dao, mock_city_dao, mock_map_dao, mock_service_map_dao
+):
+    """Test the ETag of a map follows its content and is the same by id and by name."""
+    mock_session = MagicMock(spec=Session)
+    mock_city_and_connection_daos(mock_city_dao, mock_connection_dao)
+    mock_map_version(mock_map_dao, 1)
+    mock_service_map_dao.get_map_by_name.return_value.id = 1
+
+    etag = service_get_map_etag(1, mock_session)
+    assert etag == service_get_map_etag_by_name("Skyrim", mock_session)
+
+    map_topology_cache.invalidate(1)
+    mock_city_dao.get_cities_by_map_id.return_value = [create_mock_city("Falkreath", 1, 2, 1, 1)]
+    assert service_get_map_etag(1, mock_session) != etag
+
+    mock_service_map_dao.get_map_by_name.return_value = None
+    assert service_get_map_etag_by_name("Unknown", mock_session) is None
+
+
+@patch("backend.src.web_backend.web_backend_service.MapDao")
+@patch("backend.src.web_backend.web_backend_service.CityDao")
+@patch("backend.src.web_backend.web_backend_service.ConnectionDao")
+def test_service_export_map(mock_connection_dao, mock_city_dao, mock_map_dao):
+    """Test the NDJSON export is written in chunks of batch_size lines."""
+    mock_session = MagicMock(spec=Session)
+    mock_map_dao.get_map_by_id.return_value.to_dict.return_value = {"id": 1, "name": "Skyrim"}
+    city = namedtuple("CityRow", ["id", "name", "position_x", "position_y"])
+    connection = namedtuple("ConnectionRow", ["parent_city_id", "child_city_id"])
+    mock_city_dao.stream_cities_by_map_id.return_value = iter(
+        [city(1, "Markarth", 100, 200), city(2, "Riften", 300, 400)]
+    )
+    mock_connection_dao.stream_connections_by_map_id.return_value = iter([connection(1, 2)])
+
+    chunks = list(service_export_map(1, mock_session, batch_size=2))
+
+    assert len(chunks) == 3
+    records = [json.loads(line) for line in "".join(chunks).splitlines()]
+    assert records == [
+        {"type": "map", "id": 1, "name": "Skyrim"},
+        {"type": "city", "id": 1, "name": "Markarth", "position_x": 100, "position_y": 200},
+        {"type": "city", "id": 2, "name": "Riften", "position_x": 300, "position_y": 400},
+        {"type": "connection", "parent_city_id": 1, "child_city_id": 2},
+    ]
+    mock_city_dao.stream_cities_by_map_id.assert_called_once_with(1, mock_session, 2)
+
+    mock_map_dao.get_map_by_id.return_value = None
+    assert not list(service_export_map(42, mock_session))
@@ -0,0 +1,96 @@
+"""
+Helpers for conditional GET requests (ETag / If-None-Match), Cache-Control headers and
+pre-compressed response bodies (Accept-Encoding)
+"""
+
+import gzip
+import os
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, responses are gzip compressed without it
+    brotli = None
+
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+# supported content codings, most preferred first
+ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+
+
+def cache_control(max_age: int = 0) -> str:
+    """
+    Cache-Control value for public responses.
+
+    Without max_age clients may store the response but have to revalidate it (If-None-Match)
+    before every use.
+    """
+    return f"public, max-age={max_age}" if max_age else "public, no-cache"
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """ETag of a compressed representation, every content coding needs its own strong ETag"""
+    return etag if encoding == "identity" else f"{etag}-{encoding}"
+
+
+def is_not_modified(etag) -> bool:
+    """whether the client already has a representation with this ETag, in any content coding"""
+    return etag is not None and any(
+        request.if_none_match.contains(encoded_etag(etag, encoding))
+        for encoding in ("identity", *ENCODINGS)
+    )
+
+
+def not_modified(etag: str, max_age: int = 0, encoding: str = "identity") -> Response:
+    """empty 304 response confirming the client's cached representation"""
+    response = Response(status=304)
+    response.set_etag(encoded_etag(etag, encoding))
+    response.headers["Cache-Control"] = cache_control(max_age)
+    if encoding != "identity":
+        response.vary.add("Accept-Encoding")
+    return response
+
+
+def with_cache_headers(response: Response, etag, max_age: int = 0) -> Response:
+    """
+    add ETag and Cache-Control to a successful response, without ETag Cache-Control is only
+    added for a max_age
+    """
+    if etag is not None:
+        response.set_etag(etag)
+    if etag is not None or max_age:
+        response.headers["Cache-Control"] = cache_control(max_age)
+    return response
+
+
+def negotiate_encoding() -> str:
+    """the supported content coding the client accepts with the highest quality, or identity"""
+    accepted = [
+        (request.accept_encodings.quality(encoding), -rank, encoding)
+        for rank, encoding in enumerate(ENCODINGS)
+    ]
+    quality, _, encoding = max(accepted)
+    return encoding if quality > 0 else "identity"
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """compress data with one of ENCODINGS"""
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        # a fixed mtime keeps the output, and with it Content-Length, deterministic
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported content coding: {encoding}")
+
+
+def encoded_response(
+    body: bytes, etag: str, encoding: str = "identity", max_age: int = 0
+) -> Response:
+    """JSON response with an already serialized (and compressed) body"""
+    response = Response(body, mimetype="application/json")
+    if encoding != "identity":
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return with_cache_headers(response, encoded_etag(etag, encoding), max_age)
@@ -0,0 +1,117 @@
+"""
+Level-of-detail hierarchy of clustered cities for zoomed-out map views.
+
+Every zoom level lays a square grid over the map, all cities in one grid cell are aggregated into a
+cluster and the connections between clusters are merged into one weighted connection per cluster
+pair. The grid of zoom level z + 1 splits every cell of level z into four, so the levels form a
+hierarchy and every cluster is fully contained in one cluster of each coarser level.
+
+The number of clusters per level is bounded by its number of grid cells (BASE_CELLS * 2^zoom per
+axis), independent of the number of cities on the map.
+"""
+
+from collections import Counter, defaultdict
+
+# number of grid cells per axis on zoom level 0
+BASE_CELLS = 8
+LEVEL_COUNT = 4
+
+
+def _cluster_level(cities: list[dict], connections: list[dict], origin, cell_size, zoom) -> dict:
+    """aggregate the cities of every grid cell of one zoom level"""
+    origin_x, origin_y = origin
+    # cities on the far edge of the map belong to the last cell
+    last_cell = BASE_CELLS * 2**zoom - 1
+    members = defaultdict(list)
+    for city in cities:
+        cell_x = min(int((city["position_x"] - origin_x) // cell_size), last_cell)
+        cell_y = min(int((city["position_y"] - origin_y) // cell_size), last_cell)
+        members[(cell_x, cell_y)].append(city)
+
+    clusters = []
+    cluster_of_city = {}
+    for cluster_id, cell in enumerate(sorted(members)):
+        for city in members[cell]:
+            cluster_of_city[city["id"]] = cluster_id
+        clusters.append(_cluster(cluster_id, members[cell]))
+
+    return {
+        "zoom": zoom,
+        "cell_size": round(cell_size, 2),
+        "clusters": clusters,
+        "connections": _cluster_connections(connections, cluster_of_city),
+    }
+
+
+def _cluster(cluster_id: int, cell_cities: list[dict]) -> dict:
+    """the cluster of the cities of one grid cell, at their center of mass"""
+    x = sum(city["position_x"] for city in cell_cities) / len(cell_cities)
+    y = sum(city["position_y"] for city in cell_cities) / len(cell_cities)
+    # the city closest to the center of mass names the cluster
+    representative = min(
+        cell_cities,
+        key=lambda city: (city["position_x"] - x) ** 2 + (city["position_y"] - y) ** 2,
+    )
+    return {
+        "id": cluster_id,
+        "name": representative["name"],
+        "city_id": representative["id"],
+        "count": len(cell_cities),
+        "position_x": round(x, 2),
+        "position_y": round(y, 2),
+        "bbox": [
+            min(city["position_x"] for city in cell_cities),
+            min(city["position_y"] for city in cell_cities),
+            max(city["position_x"] for city in cell_cities),
+            max(city["position_y"] for city in cell_cities),
+        ],
+    }
+
+
+def _cluster_connections(connections: list[dict], cluster_of_city: dict) -> list[dict]:
+    """the connections between clusters, merged into one per cluster pair with their count"""
+    weights = Counter()
+    for connection in connections:
+        first = cluster_of_city.get(connection["parent_city_id"])
+        second = cluster_of_city.get(connection["child_city_id"])
+        # connections inside a cluster are not visible at this zoom level
+        if first is not None and second is not None and first != second:
+            weights[(min(first, second), max(first, second))] += 1
+    return [
+        {"parent_cluster_id": first, "child_cluster_id": second, "count": count}
+        for (first, second), count in sorted(weights.items())
+    ]
+
+
+def build_lod_levels(
+    cities: list[dict], connections: list[dict], level_count: int = LEVEL_COUNT
+) -> list[dict]:
+    """
+    Build the clustered zoom levels 0 (coarsest) to level_count - 1 of a map.
+
+    cities are dicts as returned by City.to_dict, connections
+    {"parent_city_id", "child_city_id"} dicts.
+    """
+    if not cities:
+        return [
+            {"zoom": zoom, "cell_size": 0, "clusters": [], "connections": []}
+            for zoom in range(level_count)
+        ]
+
+    origin_x = min(city["position_x"] for city in cities)
+    origin_y = min(city["position_y"] for city in cities)
+    extent = max(
+        max(city["position_x"] for city in cities) - origin_x,
+        max(city["position_y"] for city in cities) - origin_y,
+        1,
+    )
+    return [
+        _cluster_level(
+            cities,
+            connections,
+            (origin_x, origin_y),
+            extent / (BASE_CELLS * 2**zoom),
+            zoom,
+        )
+        for zoom in range(level_count)
+    ]
@@ -0,0 +1,88 @@
+"""
+In-memory index for ranked, case-insensitive autocomplete over names.
+
+Names are numbered in rank order (shorter names first, then alphabetically), so every lookup can
+stop as soon as enough names are found:
+
+- names of one length form a sorted run, names starting with the query are found with one binary
+  search per length,
+- names containing the query elsewhere are found through posting lists of trigrams, which are in
+  rank order as well; queries shorter than a trigram scan the names in rank order.
+"""
+
+import bisect
+from collections import defaultdict
+
+GRAM_SIZE = 3
+
+
+def _trigrams(text: str) -> set[str]:
+    """all substrings of length GRAM_SIZE"""
+    return {text[i : i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+def rank_key(name: str) -> tuple:
+    """order of suggestions within the prefix and the substring matches: short names first"""
+    lowered = name.lower()
+    return len(lowered), lowered, name
+
+
+class NameIndex:
+    """Autocomplete index over a list of names, results are names in ranked order"""
+
+    def __init__(self, names):
+        self.names = sorted(names, key=rank_key)
+        self.lowered = [name.lower() for name in self.names]
+        # name length -> (first, last + 1) position of the names of that length
+        self.runs = {}
+        self.postings = defaultdict(list)
+        for index, name in enumerate(self.lowered):
+            first, _ = self.runs.get(len(name), (index, index))
+            self.runs[len(name)] = (first, index + 1)
+            for gram in _trigrams(name):
+                self.postings[gram].append(index)
+        self.lengths = sorted(self.runs)
+
+    def __len__(self):
+        return len(self.names)
+
+    def suggest(self, query: str, limit: int = 10) -> list[str]:
+        """
+        Return up to limit names containing query (ignoring case): names starting with query
+        first, then names containing it elsewhere, each group in rank_key order.
+        """
+        query = query.lower()
+        if not query or limit < 1:
+            return []
+
+        found = self._prefix_matches(query, limit)
+        if len(found) < limit:
+            # all prefix matches were found, they are not repeated
+            prefixed = set(found)
+            for index in self._substring_candidates(query):
+                if index not in prefixed and query in self.lowered[index]:
+                    found.append(index)
+                    if len(found) == limit:
+                        break
+        return [self.names[index] for index in found]
+
+    def _prefix_matches(self, query: str, limit: int) -> list[int]:
+        """positions of up to limit names starting with query, in rank order"""
+        found = []
+        for length in self.lengths[bisect.bisect_left(self.lengths, len(query)) :]:
+            first, end = self.runs[length]
+            position = bisect.bisect_left(self.lowered, query, first, end)
+            while position < end and self.lowered[position].startswith(query):
+                found.append(position)
+                if len(found) == limit:
+                    return found
+                position += 1
+        return found
+
+    def _substring_candidates(self, query: str):
+        """positions in rank order of the names that may contain query"""
+        grams = _trigrams(query)
+        if not grams:
+            return range(len(self.names))
+        # every match contains the rarest trigram of the query
+        return min((self.postings.get(gram, ()) for gram in grams), key=len)
@@ -0,0 +1,41 @@
+"""
+Opaque cursors for keyset pagination.
+
+A cursor carries the sort order and the keyset (sort value, id) of the last item of a page as
+url-safe base64 encoded JSON. Clients pass it back unchanged to get the next page.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+
+
+def encode_cursor(field: str, descending: bool, keyset: tuple) -> str:
+    """cursor for the page after keyset in the order given by field and descending"""
+    value, item_id = keyset
+    if isinstance(value, datetime):
+        value = {"datetime": value.isoformat()}
+    payload = json.dumps({"f": field, "d": descending, "v": value, "id": item_id})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, field: str, descending: bool) -> tuple:
+    """
+    Keyset of a cursor created with encode_cursor. Raises ValueError for malformed cursors and
+    cursors of a different sort order.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        value, item_id = payload["v"], payload["id"]
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value["datetime"])
+        order = payload["f"], payload["d"]
+    except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError) as e:
+        raise ValueError("Malformed cursor") from e
+    if order != (field, descending):
+        raise ValueError("The cursor belongs to a different sort order")
+    if not isinstance(item_id, int):
+        raise ValueError("Malformed cursor")
+    return value, item_id
@@ -0,0 +1,203 @@
+"""
+Uniform grid spatial index over 2D points.
+
+Points are bucketed into square cells of roughly two points each, so nearest-neighbour lookups only
+have to look at a few cells around the query position, independent of the number of points.
+"""
+
+import heapq
+import math
+from collections import defaultdict
+
+
+class GridIndex:
+    """Spatial index over a list of (x, y) points, results refer to the position in that list"""
+
+    def __init__(self, points, cell_size: float = None):
+        self.points = points
+        self.cell_size = cell_size or self._default_cell_size(points)
+        self.cells = defaultdict(list)
+        for index, (x, y) in enumerate(points):
+            self.cells[self._cell_of(x, y)].append(index)
+
+        if self.cells:
+            self.min_cell_x = min(cell_x for cell_x, _ in self.cells)
+            self.max_cell_x = max(cell_x for cell_x, _ in self.cells)
+            self.min_cell_y = min(cell_y for _, cell_y in self.cells)
+            self.max_cell_y = max(cell_y for _, cell_y in self.cells)
+
+    @staticmethod
+    def _default_cell_size(points) -> float:
+        """cell size for about two points per cell on average"""
+        if len(points) < 2:
+            return 1.0
+        width = max(x for x, _ in points) - min(x for x, _ in points)
+        height = max(y for _, y in points) - min(y for _, y in points)
+        return max(1.0, math.sqrt(max(width, 1) * max(height, 1) / (len(points) / 2)))
+
+    def __len__(self):
+        return len(self.points)
+
+    def _cell_of(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def _ring(self, cell_x, cell_y, radius):
+        """yield all points in the cells at chebyshev distance `radius`"""
+        if radius == 0:
+            yield from self.cells.get((cell_x, cell_y), ())
+            return
+        for dx in range(-radius, radius + 1):
+            for dy in (-radius, radius):
+                yield from self.cells.get((cell_x + dx, cell_y + dy), ())
+        for dy in range(-radius + 1, radius):
+            for dx in (-radius, radius):
+                yield from self.cells.get((cell_x + dx, cell_y + dy), ())
+
+    def _box_distance(self, x, y, first_cell, last_cell):
+        """squared distance from (x, y) to the area of the cells from first_cell to last_cell"""
+        dx = max(first_cell[0] * self.cell_size - x, 0, x - (last_cell[0] + 1) * self.cell_size)
+        dy = max(first_cell[1] * self.cell_size - y, 0, y - (last_cell[1] + 1) * self.cell_size)
+        return dx * dx + dy * dy
+
+    def _unsearched_distance(self, x, y, cell_x, cell_y, radius):
+        """
+        lower bound of the squared distance from (x, y) to the occupied cells that are farther
+        than `radius` from (cell_x, cell_y), infinite if there are none
+        """
+        low, high = (self.min_cell_x, self.min_cell_y), (self.max_cell_x, self.max_cell_y)
+        # the occupied cells outside the searched square lie in these strips
+        strips = [
+            ((low[0], low[1]), (cell_x - radius - 1, high[1])),
+            ((cell_x + radius + 1, low[1]), (high[0], high[1])),
+            ((low[0], low[1]), (high[0], cell_y - radius - 1)),
+            ((low[0], cell_y + radius + 1), (high[0], high[1])),
+        ]
+        return min(
+            (
+                self._box_distance(x, y, first, last)
+                for first, last in strips
+                if first[0] <= last[0] and first[1] <= last[1]
+            ),
+            default=math.inf,
+        )
+
+    def nearest(self, x, y, k: int = 1, accept=None):
+        """
+        Return up to k (squared distance, point index) pairs closest to (x, y), nearest first.
+
+        accept: optional predicate on the point index, rejected points are skipped.
+        """
+        if not self.cells or k < 1:
+            return []
+
+        # the rings are walked around the occupied cell closest to (x, y), so far away query
+        # positions cost no more than positions on the map
+        cell_x, cell_y = self._cell_of(x, y)
+        cell_x = min(max(cell_x, self.min_cell_x), self.max_cell_x)
+        cell_y = min(max(cell_y, self.min_cell_y), self.max_cell_y)
+        last_radius = max(
+            cell_x - self.min_cell_x,
+            self.max_cell_x - cell_x,
+            cell_y - self.min_cell_y,
+            self.max_cell_y - cell_y,
+        )
+
+        candidates = []
+        for radius in range(last_radius + 1):
+            for index in self._ring(cell_x, cell_y, radius):
+                if accept and not accept(index):
+                    continue
+                point_x, point_y = self.points[index]
+                # products instead of powers, they overflow to inf for huge coordinates
+                dx, dy = point_x - x, point_y - y
+                candidates.append((dx * dx + dy * dy, index))
+            if len(candidates) >= k:
+                best = heapq.nsmallest(k, candidates)
+                if best[-1][0] <= self._unsearched_distance(x, y, cell_x, cell_y, radius):
+                    return best
+        return heapq.nsmallest(k, candidates)
+
+    def within(self, min_x, min_y, max_x, max_y):
+        """Return the indices of all points inside the bounding box (bounds inclusive)"""
+        if not self.cells:
+            return []
+
+        first_x, first_y = self._cell_of(min_x, min_y)
+        last_x, last_y = self._cell_of(max_x, max_y)
+        # only visit cells that can be occupied, huge viewports cost no more than the whole map
+        first_x, first_y = max(first_x, self.min_cell_x), max(first_y, self.min_cell_y)
+        last_x, last_y = min(last_x, self.max_cell_x), min(last_y, self.max_cell_y)
+
+        found = []
+        for cell_x in range(first_x, last_x + 1):
+            for cell_y in range(first_y, last_y + 1):
+                for index in self.cells.get((cell_x, cell_y), ()):
+                    x, y = self.points[index]
+                    if min_x <= x <= max_x and min_y <= y <= max_y:
+                        found.append(index)
+        return found
+
+
+class CitySpatialIndex:
+    """
+    Spatial index over the cities of one map, cities are dicts as returned by City.to_dict.
+
+    connections ({"parent_city_id", "child_city_id"} dicts) are only needed for viewport queries.
+    """
+
+    def __init__(self, cities: list[dict], connections: list[dict] = None):
+        self.cities = cities
+        self.grid = GridIndex([(city["position_x"], city["position_y"]) for city in cities])
+        self.connections = connections or []
+        self.positions = {city["id"]: index for index, city in enumerate(cities)}
+        self.connections_of = defaultdict(list)
+        for connection in self.connections:
+            self.connections_of[connection["parent_city_id"]].append(connection)
+            self.connections_of[connection["child_city_id"]].append(connection)
+
+    def __len__(self):
+        return len(self.cities)
+
+    def nearest_cities(self, x, y, k: int = 1) -> list[dict]:
+        """Return the k cities closest to (x, y) with their distance, nearest first"""
+        return [
+            {**self.cities[index], "distance": round(math.sqrt(squared_distance), 2)}
+            for squared_distance, index in self.grid.nearest(x, y, k)
+        ]
+
+    def viewport(self, min_x, min_y, max_x, max_y, limit: int = None) -> dict:
+        """
+        Return the cities inside the bounding box and all connections touching them.
+
+        Cities outside the box that are the other end of such a connection are returned as
+        "neighbours", so the connections can be drawn up to the edge of the viewport.
+        At most `limit` cities are returned, "truncated" tells if cities were left out.
+        """
+        indices = sorted(self.grid.within(min_x, min_y, max_x, max_y))
+        truncated = limit is not None and len(indices) > limit
+        cities = [self.cities[index] for index in indices[:limit]]
+        inside = {city["id"] for city in cities}
+
+        connections = []
+        neighbour_ids = set()
+        for city in cities:
+            for connection in self.connections_of[city["id"]]:
+                parent_id, child_id = connection["parent_city_id"], connection["child_city_id"]
+                other_id = child_id if parent_id == city["id"] else parent_id
+                # connections between two visible cities are reached from both ends
+                if other_id in inside and other_id < city["id"]:
+                    continue
+                connections.append(connection)
+                if other_id not in inside:
+                    neighbour_ids.add(other_id)
+
+        return {
+            "cities": cities,
+            "neighbours": [
+                self.cities[self.positions[city_id]]
+                for city_id in sorted(neighbour_ids)
+                if city_id in self.positions
+            ],
+            "connections": connections,
+            "truncated": truncated,
+        }
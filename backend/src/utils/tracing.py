@@ -18,7 +18,7 @@ from opentelemetry.sdk.trace.export import BatchSpanProcessor
 from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
 from opentelemetry.trace.status import StatusCode
 
-from backend.src.database.db_connection import DatabaseConnection
+from backend.src.database.db_connection import get_engine
 from backend.src.utils.helpers import get_logging_configuration
 
 logger = get_logging_configuration()
@@ -59,7 +59,7 @@ def setup_tracing(service_name: str, instrument_db: bool = False):
     RequestsInstrumentor().instrument()
 
     if instrument_db:
-        engine = DatabaseConnection().get_engine()
+        engine = get_engine()
         SQLAlchemyInstrumentor().instrument(engine=engine)
 
     # Instrument gRPC
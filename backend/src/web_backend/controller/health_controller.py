@@ -3,18 +3,23 @@
 from flask import jsonify
 from opentelemetry.trace import get_tracer
 
-from backend.src.health.health_check import check_all_criteria
+from backend.src.health.health_check import check_all_criteria, check_database_connection
+from backend.src.map_service.map_bootstrap import bootstrap_progress
 from backend.src.utils.helpers import get_logging_configuration
 
 logger = get_logging_configuration()
 tracer = get_tracer("health-controller")
 
 HEALTHZ = "/healthz"
+HEALTHZ_LIVE = "/healthz/live"
+HEALTHZ_READY = "/healthz/ready"
 
 
 def init_health_routes(app):
     """Initialize all routes for the Flask app."""
     app.route(HEALTHZ, methods=["GET"])(health_check)
+    app.route(HEALTHZ_LIVE, methods=["GET"])(liveness_check)
+    app.route(HEALTHZ_READY, methods=["GET"])(readiness_check)
 
 
 def health_check():
@@ -29,3 +34,32 @@ def health_check():
 
         logger.error("Some criteria failed")
         return jsonify({"status": "unhealthy", "details": criteria_status}), 503
+
+
+def liveness_check():
+    """
+    The process is up and answers requests, dependencies are not checked. A map bootstrap that
+    failed for good fails the check, so the backend gets restarted.
+    """
+    bootstrap = bootstrap_progress.snapshot()
+    if bootstrap["status"] == "failed":
+        logger.error("Not alive, map bootstrap failed: %s", bootstrap["error"])
+        return jsonify({"status": "failed", "details": {"bootstrap": bootstrap}}), 503
+    return jsonify({"status": "alive"}), 200
+
+
+def readiness_check():
+    """Checks that the maps are bootstrapped and the database is reachable."""
+    with tracer.start_as_current_span("readiness_check") as span:
+        bootstrap = bootstrap_progress.snapshot()
+        database = check_database_connection()
+        ready = bootstrap["status"] == "ready" and database["database_connection"] is True
+        span.set_attribute("ready", ready)
+        span.set_attribute("bootstrap_status", bootstrap["status"])
+
+        details = {"bootstrap": bootstrap, **database}
+        if ready:
+            return jsonify({"status": "ready", "details": details}), 200
+
+        logger.info("Not ready, map bootstrap %s.", bootstrap["status"])
+        return jsonify({"status": "not ready", "details": details}), 503
@@ -1,18 +1,41 @@
 """Flask Controller to expose endpoints related to maps"""
 
-from flask import request, jsonify
+import gzip
+import json
+import math
+import os
+from itertools import chain
+
+from flask import Response, request, jsonify
 from opentelemetry.trace import get_tracer, StatusCode
 from requests.exceptions import RequestException
 from sqlalchemy.exc import SQLAlchemyError
 
 from backend.src.database.db_connection import get_db_session
+from backend.src.map_service.map_file_import import FORMATS, MapExistsError, MapFileError
 from backend.src.utils.helpers import get_logging_configuration
+from backend.src.utils.http_caching import (
+    encoded_response,
+    is_not_modified,
+    negotiate_encoding,
+    not_modified,
+    with_cache_headers,
+)
 from backend.src.utils.tracing import set_span_error_flags
 from backend.src.web_backend.web_backend_service import (
     service_get_cities_data,
     service_get_map_data_by_name,
+    service_get_encoded_map_data_by_name,
     service_get_maps,
     service_get_city_suggestions,
+    service_get_map_components,
+    service_get_nearest_cities,
+    service_get_viewport,
+    service_get_map_lod,
+    service_get_map_etag,
+    service_get_map_etag_by_name,
+    service_export_map,
+    service_import_map_file,
 )
 
 logger = get_logging_configuration()
@@ -21,6 +44,15 @@ tracer = get_tracer("map-controller")
 MAPS = "/maps"
 CITIES = "/cities"
 SUGGESTIONS = "/suggestions/maps/<int:map_id>"
+MAP_COMPONENTS = "/maps/<int:map_id>/components"
+NEAREST_CITIES = "/maps/<int:map_id>/cities/nearest"
+VIEWPORT = "/maps/<int:map_id>/viewport"
+MAP_LOD = "/maps/<int:map_id>/lod/<int:zoom>"
+MAP_EXPORT = "/maps/<int:map_id>/export"
+MAP_IMPORT = "/maps/import"
+
+# zoom levels only change when the map is re-imported, so clients and proxies may cache them
+LOD_CACHE_MAX_AGE = int(os.getenv("LOD_CACHE_MAX_AGE", "300"))
 
 
 def init_map_routes(app):
@@ -28,6 +60,12 @@ def init_map_routes(app):
     app.route(MAPS, methods=["GET"])(get_maps)
     app.route(CITIES, methods=["GET"])(get_cities)
     app.route(SUGGESTIONS, methods=["GET"])(get_city_suggestions_while_input)
+    app.route(MAP_COMPONENTS, methods=["GET"])(get_map_components)
+    app.route(NEAREST_CITIES, methods=["GET"])(get_nearest_cities)
+    app.route(VIEWPORT, methods=["GET"])(get_viewport)
+    app.route(MAP_LOD, methods=["GET"])(get_map_lod)
+    app.route(MAP_EXPORT, methods=["GET"])(get_map_export)
+    app.route(MAP_IMPORT, methods=["POST"])(import_map)
 
 
 def get_maps():
@@ -41,15 +79,28 @@ def get_maps():
 
             if map_name:
                 logger.info("Fetching map data for map name: %s", map_name)
+                encoding = negotiate_encoding()
                 with get_db_session() as session:
-                    map_data, cities_data, connections_data = service_get_map_data_by_name(
-                        map_name, session
-                    )
+                    etag = service_get_map_etag_by_name(map_name, session)
+                    if is_not_modified(etag):
+                        logger.info("Map %s not modified.", map_name)
+                        return not_modified(etag, encoding=encoding)
+                    if etag is None:
+                        map_data, cities_data, connections_data = service_get_map_data_by_name(
+                            map_name, session
+                        )
+                        return jsonify(
+                            {
+                                "map": map_data,
+                                "cities": cities_data,
+                                "connections": connections_data,
+                            }
+                        )
+                    # serialized and compressed once per map content
+                    body = service_get_encoded_map_data_by_name(map_name, etag, session)
 
                 logger.info("Map data fetched successfully for map name: %s", map_name)
-                return jsonify(
-                    {"map": map_data, "cities": cities_data, "connections": connections_data}
-                )
+                return encoded_response(body.get(encoding), etag, encoding)
 
             logger.info("Fetching all map names.")
             with get_db_session() as session:
@@ -77,12 +128,21 @@ def get_cities():
                 logger.error("Invalid map ID provided: %s", map_id)
                 return jsonify({"error": "Map ID must be an integer"}), 400
 
+            try:
+                bbox = parse_bbox(request.args)
+            except ValueError as e:
+                logger.error("Invalid bounding box for cities query: %s", request.args)
+                return jsonify({"error": str(e)}), 400
+
             logger.info("Fetching cities data for map ID: %s", map_id)
             with get_db_session() as session:
-                cities = service_get_cities_data(map_id, session)
+                etag = service_get_map_etag(map_id, session)
+                if is_not_modified(etag):
+                    return not_modified(etag)
+                cities = service_get_cities_data(map_id, session, bbox)
 
             logger.info("Cities data fetched successfully for map ID: %s", map_id)
-            return jsonify({"cities": cities})
+            return with_cache_headers(jsonify({"cities": cities}), etag)
 
         except (SQLAlchemyError, RequestException) as specific_error:
             logger.error("Error fetching cities data: %s", specific_error)
@@ -111,3 +171,223 @@ def get_city_suggestions_while_input(map_id):
             span.set_status(StatusCode.ERROR)
             span.record_exception(specific_error)
             return jsonify({"error": "Internal server error"}), 500
+
+
+def get_map_components(map_id):
+    """Fetch and return the connected components of a map for data quality checks."""
+    with tracer.start_as_current_span("get_map_components") as span:
+        span.set_attribute("map_id", map_id)
+        try:
+            with get_db_session() as session:
+                etag = service_get_map_etag(map_id, session)
+                if is_not_modified(etag):
+                    return not_modified(etag)
+                components = service_get_map_components(map_id, session)
+
+            if components is None:
+                logger.error("Map with id %s not found.", map_id)
+                return jsonify({"error": "Map not found"}), 404
+
+            span.set_attribute("component_count", components["component_count"])
+            if components["component_count"] > 1:
+                logger.warning(
+                    "Map %s consists of %s disconnected components.",
+                    map_id,
+                    components["component_count"],
+                )
+            return with_cache_headers(jsonify({"map_id": map_id, **components}), etag)
+
+        except SQLAlchemyError as specific_error:
+            logger.error("Error fetching map components: %s", specific_error)
+            set_span_error_flags(span, specific_error)
+            return jsonify({"error": "Internal server error"}), 500
+
+
+def get_nearest_cities(map_id):
+    """Fetch and return the cities closest to the coordinates given as query parameters."""
+    with tracer.start_as_current_span("get_nearest_cities") as span:
+        try:
+            try:
+                x = float(request.args["x"])
+                y = float(request.args["y"])
+                k = int(request.args.get("k", 1))
+                if not (math.isfinite(x) and math.isfinite(y)):
+                    raise ValueError("x and y must be finite")
+            except (KeyError, ValueError):
+                logger.error("Invalid coordinates for nearest city lookup: %s", request.args)
+                return (
+                    jsonify({"error": "Finite numeric x and y query parameters are required"}),
+                    400,
+                )
+
+            span.set_attributes({"map_id": map_id, "x": x, "y": y, "k": k})
+            with get_db_session() as session:
+                cities = service_get_nearest_cities(map_id, x, y, k, session)
+
+            return jsonify({"cities": cities})
+
+        except SQLAlchemyError as specific_error:
+            logger.error("Error fetching nearest cities: %s", specific_error)
+            set_span_error_flags(span, specific_error)
+            return jsonify({"error": "Internal server error"}), 500
+
+
+def parse_bbox(args):
+    """
+    Read the bounding box query parameters min_x, min_y, max_x and max_y.
+
+    Returns None if no bounding box was requested, raises ValueError if it is incomplete or invalid.
+    """
+    keys = ("min_x", "min_y", "max_x", "max_y")
+    if not any(key in args for key in keys):
+        return None
+    try:
+        min_x, min_y, max_x, max_y = (float(args[key]) for key in keys)
+    except (KeyError, ValueError) as e:
+        raise ValueError(
+            "Numeric min_x, min_y, max_x and max_y query parameters are required"
+        ) from e
+    if not all(math.isfinite(bound) for bound in (min_x, min_y, max_x, max_y)):
+        raise ValueError("min_x, min_y, max_x and max_y must be finite")
+    if min_x > max_x or min_y > max_y:
+        raise ValueError("min_x and min_y must not be greater than max_x and max_y")
+    return min_x, min_y, max_x, max_y
+
+
+def get_viewport(map_id):
+    """Fetch and return the cities and connections inside a bounding box of a map."""
+    with tracer.start_as_current_span("get_viewport") as span:
+        span.set_attribute("map_id", map_id)
+        try:
+            try:
+                bbox = parse_bbox(request.args)
+                if bbox is None:
+                    raise ValueError(
+                        "Numeric min_x, min_y, max_x and max_y query parameters are required"
+                    )
+            except ValueError as e:
+                logger.error("Invalid bounding box for viewport query: %s", request.args)
+                return jsonify({"error": str(e)}), 400
+
+            with get_db_session() as session:
+                etag = service_get_map_etag(map_id, session)
+                if is_not_modified(etag):
+                    return not_modified(etag)
+                viewport = service_get_viewport(map_id, bbox, session)
+
+            span.set_attribute("city_count", len(viewport["cities"]))
+            if viewport["truncated"]:
+                logger.warning("Viewport %s of map %s was truncated.", bbox, map_id)
+            return with_cache_headers(jsonify({"map_id": map_id, **viewport}), etag)
+
+        except SQLAlchemyError as specific_error:
+            logger.error("Error fetching viewport: %s", specific_error)
+            set_span_error_flags(span, specific_error)
+            return jsonify({"error": "Internal server error"}), 500
+
+
+def get_map_lod(map_id, zoom):
+    """Fetch and return the clustered cities and connections of a map for one zoom level."""
+    with tracer.start_as_current_span("get_map_lod") as span:
+        span.set_attributes({"map_id": map_id, "zoom": zoom})
+        try:
+            with get_db_session() as session:
+                etag = service_get_map_etag(map_id, session)
+                if is_not_modified(etag):
+                    return not_modified(etag, LOD_CACHE_MAX_AGE)
+                level = service_get_map_lod(map_id, zoom, session)
+
+            if level is None:
+                logger.error("Map with id %s not found.", map_id)
+                return jsonify({"error": "Map not found"}), 404
+
+            span.set_attribute("cluster_count", len(level["clusters"]))
+            return with_cache_headers(jsonify({"map_id": map_id, **level}), etag, LOD_CACHE_MAX_AGE)
+
+        except ValueError as e:
+            logger.error("Invalid zoom level %s requested for map %s.", zoom, map_id)
+            return jsonify({"error": str(e)}), 400
+        except SQLAlchemyError as specific_error:
+            logger.error("Error fetching zoom level: %s", specific_error)
+            set_span_error_flags(span, specific_error)
+            return jsonify({"error": "Internal server error"}), 500
+
+
+def get_map_export(map_id):
+    """Stream the map entry, cities and connections of a map as NDJSON."""
+    with tracer.start_as_current_span("get_map_export") as span:
+        span.set_attribute("map_id", map_id)
+        try:
+            chunks = _export_chunks(map_id)
+            # reads the map entry, the rest is streamed after the handler returned
+            first_chunk = next(chunks, None)
+            if first_chunk is None:
+                logger.error("Map with id %s not found.", map_id)
+                return jsonify({"error": "Map not found"}), 404
+
+            logger.info("Streaming export of map %s.", map_id)
+            return Response(
+                chain([first_chunk], chunks),
+                mimetype="application/x-ndjson",
+                headers={"Content-Disposition": f'attachment; filename="map_{map_id}.ndjson"'},
+            )
+
+        except SQLAlchemyError as specific_error:
+            logger.error("Error exporting map: %s", specific_error)
+            set_span_error_flags(span, specific_error)
+            return jsonify({"error": "Internal server error"}), 500
+
+
+def _export_chunks(map_id):
+    """NDJSON chunks of a map export, the database session is held until the last chunk"""
+    with get_db_session() as session:
+        chunks = service_export_map(map_id, session)
+        first_chunk = next(chunks, None)
+        if first_chunk is None:
+            return
+        yield first_chunk
+        try:
+            yield from chunks
+        except SQLAlchemyError as e:
+            # the status code is already sent, a final error line marks the export as incomplete
+            logger.error("Export of map %s aborted: %s", map_id, e)
+            yield json.dumps({"type": "error", "error": "Export aborted"}) + "\n"
+
+
+def import_map():
+    """
+    Import a map file sent as request body, it is streamed into the database in batches.
+    With update=true an existing map is updated to the file, only the differences are written.
+    """
+    with tracer.start_as_current_span("import_map") as span:
+        file_format = request.args.get("format") or (
+            "csv" if request.mimetype == "text/csv" else "json"
+        )
+        if file_format not in FORMATS:
+            logger.error("Unsupported map file format: %s", file_format)
+            return jsonify({"error": f"Format must be one of {', '.join(FORMATS)}"}), 400
+        update = request.args.get("update", "false").lower() == "true"
+        span.set_attribute("format", file_format)
+        span.set_attribute("update", update)
+
+        stream = request.stream
+        if request.content_encoding == "gzip":
+            stream = gzip.GzipFile(fileobj=stream)
+        try:
+            with get_db_session() as session:
+                statistics = service_import_map_file(stream, file_format, session, update)
+
+            logger.info("Map %s imported.", statistics["map_id"])
+            # an update report tells which cities and connections changed
+            return jsonify(statistics), 200 if "changed" in statistics else 201
+
+        except (MapFileError, UnicodeDecodeError, gzip.BadGzipFile, EOFError) as e:
+            logger.error("Invalid map file: %s", e)
+            return jsonify({"error": f"Invalid map file: {e}"}), 400
+        except MapExistsError as e:
+            logger.error("Map import rejected: %s", e)
+            return jsonify({"error": str(e)}), 409
+        except SQLAlchemyError as specific_error:
+            logger.error("Error importing map: %s", specific_error)
+            set_span_error_flags(span, specific_error)
+            return jsonify({"error": "Internal server error"}), 500
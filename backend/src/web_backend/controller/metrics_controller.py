@@ -3,8 +3,13 @@
 from flask import Response
 from opentelemetry.trace import get_tracer
 
+from backend.src.database.db_connection import get_pool_statistics
 from backend.src.utils.helpers import get_logging_configuration
 from backend.src.utils.helpers import metrics_logger, redis_instance
+from backend.src.web_backend.map_response_cache import map_response_cache
+from backend.src.web_backend.map_topology_cache import map_topology_cache
+from backend.src.web_backend.route_history_writer import route_history_writer
+from backend.src.web_backend.route_result_cache import route_result_cache
 
 logger = get_logging_configuration()
 tracer = get_tracer("metrics-controller")
@@ -33,6 +38,19 @@ def metrics():
                 span.record_exception(e)
                 continue
 
+        # the connection pool, map caches, history writer and route cache counters belong to this
+        # process, so they are reported directly
+        for name, value in sorted(get_pool_statistics().items()):
+            metrics_data.append(f"m_db_pool_{name} {value}")
+        for name, value in sorted(map_topology_cache.statistics().items()):
+            metrics_data.append(f"m_map_cache_{name} {value}")
+        for name, value in sorted(map_response_cache.statistics().items()):
+            metrics_data.append(f"m_map_response_cache_{name} {value}")
+        for name, value in sorted(route_history_writer.statistics().items()):
+            metrics_data.append(f"m_route_history_writer_{name} {value}")
+        for name, value in sorted(route_result_cache.statistics().items()):
+            metrics_data.append(f"m_route_cache_{name} {value}")
+
         metrics_output = "\n".join(metrics_data)
         logger.info("Metrics fetched successfully.")
         return Response(metrics_output, mimetype="text/plain")
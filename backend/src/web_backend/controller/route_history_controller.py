@@ -1,24 +1,34 @@
 """This module contains all routes for the Flask app."""
 
-import json
+import math
 import time
 
 from flask import jsonify, request
 from opentelemetry.trace import get_tracer
 
-from backend.src.database.dao.route_dao import RouteDao
+from backend.src.database.dao.route_dao import ROUTE_FIELDS, RouteDao
+from backend.src.database.dao.route_result_dao import RouteResultDao
 from backend.src.database.db_connection import get_db_session
 from backend.src.database.schema.route import Route, RouteFilter, OptionalRouteFilters
 from backend.src.utils.helpers import get_logging_configuration, metrics_logger
+from backend.src.utils.pagination import decode_cursor, encode_cursor
 from backend.src.utils.prometheus_converter import make_prometheus_conform
 from backend.src.utils.tracing import set_span_attributes, set_span_error_flags
+from backend.src.web_backend.route_history_writer import (
+    ROUTE_HISTORY_WRITE_BEHIND,
+    route_history_writer,
+)
 from backend.src.web_backend.web_backend_service import (
     fetch_route_from_navigation_service,
+    service_snap_to_nearest_city,
 )
 
 logger = get_logging_configuration()
 tracer = get_tracer("route-history-controller")
 
+# fields of the route history if the request selects none
+HISTORY_FIELDS = ("id", "startpoint", "endpoint", "route")
+
 # TODO handle map_id or name in the requests
 USER_ROUTES = "/users/<int:user_id>/maps/<int:map_id>/routes"
 USER_ROUTES_HISTORY = "/users/<int:user_id>/routes"
@@ -33,6 +43,7 @@ def init_path_routes(app):
     app.route(USER_ROUTES, methods=["POST"])(calculate_route)
     app.route(ROUTES, methods=["POST"])(calculate_route_without_user)
     app.route(USER_ROUTES_ID, methods=["DELETE"])(delete_route)
+    app.route(USER_ROUTES_ID, methods=["GET"])(get_route)
     app.route(USER_ROUTES_HISTORY, methods=["GET"])(get_user_history)
     app.route(USER_ROUTES_HISTORY_CLEAR_NAME, methods=["DELETE"])(clear_user_history_by_name)
     app.route(USER_ROUTES_HISTORY_CLEAR_ID, methods=["DELETE"])(clear_user_history_by_id)
@@ -74,10 +85,9 @@ def calculate_route(user_id, map_id):
 
         metrics_logger.incr("m_concurrent_requests")
 
-        data = request.get_json()
-        start_city_name = data.get("startpoint")
-        end_city_name = data.get("endpoint")
-
+        start_city_name, end_city_name, error_response = _requested_endpoints(map_id, span)
+        if error_response:
+            return error_response
         key_prefix = make_prometheus_conform(
             f"user_{user_id}_{start_city_name}_{end_city_name}_route"
         )
@@ -108,19 +118,13 @@ def calculate_route(user_id, map_id):
                 return jsonify(route_result), 400
 
             if user_id:
-                route = Route(
-                    user_id=user_id,
-                    map_id=map_id,
-                    startpoint=start_city_name,
-                    endpoint=end_city_name,
-                    route=json.dumps(route_result),
+                key_prefix = _add_to_history(
+                    key_prefix,
+                    user_id,
+                    (map_id, start_city_name, end_city_name),
+                    route_result,
+                    session,
                 )
-                saved_route = RouteDao.save_route(route, session)
-                route_id = saved_route.id
-                key_prefix += f"_{route_id}"
-                metrics_logger.incr(f"m_user_{user_id}_route")
-                metrics_logger.incr(f"m_{key_prefix}_calculated")
-                logger.info("Route calculated and saved successfully for user %d.", user_id)
             else:
                 logger.info("Route calculated successfully without saving to user history.")
 
@@ -146,6 +150,84 @@ def calculate_route(user_id, map_id):
         return jsonify(response_data), 201
 
 
+def _add_to_history(key_prefix, user_id, endpoints, route_result, session) -> str:
+    """
+    Save the calculated route to the history of the user, or queue it with write-behind.
+    Returns the metrics key prefix of the route, with the route id once it is saved.
+    """
+    map_id, start_city_name, end_city_name = endpoints
+    if ROUTE_HISTORY_WRITE_BEHIND:
+        # saved later in a batch with the routes of other requests
+        route_history_writer.submit(user_id, map_id, start_city_name, end_city_name, route_result)
+        logger.info("Route calculated and queued for the history of user %d.", user_id)
+    else:
+        # identical results of all users are stored once
+        stored_result = RouteResultDao.get_or_create_route_result(
+            map_id, start_city_name, end_city_name, route_result, session
+        )
+        route = Route(
+            user_id=user_id,
+            map_id=map_id,
+            startpoint=start_city_name,
+            endpoint=end_city_name,
+            result=stored_result,
+        )
+        key_prefix += f"_{RouteDao.save_route(route, session).id}"
+        logger.info("Route calculated and saved successfully for user %d.", user_id)
+    metrics_logger.incr(f"m_user_{user_id}_route")
+    metrics_logger.incr(f"m_{key_prefix}_calculated")
+    return key_prefix
+
+
+def _requested_endpoints(map_id, span):
+    """start and end city names of the request, or the error response of invalid positions"""
+    try:
+        start_city_name, end_city_name = resolve_route_endpoints(map_id, request.get_json())
+    except ValueError as e:
+        logger.error("Invalid route endpoints: %s", e)
+        metrics_logger.incr("m_error_invalid_position")
+        metrics_logger.decr("m_concurrent_requests")
+        set_span_error_flags(span, e)
+        return None, None, (jsonify({"error": str(e)}), 400)
+    return start_city_name, end_city_name, None
+
+
+def _parse_position(position):
+    """convert a {"x": .., "y": ..} request value into a coordinate tuple"""
+    try:
+        x, y = float(position["x"]), float(position["y"])
+    except (TypeError, KeyError, ValueError) as e:
+        raise ValueError("Positions must be objects with finite numeric x and y values") from e
+    if not (math.isfinite(x) and math.isfinite(y)):
+        raise ValueError("Positions must be objects with finite numeric x and y values")
+    return x, y
+
+
+def resolve_route_endpoints(map_id, data):
+    """
+    Return the start and end city names of a route request.
+
+    Instead of a city name, either endpoint can be given as a position
+    ("start_position" / "end_position": {"x": .., "y": ..}), which is snapped to the
+    nearest city of the map.
+    """
+    return (
+        _resolve_endpoint(map_id, data, "startpoint", "start_position"),
+        _resolve_endpoint(map_id, data, "endpoint", "end_position"),
+    )
+
+
+def _resolve_endpoint(map_id, data, name_key, position_key):
+    """the city name of an endpoint, snapping its position if no name is given"""
+    name = data.get(name_key)
+    if not name and data.get(position_key) is not None:
+        x, y = _parse_position(data[position_key])
+        with get_db_session() as session:
+            name = service_snap_to_nearest_city(map_id, x, y, session)
+        logger.info("Position (%s, %s) snapped to city %s.", x, y, name)
+    return name
+
+
 def delete_route(user_id, route_id):
     """Delete a route from a user's route history."""
     with tracer.start_as_current_span("delete_route") as span:
@@ -172,61 +254,102 @@ def delete_route(user_id, route_id):
         return jsonify({"success": "Route deleted"}), 200
 
 
+def get_route(user_id, route_id):
+    """Get a route of a user's route history with all fields, including the route itself."""
+    with tracer.start_as_current_span("get_route") as span:
+        set_span_attributes(span, {"user_id": user_id, "route_id": route_id})
+
+        with get_db_session() as session:
+            route = RouteDao.get_route_by_id(route_id, session)
+            if not route or route.user_id != user_id:
+                logger.error("Route with id %s not found.", route_id)
+                metrics_logger.incr("m_error_route_not_found")
+                return jsonify({"error": "Route not found"}), 404
+
+            route_data = _route_fields(route, ROUTE_FIELDS)
+
+        return jsonify(route_data), 200
+
+
+def _route_fields(route: Route, fields) -> dict:
+    """the selected fields of a route as JSON values"""
+    route_data = {field: getattr(route, field) for field in fields}
+    if route_data.get("created_at") is not None:
+        route_data["created_at"] = route_data["created_at"].isoformat()
+    return route_data
+
+
 def get_user_history(user_id):
-    """Get the route history for a user."""
-    with tracer.start_as_current_span("get_user_history") as span:
-        field = request.args.get("field", "created_at")
-        limit = int(request.args.get("limit", 10))
-        descending = request.args.get("descending", "true").lower() == "true"
-        from_date = request.args.get("from_date")
-        map_id = request.args.get("map_id")
-        to_date = request.args.get("to_date")
-        startpoint = request.args.get("startpoint")
-        endpoint = request.args.get("endpoint")
+    """
+    Get one page of the route history for a user. The response contains a next_cursor, which is
+    passed as cursor to get the next page, null on the last page.
 
+    fields selects the returned fields (comma separated, default id, startpoint, endpoint and
+    route); the route itself is only read from the database if it is selected.
+    """
+    with tracer.start_as_current_span("get_user_history") as span:
         span.set_attribute("user_id", user_id)
 
         if not user_id:
             logger.error("user_id is required but missing")
             return jsonify({"error": "user_id is required"}), 400
 
-        map_id_int = int(map_id) if map_id is not None else None
-
-        optional_filters = OptionalRouteFilters(
-            from_date=from_date,
-            to_date=to_date,
-            map_id=map_id_int,
-            startpoint=startpoint,
-            endpoint=endpoint,
-        )
-
-        filter_params = RouteFilter(
-            user_id=int(user_id),
-            field=field,
-            limit=limit,
-            descending=descending,
-            optional_filters=optional_filters,
-        )
+        try:
+            filter_params = _history_filter_from_request(user_id)
+        except ValueError as e:
+            logger.error("Invalid route history request: %s", e)
+            return jsonify({"error": str(e)}), 400
 
         with get_db_session() as session:
-            routes = RouteDao.get_routes(filter_params, session)
-            if not routes:
+            routes, next_keyset = RouteDao.get_routes_page(filter_params, session)
+            if not routes and not filter_params.after:
                 logger.error("No routes found for user %d.", int(user_id))
                 metrics_logger.incr("m_error_route_not_found")
                 return jsonify({"error": "No routes found"}), 404
 
-            routes_data = [
-                {
-                    "id": route.id,
-                    "startpoint": route.startpoint,
-                    "endpoint": route.endpoint,
-                    "route": route.route,
-                }
-                for route in routes
-            ]
+            routes_data = [_route_fields(route, filter_params.fields) for route in routes]
 
+        next_cursor = (
+            encode_cursor(filter_params.field, filter_params.descending, next_keyset)
+            if next_keyset
+            else None
+        )
         logger.info("Route history fetched successfully.")
-        return jsonify({"routes": routes_data}), 200
+        return jsonify({"routes": routes_data, "next_cursor": next_cursor}), 200
+
+
+def _history_filter_from_request(user_id) -> RouteFilter:
+    """the RouteFilter of the route history query arguments, ValueError for invalid ones"""
+    args = request.args
+    field = args.get("field", "created_at")
+    descending = args.get("descending", "true").lower() == "true"
+    try:
+        after = decode_cursor(args["cursor"], field, descending) if args.get("cursor") else None
+    except ValueError as e:
+        raise ValueError(f"Invalid cursor: {e}") from e
+
+    fields = args.get("fields")
+    fields = tuple(name.strip() for name in fields.split(",")) if fields else HISTORY_FIELDS
+    if not set(fields) <= set(ROUTE_FIELDS):
+        raise ValueError(f"Fields must be of {', '.join(ROUTE_FIELDS)}")
+
+    map_id = args.get("map_id")
+    return RouteFilter(
+        user_id=int(user_id),
+        field=field,
+        limit=int(args.get("limit", 10)),
+        descending=descending,
+        optional_filters=OptionalRouteFilters(
+            from_date=args.get("from_date"),
+            to_date=args.get("to_date"),
+            map_id=int(map_id) if map_id is not None else None,
+            startpoint=args.get("startpoint"),
+            endpoint=args.get("endpoint"),
+            via=args.get("via"),
+        ),
+        after=after,
+        fields=fields,
+    )
 
 
 def clear_user_history(user_id=None, user_name=None, map_id=None):
@@ -0,0 +1,96 @@
+"""
+Cache of serialized and compressed map responses.
+
+Full map payloads (map entry, all cities and connections) are the largest responses of the
+backend. Their body is serialized once per map content hash (see map_topology_cache) and
+compressed once per content coding, later requests for the same content are answered with the
+stored bytes. Entries never become stale, a changed map has a new content hash, so the least
+recently used entries are simply evicted.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from backend.src.utils.helpers import get_logging_configuration
+from backend.src.utils.http_caching import compress
+
+logger = get_logging_configuration()
+
+MAP_RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("MAP_RESPONSE_CACHE_MAX_ENTRIES", "8"))
+
+
+class EncodedBody:
+    """Serialized response body, compressed lazily once per content coding"""
+
+    def __init__(self, data: bytes):
+        self.encodings = {"identity": data}
+        self._lock = threading.Lock()
+
+    def get(self, encoding: str) -> bytes:
+        """the body in a content coding, compressed on first use"""
+        body = self.encodings.get(encoding)
+        if body is None:
+            with self._lock:
+                body = self.encodings.get(encoding)
+                if body is None:
+                    body = compress(self.encodings["identity"], encoding)
+                    self.encodings[encoding] = body
+                    logger.info(
+                        "Response body compressed with %s: %s -> %s bytes.",
+                        encoding,
+                        len(self.encodings["identity"]),
+                        len(body),
+                    )
+        return body
+
+    @property
+    def size(self) -> int:
+        """bytes stored for all content codings"""
+        return sum(len(body) for body in list(self.encodings.values()))
+
+
+class MapResponseCache:
+    """Process-local LRU cache of EncodedBody entries keyed by (kind, content hash)"""
+
+    def __init__(self, max_entries: int = MAP_RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, EncodedBody] = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0}
+
+    def get_or_build(self, key: tuple, build) -> EncodedBody:
+        """Return the cached body for key, serializing the JSON payload build() on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return entry
+            self.counters["misses"] += 1
+
+        entry = EncodedBody(json.dumps(build(), separators=(",", ":")).encode("utf-8"))
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def statistics(self) -> dict:
+        """Counters, number of entries and their total size in bytes"""
+        with self._lock:
+            entries = list(self._entries.values())
+        return {
+            **self.counters,
+            "size": len(entries),
+            "bytes": sum(entry.size for entry in entries),
+        }
+
+
+map_response_cache = MapResponseCache()
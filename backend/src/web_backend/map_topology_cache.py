@@ -0,0 +1,286 @@
+"""
+Read-through cache for the topology of maps: the map entry, its cities and its connections.
+
+Entries are kept per process (least recently used maps are evicted) and optionally in Redis, so
+processes can share them. They are loaded on first access and invalidated through
+database.map_changes whenever a DAO of this process writes cities, connections or the map itself.
+Changes made by other processes are detected by comparing the cached map version with the version
+column of the map (one primary key lookup per access), unless MAP_CACHE_CHECK_VERSION is false,
+in which case entries are only refreshed after MAP_CACHE_TTL seconds.
+
+Cached data is shared between requests and must be treated as read-only.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from redis.exceptions import RedisError
+
+from backend.src.database.dao.city_dao import CityDao
+from backend.src.database.dao.connection_dao import ConnectionDao
+from backend.src.database.dao.map_dao import MapDao
+from backend.src.database.map_changes import on_map_changed
+from backend.src.utils.helpers import get_logging_configuration, redis_instance
+from backend.src.utils.map_clustering import build_lod_levels
+from backend.src.utils.name_index import NameIndex
+from backend.src.utils.spatial_index import CitySpatialIndex
+
+logger = get_logging_configuration()
+
+MAP_CACHE_ENABLED = os.getenv("MAP_CACHE_ENABLED", "true").lower() == "true"
+# "true" additionally shares entries between processes through Redis
+MAP_CACHE_REDIS = os.getenv("MAP_CACHE_REDIS", "false").lower() == "true"
+MAP_CACHE_TTL = int(os.getenv("MAP_CACHE_TTL", "300"))
+MAP_CACHE_MAX_MAPS = int(os.getenv("MAP_CACHE_MAX_MAPS", "8"))
+MAP_CACHE_CHECK_VERSION = os.getenv("MAP_CACHE_CHECK_VERSION", "true").lower() == "true"
+
+REDIS_KEY_PREFIX = "map_topology_"
+
+
+class MapTopology:  # pylint: disable=too-many-instance-attributes
+    """
+    Map entry, cities and connections of one map as plain dicts.
+
+    Structures derived from them (spatial index, name index, zoom levels) are built on first use
+    and cached together with the topology.
+    """
+
+    def __init__(self, map_data: dict, cities: list[dict], connections: list[dict]):
+        # None if the map does not exist
+        self.map = map_data
+        self.cities = cities
+        self.connections = connections
+        self._spatial_index = None
+        self._name_index = None
+        self._lod_levels = None
+        self._content_hash = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, map_id, session):
+        """read the topology of a map from the database"""
+        map_info = MapDao.get_map_by_id(map_id, session)
+        cities = [city.to_dict() for city in CityDao.get_cities_by_map_id(map_id, session)]
+        connections = [
+            {"parent_city_id": conn.parent_city_id, "child_city_id": conn.child_city_id}
+            for conn in ConnectionDao.get_connections_by_map_id(map_id, session)
+        ]
+        return cls(map_info.to_dict() if map_info else None, cities, connections)
+
+    @property
+    def version(self):
+        """version of the map the topology was read at, None for unknown maps"""
+        return self.map.get("version") if self.map else None
+
+    @classmethod
+    def from_json(cls, raw):
+        """restore a topology serialized with to_json"""
+        data = json.loads(raw)
+        return cls(data["map"], data["cities"], data["connections"])
+
+    def to_json(self) -> str:
+        """serialize the topology, derived structures are not included"""
+        return json.dumps({"map": self.map, "cities": self.cities, "connections": self.connections})
+
+    @property
+    def content_hash(self) -> str:
+        """
+        sha256 over map entry, cities and connections, computed on first use. The version of the
+        map is left out, so a map whose content did not change keeps its hash.
+        """
+        if self._content_hash is None:
+            map_content = self.map and {
+                key: value for key, value in self.map.items() if key != "version"
+            }
+            content = json.dumps(
+                {"map": map_content, "cities": self.cities, "connections": self.connections},
+                sort_keys=True,
+                separators=(",", ":"),
+            )
+            self._content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        return self._content_hash
+
+    @property
+    def spatial_index(self) -> CitySpatialIndex:
+        """grid index over the cities, built on first use"""
+        if self._spatial_index is None:
+            with self._lock:
+                if self._spatial_index is None:
+                    self._spatial_index = CitySpatialIndex(self.cities, self.connections)
+                    logger.info("Spatial index built with %s cities.", len(self.cities))
+        return self._spatial_index
+
+    @property
+    def name_index(self) -> NameIndex:
+        """autocomplete index over the city names, built on first use"""
+        if self._name_index is None:
+            with self._lock:
+                if self._name_index is None:
+                    self._name_index = NameIndex(city["name"] for city in self.cities)
+                    logger.info("Name index built with %s cities.", len(self.cities))
+        return self._name_index
+
+    @property
+    def lod_levels(self) -> list[dict]:
+        """clustered zoom levels of the map, built on first use"""
+        if self._lod_levels is None:
+            levels = build_lod_levels(self.cities, self.connections)
+            with self._lock:
+                self._lod_levels = levels
+            logger.info("%s zoom levels built with %s cities.", len(levels), len(self.cities))
+        return self._lod_levels
+
+
+class MapTopologyCache:  # pylint: disable=too-many-instance-attributes
+    """Process-local LRU cache of MapTopology entries with an optional Redis tier"""
+
+    def __init__(
+        self,
+        redis_client=None,
+        ttl: int = MAP_CACHE_TTL,
+        max_maps: int = MAP_CACHE_MAX_MAPS,
+        check_version: bool = MAP_CACHE_CHECK_VERSION,
+    ):
+        self.redis_client = redis_client
+        self.ttl = ttl
+        self.max_maps = max_maps
+        self.check_version = check_version
+        self._entries: OrderedDict[int, tuple[float, MapTopology]] = OrderedDict()
+        self._lock = threading.Lock()
+        # bumped by invalidate, entries loaded before an invalidation are not stored
+        self._generations: dict[int, int] = {}
+        # map id -> (version, content hash), kept when the topology itself is evicted
+        self._content_hashes: dict[int, tuple[int, str]] = {}
+        self.counters = {"hits": 0, "misses": 0, "redis_hits": 0, "invalidations": 0}
+
+    def get(self, map_id, session) -> MapTopology:
+        """Return the topology of a map, loading it from Redis or the database on a miss"""
+        current_version = MapDao.get_map_version(map_id, session) if self.check_version else None
+        with self._lock:
+            entry = self._entries.get(map_id)
+            if (
+                entry
+                and entry[0] > time.monotonic()
+                and self._is_current(entry[1], current_version)
+            ):
+                self._entries.move_to_end(map_id)
+                self.counters["hits"] += 1
+                return entry[1]
+            self.counters["misses"] += 1
+            generation = self._generations.get(map_id, 0)
+
+        topology = self._get_from_redis(map_id)
+        if topology is not None and not self._is_current(topology, current_version):
+            topology = None
+        if topology is None:
+            topology = MapTopology.load(map_id, session)
+            # unknown maps are not cached to keep arbitrary map ids from filling the cache
+            if topology.map is not None:
+                self._put_to_redis(map_id, topology)
+
+        with self._lock:
+            if topology.map is not None and self._generations.get(map_id, 0) == generation:
+                self._entries[map_id] = (time.monotonic() + self.ttl, topology)
+                while len(self._entries) > self.max_maps:
+                    self._entries.popitem(last=False)
+        return topology
+
+    def content_hash(self, map_id, session):
+        """
+        Return the content hash of the current version of a map, None for unknown maps.
+
+        Hashes are remembered per map version, so while a map does not change only its version
+        is read from the database.
+        """
+        version = MapDao.get_map_version(map_id, session)
+        if version is None:
+            return None
+        known = self._content_hashes.get(map_id)
+        if known and known[0] == version:
+            return known[1]
+
+        topology = self.get(map_id, session)
+        if topology.version is not None:
+            with self._lock:
+                self._content_hashes[map_id] = (topology.version, topology.content_hash)
+        return topology.content_hash
+
+    def _is_current(self, topology, current_version):
+        """whether a cached topology still matches the version of the map in the database"""
+        return not self.check_version or topology.version == current_version
+
+    def _get_from_redis(self, map_id):
+        """shared entry of the map, None if there is none or Redis is not available"""
+        if not self.redis_client:
+            return None
+        try:
+            raw = self.redis_client.get(f"{REDIS_KEY_PREFIX}{map_id}")
+        except RedisError as e:
+            logger.warning("Map cache: reading map %s from Redis failed: %s", map_id, e)
+            return None
+        if raw is None:
+            return None
+        self.counters["redis_hits"] += 1
+        return MapTopology.from_json(raw)
+
+    def _put_to_redis(self, map_id, topology):
+        """share an entry with other processes"""
+        if not self.redis_client:
+            return
+        try:
+            self.redis_client.setex(f"{REDIS_KEY_PREFIX}{map_id}", self.ttl, topology.to_json())
+        except RedisError as e:
+            logger.warning("Map cache: writing map %s to Redis failed: %s", map_id, e)
+
+    def invalidate(self, map_id):
+        """Drop a map from all tiers, it is reloaded on next access"""
+        with self._lock:
+            self._entries.pop(map_id, None)
+            self._content_hashes.pop(map_id, None)
+            self._generations[map_id] = self._generations.get(map_id, 0) + 1
+            self.counters["invalidations"] += 1
+        if self.redis_client:
+            try:
+                self.redis_client.delete(f"{REDIS_KEY_PREFIX}{map_id}")
+            except RedisError as e:
+                logger.warning("Map cache: removing map %s from Redis failed: %s", map_id, e)
+        logger.info("Map cache: map %s invalidated.", map_id)
+
+    def clear(self):
+        """Drop all process-local entries"""
+        with self._lock:
+            self._entries.clear()
+            self._content_hashes.clear()
+
+    def statistics(self) -> dict:
+        """Counters, number of cached maps and their total number of cities"""
+        with self._lock:
+            topologies = [topology for _, topology in self._entries.values()]
+        return {
+            **self.counters,
+            "size": len(topologies),
+            "cities": sum(len(topology.cities) for topology in topologies),
+        }
+
+
+map_topology_cache = MapTopologyCache(redis_instance if MAP_CACHE_REDIS else None)
+on_map_changed(map_topology_cache.invalidate)
+
+
+def get_map_topology(map_id, session) -> MapTopology:
+    """Return the topology of a map, cached unless MAP_CACHE_ENABLED is false"""
+    if not MAP_CACHE_ENABLED:
+        return MapTopology.load(map_id, session)
+    return map_topology_cache.get(map_id, session)
+
+
+def get_map_content_hash(map_id, session):
+    """Return the content hash of a map, None for unknown maps"""
+    if MAP_CACHE_ENABLED:
+        return map_topology_cache.content_hash(map_id, session)
+    topology = MapTopology.load(map_id, session)
+    return topology.content_hash if topology.map is not None else None
@@ -0,0 +1,166 @@
+"""
+Warm-up of the route cache with the most requested routes.
+
+The route history tells which (map, start, end) pairs are requested most. Every
+POPULAR_ROUTES_REFRESH_INTERVAL seconds the popular_routes summary table is rebuilt from the
+routes requested in the last POPULAR_ROUTES_WINDOW_DAYS days, ranking POPULAR_ROUTES_PER_MAP
+pairs per map, and the results of the ranked routes that are not in the route cache yet are
+calculated by the navigation service and cached. Cached ones get their ttl restarted, so the
+popular routes never expire while they stay popular.
+
+The web backend runs the warmer in a daemon thread once the map bootstrap is done. With several
+backend processes a Redis lock lets one of them refresh and warm per interval, the cache itself
+is shared. It can also be run once from the command line:
+    python -m backend.src.web_backend.route_cache_warmer
+"""
+
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+from redis.exceptions import RedisError
+
+from backend.src.database.dao.popular_route_dao import PopularRouteDao
+from backend.src.database.db_connection import get_db_session
+from backend.src.utils.helpers import get_logging_configuration
+from backend.src.web_backend.map_topology_cache import get_map_content_hash
+from backend.src.web_backend.route_result_cache import (
+    ROUTE_CACHE_ENABLED,
+    RouteResultCache,
+    route_result_cache,
+)
+from backend.src.web_backend.web_backend_service import fetch_route_from_navigation_service
+
+logger = get_logging_configuration()
+
+ROUTE_CACHE_WARM_ENABLED = (
+    ROUTE_CACHE_ENABLED and os.getenv("ROUTE_CACHE_WARM_ENABLED", "true").lower() == "true"
+)
+POPULAR_ROUTES_PER_MAP = int(os.getenv("POPULAR_ROUTES_PER_MAP", "20"))
+# days of route history that are ranked, 0 ranks all of it
+POPULAR_ROUTES_WINDOW_DAYS = int(os.getenv("POPULAR_ROUTES_WINDOW_DAYS", "30"))
+POPULAR_ROUTES_REFRESH_INTERVAL = float(os.getenv("POPULAR_ROUTES_REFRESH_INTERVAL", "3600"))
+# seconds between two checks whether the map bootstrap is done
+BOOTSTRAP_POLL_INTERVAL = 1.0
+
+LOCK_KEY = "route_cache_warmer_lock"
+
+
+def warm_route_cache(
+    session, limit_per_map: int = POPULAR_ROUTES_PER_MAP, cache: RouteResultCache = None
+) -> dict:
+    """
+    Calculate and cache the ranked popular routes that are not cached for the current content of
+    their map. Routes that fail are not cached and counted, the others are returned as well.
+    """
+    cache = cache or route_result_cache
+    report = {"warmed": 0, "cached": 0, "failed": 0}
+    content_hashes = {}
+    for popular in PopularRouteDao.get_popular_routes(session, limit=limit_per_map):
+        if popular.map_id not in content_hashes:
+            content_hashes[popular.map_id] = get_map_content_hash(popular.map_id, session)
+        content_hash = content_hashes[popular.map_id]
+        if content_hash is not None and cache.touch(
+            popular.map_id, content_hash, popular.startpoint, popular.endpoint
+        ):
+            report["cached"] += 1
+            continue
+
+        # caches the result of the current map content itself
+        result = fetch_route_from_navigation_service(
+            popular.map_id, popular.startpoint, popular.endpoint, session
+        )
+        if isinstance(result, dict) and "error" not in result:
+            report["warmed"] += 1
+        else:
+            logger.warning(
+                "Route cache warm-up: route %s -> %s of map %s failed: %s",
+                popular.startpoint,
+                popular.endpoint,
+                popular.map_id,
+                result,
+            )
+            report["failed"] += 1
+    return report
+
+
+def refresh_and_warm(
+    session,
+    limit_per_map: int = POPULAR_ROUTES_PER_MAP,
+    window_days: int = POPULAR_ROUTES_WINDOW_DAYS,
+    cache: RouteResultCache = None,
+) -> dict:
+    """rank the popular routes of the route history and warm the cache with them"""
+    since = datetime.now(timezone.utc) - timedelta(days=window_days) if window_days > 0 else None
+    ranked = PopularRouteDao.refresh_popular_routes(session, since, limit_per_map)
+    report = {"ranked": ranked, **warm_route_cache(session, limit_per_map, cache)}
+    logger.info(
+        "Route cache warm-up: %s popular routes ranked, %s calculated, %s already cached, "
+        "%s failed.",
+        report["ranked"],
+        report["warmed"],
+        report["cached"],
+        report["failed"],
+    )
+    return report
+
+
+def acquire_warm_up_lock(cache: RouteResultCache, interval: float) -> bool:
+    """
+    whether this process refreshes and warms in this interval; without a reachable Redis server
+    every process does
+    """
+    if not cache.redis_client:
+        return True
+    try:
+        return bool(
+            cache.redis_client.set(LOCK_KEY, os.getpid(), nx=True, ex=max(int(interval), 1))
+        )
+    except RedisError as e:
+        logger.warning("Route cache warm-up: taking the lock failed: %s", e)
+        return True
+
+
+def run_route_cache_warm_up(cache: RouteResultCache = None):
+    """refresh and warm in a session of its own if no other process does, errors are logged"""
+    cache = cache or route_result_cache
+    if not acquire_warm_up_lock(cache, POPULAR_ROUTES_REFRESH_INTERVAL):
+        logger.info("Route cache warm-up: done by another process in this interval.")
+        return
+    try:
+        with get_db_session() as session:
+            refresh_and_warm(session, cache=cache)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.error("Route cache warm-up failed: %s", e)
+
+
+def start_route_cache_warmer(ready=None, stop: threading.Event = None) -> threading.Thread:
+    """
+    Run the warm-up in a daemon thread as soon as ready() returns True, e.g. once the maps are
+    bootstrapped, and then every POPULAR_ROUTES_REFRESH_INTERVAL
+    """
+    stop = stop or threading.Event()
+
+    def run():
+        while ready is not None and not ready():
+            if stop.wait(BOOTSTRAP_POLL_INTERVAL):
+                return
+        while True:
+            run_route_cache_warm_up()
+            if stop.wait(POPULAR_ROUTES_REFRESH_INTERVAL):
+                return
+
+    thread = threading.Thread(target=run, name="route-cache-warmer", daemon=True)
+    thread.start()
+    return thread
+
+
+def main() -> int:
+    """Command line entry point to rank the popular routes and warm the route cache once"""
+    with get_db_session() as session:
+        report = refresh_and_warm(session)
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,336 @@
+"""
+Write-behind storage of the route history.
+
+With ROUTE_HISTORY_WRITE_BEHIND, calculate_route does not insert and commit the route of a
+registered user itself. The route is queued and a background thread of the process writes the
+queued routes in batches: one lookup and multi-row insert of their route results and one
+multi-row insert of the routes per batch. A batch is written when ROUTE_HISTORY_BATCH_SIZE routes
+are queued or the oldest has waited ROUTE_HISTORY_FLUSH_INTERVAL seconds.
+
+ROUTE_HISTORY_WRITE_MODE selects the queue:
+
+- "memory" (default): a bounded queue in the process. Routes that are queued but not written yet
+  are lost if the process dies, which are at most ROUTE_HISTORY_QUEUE_SIZE routes. When the queue
+  is full, routes are written synchronously instead.
+- "redis": a Redis stream read through a consumer group. Routes are acknowledged only after they
+  are committed; routes of a process that died are claimed by the other processes after
+  ROUTE_HISTORY_CLAIM_IDLE seconds.
+
+Routes are in the history once their batch is written, so a route read right after it was
+calculated may not be listed yet.
+"""
+
+import atexit
+import json
+import os
+import queue
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+
+from redis.exceptions import RedisError
+from sqlalchemy.exc import DataError, IntegrityError, SQLAlchemyError
+
+from backend.src.database.dao.route_dao import RouteDao
+from backend.src.database.dao.route_result_dao import RouteResultDao
+from backend.src.database.db_connection import get_db_session
+from backend.src.utils.helpers import get_logging_configuration, redis_instance
+
+logger = get_logging_configuration()
+
+ROUTE_HISTORY_WRITE_BEHIND = os.getenv("ROUTE_HISTORY_WRITE_BEHIND", "false").lower() == "true"
+# "memory" (bounded loss) or "redis" (durable)
+ROUTE_HISTORY_WRITE_MODE = os.getenv("ROUTE_HISTORY_WRITE_MODE", "memory").lower()
+ROUTE_HISTORY_BATCH_SIZE = int(os.getenv("ROUTE_HISTORY_BATCH_SIZE", "500"))
+ROUTE_HISTORY_FLUSH_INTERVAL = float(os.getenv("ROUTE_HISTORY_FLUSH_INTERVAL", "0.5"))
+ROUTE_HISTORY_QUEUE_SIZE = int(os.getenv("ROUTE_HISTORY_QUEUE_SIZE", "10000"))
+ROUTE_HISTORY_CLAIM_IDLE = int(os.getenv("ROUTE_HISTORY_CLAIM_IDLE", "60"))
+
+REDIS_STREAM = "route_history"
+REDIS_GROUP = "route_history_writers"
+# seconds to wait before writing a batch again that failed
+RETRY_DELAY = 1.0
+
+
+class RouteHistoryWriter:  # pylint: disable=too-many-instance-attributes
+    """
+    Queue of routes to save with a background thread writing them in batches.
+
+    The thread is started on the first submitted route, so every process (also forked workers)
+    runs its own.
+    """
+
+    def __init__(
+        self,
+        redis_client=None,
+        batch_size: int = ROUTE_HISTORY_BATCH_SIZE,
+        flush_interval: float = ROUTE_HISTORY_FLUSH_INTERVAL,
+        queue_size: int = ROUTE_HISTORY_QUEUE_SIZE,
+        session_factory=get_db_session,
+    ):
+        # routes are queued in a Redis stream if a client is given, else in the process
+        self.redis_client = redis_client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.session_factory = session_factory
+        self._queue = queue.Queue(maxsize=queue_size)
+        # batch of the memory queue whose write failed, written again first
+        self._retry = []
+        self._consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._group_created = False
+        self._thread = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        # serializes the writes of the thread and of flush
+        self._write_lock = threading.Lock()
+        self.counters = {
+            "submitted": 0,
+            "written": 0,
+            "failed": 0,
+            "rejected": 0,
+            "written_synchronously": 0,
+            "flushes": 0,
+            "last_batch_size": 0,
+            "last_flush_seconds": 0.0,
+            "max_flush_seconds": 0.0,
+            "last_delay_seconds": 0.0,
+            "max_delay_seconds": 0.0,
+        }
+
+    def submit(self, user_id: int, map_id: int, startpoint: str, endpoint: str, result: dict):
+        """Queue a calculated route to be saved to the history of a user"""
+        route = {
+            "user_id": user_id,
+            "map_id": map_id,
+            "startpoint": startpoint,
+            "endpoint": endpoint,
+            "result": result,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self._ensure_started()
+        with self._lock:
+            self.counters["submitted"] += 1
+        if self.redis_client:
+            try:
+                self.redis_client.xadd(REDIS_STREAM, {"route": json.dumps(route)})
+                return
+            except RedisError as e:
+                logger.warning("Route history: queueing in Redis failed, writing directly: %s", e)
+        else:
+            try:
+                self._queue.put_nowait(route)
+                return
+            except queue.Full:
+                logger.warning("Route history: queue is full, writing directly.")
+        self._write([route])
+        with self._lock:
+            self.counters["written_synchronously"] += 1
+
+    def flush(self) -> int:
+        """Write all queued routes now, return the number written"""
+        written = 0
+        while True:
+            count = self._flush_batch(block=False)
+            if not count:
+                return written
+            written += count
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the background thread after writing the queued routes"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        try:
+            self.flush()
+        except (SQLAlchemyError, RedisError) as e:
+            logger.error("Route history: writing the queued routes at shutdown failed: %s", e)
+
+    def statistics(self) -> dict:
+        """Counters, batch sizes, flush durations and the number of queued routes"""
+        queued = self._queued()
+        with self._lock:
+            return {**self.counters, "queued": queued}
+
+    def _queued(self):
+        """routes waiting to be written"""
+        if not self.redis_client:
+            return self._queue.qsize() + len(self._retry)
+        try:
+            return self.redis_client.xlen(REDIS_STREAM)
+        except RedisError:
+            return -1
+
+    def _ensure_started(self):
+        """start the background thread if this process does not run it yet"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="route-history-writer", daemon=True
+                )
+                self._thread.start()
+                logger.info("Route history writer started.")
+
+    def _run(self):
+        """write batches until stopped"""
+        while not self._stopping.is_set():
+            try:
+                self._flush_batch(block=True)
+            except (SQLAlchemyError, RedisError) as e:
+                logger.error("Route history: writing a batch failed: %s", e)
+                time.sleep(RETRY_DELAY)
+
+    def _flush_batch(self, block: bool) -> int:
+        """take up to batch_size routes and write them, return the number written"""
+        with self._write_lock:
+            if self.redis_client:
+                entries = self._take_from_redis(block)
+                routes = [json.loads(fields[b"route"]) for _, fields in entries]
+            else:
+                routes = self._take_from_memory(block)
+            if not routes:
+                return 0
+            try:
+                self._write(routes)
+            except (IntegrityError, DataError):
+                # routes the database rejects, e.g. of a deleted user, must not block the others
+                self._write_one_by_one(routes)
+            except SQLAlchemyError:
+                with self._lock:
+                    self.counters["failed"] += len(routes)
+                if not self.redis_client:
+                    # stream entries stay pending and are read again
+                    self._retry = routes
+                raise
+            if self.redis_client:
+                ids = [entry_id for entry_id, _ in entries]
+                self.redis_client.xack(REDIS_STREAM, REDIS_GROUP, *ids)
+                self.redis_client.xdel(REDIS_STREAM, *ids)
+            return len(routes)
+
+    def _write_one_by_one(self, routes: list[dict]):
+        """write the routes of a rejected batch separately, dropping those that are rejected"""
+        for route in routes:
+            try:
+                self._write([route])
+            except (IntegrityError, DataError) as e:
+                logger.error("Route history: route of user %s rejected: %s", route["user_id"], e)
+                with self._lock:
+                    self.counters["rejected"] += 1
+
+    def _take_from_memory(self, block: bool) -> list[dict]:
+        """the failed batch, or up to batch_size queued routes collected for flush_interval"""
+        if self._retry:
+            routes, self._retry = self._retry, []
+            return routes
+        routes = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(routes) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if block and timeout > 0:
+                    routes.append(self._queue.get(timeout=timeout))
+                else:
+                    routes.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return routes
+
+    def _take_from_redis(self, block: bool) -> list:
+        """
+        up to batch_size stream entries: pending ones of this consumer and abandoned ones of
+        other consumers first, then new ones
+        """
+        self._create_group()
+        entries = self.redis_client.xautoclaim(
+            REDIS_STREAM,
+            REDIS_GROUP,
+            self._consumer,
+            ROUTE_HISTORY_CLAIM_IDLE * 1000,
+            count=self.batch_size,
+        )[1]
+        if not entries:
+            response = self.redis_client.xreadgroup(
+                REDIS_GROUP,
+                self._consumer,
+                {REDIS_STREAM: "0"},
+                count=self.batch_size,
+            )
+            entries = response[0][1] if response else []
+        if not entries:
+            response = self.redis_client.xreadgroup(
+                REDIS_GROUP,
+                self._consumer,
+                {REDIS_STREAM: ">"},
+                count=self.batch_size,
+                block=int(self.flush_interval * 1000) if block else None,
+            )
+            entries = response[0][1] if response else []
+        # entries deleted after they were read have no fields
+        return [(entry_id, fields) for entry_id, fields in entries if fields]
+
+    def _create_group(self):
+        """create the consumer group of the stream once"""
+        if self._group_created:
+            return
+        try:
+            self.redis_client.xgroup_create(REDIS_STREAM, REDIS_GROUP, id="0", mkstream=True)
+        except RedisError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_created = True
+
+    def _write(self, routes: list[dict]):
+        """store the results and the routes of a batch in one transaction"""
+        started = time.monotonic()
+        with self.session_factory() as session:
+            try:
+                result_ids = RouteResultDao.get_or_create_route_results(
+                    [
+                        {key: route[key] for key in ("map_id", "startpoint", "endpoint", "result")}
+                        for route in routes
+                    ],
+                    session,
+                )
+                RouteDao.save_routes(
+                    [
+                        {
+                            "user_id": route["user_id"],
+                            "map_id": route["map_id"],
+                            "startpoint": route["startpoint"],
+                            "endpoint": route["endpoint"],
+                            "created_at": datetime.fromisoformat(route["created_at"]),
+                            "result_id": result_id,
+                        }
+                        for route, result_id in zip(routes, result_ids)
+                    ],
+                    session,
+                )
+            except SQLAlchemyError:
+                session.rollback()
+                raise
+        self._record_flush(routes, time.monotonic() - started)
+
+    def _record_flush(self, routes: list[dict], seconds: float):
+        """update the batch metrics after a batch was written"""
+        oldest = min(datetime.fromisoformat(route["created_at"]) for route in routes)
+        delay = (datetime.now(timezone.utc) - oldest).total_seconds()
+        with self._lock:
+            self.counters["written"] += len(routes)
+            self.counters["flushes"] += 1
+            self.counters["last_batch_size"] = len(routes)
+            self.counters["last_flush_seconds"] = seconds
+            self.counters["max_flush_seconds"] = max(self.counters["max_flush_seconds"], seconds)
+            self.counters["last_delay_seconds"] = delay
+            self.counters["max_delay_seconds"] = max(self.counters["max_delay_seconds"], delay)
+        logger.info("Route history: %s routes written in %.3f seconds.", len(routes), seconds)
+
+
+route_history_writer = RouteHistoryWriter(
+    redis_instance if ROUTE_HISTORY_WRITE_MODE == "redis" else None
+)
+if ROUTE_HISTORY_WRITE_BEHIND:
+    atexit.register(route_history_writer.stop)
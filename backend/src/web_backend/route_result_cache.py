@@ -0,0 +1,100 @@
+"""
+Redis cache of route results calculated by the navigation service.
+
+Entries are keyed by map, map content hash and endpoints, so a changed map is never answered with
+routes of its previous content, not even when it was recreated with the same id and version after
+a database reset; old entries simply expire after ROUTE_CACHE_TTL seconds. The
+results of the popular routes are put into the cache in advance by route_cache_warmer.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+from redis.exceptions import RedisError
+
+from backend.src.utils.helpers import get_logging_configuration, redis_instance
+
+logger = get_logging_configuration()
+
+ROUTE_CACHE_ENABLED = os.getenv("ROUTE_CACHE_ENABLED", "true").lower() == "true"
+ROUTE_CACHE_TTL = int(os.getenv("ROUTE_CACHE_TTL", "86400"))
+
+REDIS_KEY_PREFIX = "route_result_"
+
+
+class RouteResultCache:
+    """Route results in Redis, unavailable Redis servers are treated as misses"""
+
+    def __init__(self, redis_client=None, ttl: int = ROUTE_CACHE_TTL):
+        # the cache is disabled without a client
+        self.redis_client = redis_client
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "stored": 0, "errors": 0}
+
+    @staticmethod
+    def key(map_id, content_hash, start_city_name, end_city_name) -> str:
+        """Redis key of a route, city names are hashed as they may contain any character"""
+        endpoints = json.dumps([start_city_name, end_city_name]).encode("utf-8")
+        return f"{REDIS_KEY_PREFIX}{map_id}_{content_hash}_{hashlib.sha256(endpoints).hexdigest()}"
+
+    def get(self, map_id, content_hash, start_city_name, end_city_name):
+        """the cached result of a route, None on a miss"""
+        if not self.redis_client:
+            return None
+        try:
+            raw = self.redis_client.get(
+                self.key(map_id, content_hash, start_city_name, end_city_name)
+            )
+        except RedisError as e:
+            logger.warning("Route cache: reading a route of map %s failed: %s", map_id, e)
+            self._count("errors")
+            return None
+        self._count("hits" if raw is not None else "misses")
+        return json.loads(raw) if raw is not None else None
+
+    def put(self, map_id, content_hash, start_city_name, end_city_name, result: dict):
+        """cache the result of a route for ttl seconds"""
+        if not self.redis_client:
+            return
+        try:
+            self.redis_client.setex(
+                self.key(map_id, content_hash, start_city_name, end_city_name),
+                self.ttl,
+                json.dumps(result),
+            )
+        except RedisError as e:
+            logger.warning("Route cache: writing a route of map %s failed: %s", map_id, e)
+            self._count("errors")
+            return
+        self._count("stored")
+
+    def touch(self, map_id, content_hash, start_city_name, end_city_name) -> bool:
+        """restart the ttl of a cached route, False if it is not cached"""
+        if not self.redis_client:
+            return False
+        try:
+            return bool(
+                self.redis_client.expire(
+                    self.key(map_id, content_hash, start_city_name, end_city_name), self.ttl
+                )
+            )
+        except RedisError as e:
+            logger.warning("Route cache: refreshing a route of map %s failed: %s", map_id, e)
+            self._count("errors")
+            return False
+
+    def statistics(self) -> dict:
+        """hit, miss, store and error counters of this process"""
+        with self._lock:
+            return dict(self.counters)
+
+    def _count(self, name):
+        """increment a counter"""
+        with self._lock:
+            self.counters[name] += 1
+
+
+route_result_cache = RouteResultCache(redis_instance if ROUTE_CACHE_ENABLED else None)
@@ -1,5 +1,8 @@
 """Service for web backend, works with backend controller."""
 
+import json
+import math
+import os
 import xmlrpc.client
 import socket
 
@@ -9,21 +12,53 @@ from opentelemetry.trace import get_tracer
 from backend.src.database.dao.city_dao import CityDao
 from backend.src.database.dao.connection_dao import ConnectionDao
 from backend.src.database.dao.map_dao import MapDao
+from backend.src.map_service.map_file_import import import_map_file, wrap_binary_stream
+from backend.src.navigation_service.navigation_service import (
+    compute_components,
+    summarize_components,
+)
 from backend.src.utils.helpers import get_logging_configuration
+from backend.src.utils.map_clustering import LEVEL_COUNT
+from backend.src.utils.spatial_index import CitySpatialIndex
 from backend.src.utils.timeout_transport import TimeoutTransport
+from backend.src.web_backend.map_response_cache import EncodedBody, map_response_cache
+from backend.src.web_backend.map_topology_cache import get_map_content_hash, get_map_topology
+from backend.src.web_backend.route_result_cache import route_result_cache
 
 logger = get_logging_configuration()
 tracer = get_tracer("backend-service")
 
+# set to "false" to answer nearest city lookups from the database instead of in-memory indexes
+SPATIAL_INDEX_ENABLED = os.getenv("SPATIAL_INDEX_ENABLED", "true").lower() == "true"
+MAX_NEAREST_CITIES = 100
+# set to "false" to answer city suggestions from the database instead of in-memory indexes
+NAME_INDEX_ENABLED = os.getenv("NAME_INDEX_ENABLED", "true").lower() == "true"
+MAX_CITY_SUGGESTIONS = int(os.getenv("MAX_CITY_SUGGESTIONS", "10"))
+# viewports containing more cities are truncated, clients should zoom in
+MAX_VIEWPORT_CITIES = int(os.getenv("MAX_VIEWPORT_CITIES", "5000"))
+# rows fetched per database round trip and lines per chunk of map exports
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
 
 def fetch_route_from_navigation_service(map_id, start_city_name, end_city_name, session):
-    """Fetch route from navigation service"""
+    """
+    Fetch route from navigation service. Routes of the current map content that are in the
+    route cache are answered from it, new results are cached.
+    """
     try:
         with tracer.start_as_current_span("fetch_route_from_navigation_service") as span:
             span.set_attribute("start_city", start_city_name)
             span.set_attribute("end_city", end_city_name)
 
             data = marshall_data_for_navigation_service(map_id, session)
+            content_hash = data.get("content_hash")
+            if content_hash is not None:
+                cached = route_result_cache.get(
+                    map_id, content_hash, start_city_name, end_city_name
+                )
+                span.set_attribute("route_cache_hit", cached is not None)
+                if cached is not None:
+                    return cached
 
             headers = {}
             inject(headers)
@@ -32,6 +67,10 @@ def fetch_route_from_navigation_service(map_id, start_city_name, end_city_name,
                 result = _fetch_route_internal(
                     start_city_name, end_city_name, data=data, headers=headers
                 )
+                if content_hash is not None and isinstance(result, dict) and "error" not in result:
+                    route_result_cache.put(
+                        map_id, content_hash, start_city_name, end_city_name, result
+                    )
                 return result
             except socket.timeout as e:
                 logger.error("Timeout error occurred while fetching the route: %s", e)
@@ -53,23 +92,20 @@ def marshall_data_for_navigation_service(map_id, session):
     convert cities and connections information to the expected rpc format
     for navigation service
     """
-    cities, connections = (
-        CityDao.get_cities_by_map_id(map_id, session),
-        ConnectionDao.get_connections_by_map_id(map_id, session),
-    )
-    # convert objects to dicts to work with RPC-API
-    cities_data = [city.to_dict() for city in cities]
-    connections_data = [
-        {
-            "parent_city_id": conn.parent_city_id,
-            "child_city_id": conn.child_city_id,
-        }
-        for conn in connections
-    ]
+    topology = get_map_topology(map_id, session)
     data = {
-        "cities": cities_data,
-        "connections": connections_data,
+        "cities": topology.cities,
+        "connections": topology.connections,
     }
+    if topology.version is not None:
+        # lets the navigation service reuse the graph of this map version
+        data.update(
+            {
+                "map_id": map_id,
+                "version": topology.version,
+                "content_hash": topology.content_hash,
+            }
+        )
     return data
 
 
@@ -88,33 +124,26 @@ def _fetch_route_internal(start_city_name, end_city_name, data, headers):
 
 def fetch_cities_as_dicts(map_id, session):
     """Retrieve and return cities' information from the database as dictionary"""
-    # Fetch all cities as objects
-    cities = CityDao.get_cities_by_map_id(map_id, session)
     # Convert each city to a dictionary, excluding the 'id' field
-    cities_data = [
+    return _without_ids(get_map_topology(map_id, session).cities)
+
+
+def _without_ids(cities):
+    """name and position of city dicts"""
+    return [
         {
-            "name": city.name,
-            "position_x": city.position_x,
-            "position_y": city.position_y,
+            "name": city["name"],
+            "position_x": city["position_x"],
+            "position_y": city["position_y"],
         }
         for city in cities
     ]
-    return cities_data
 
 
 def service_get_map_data(map_id, session):
     """Fetch map data for controller"""
-    cities = CityDao.get_cities_by_map_id(map_id, session)
-    connections = ConnectionDao.get_connections_by_map_id(map_id, session)
-    map_info = MapDao.get_map_by_id(map_id, session)
-
-    cities_data = [city.to_dict() for city in cities]
-    connections_data = [
-        {"parent_city_id": conn.parent_city_id, "child_city_id": conn.child_city_id}
-        for conn in connections
-    ]
-    map_data = map_info.to_dict() if map_info else {}
-    return map_data, cities_data, connections_data
+    topology = get_map_topology(map_id, session)
+    return topology.map or {}, topology.cities, topology.connections
 
 
 def service_get_map_data_by_name(map_name, session):
@@ -122,29 +151,38 @@ def service_get_map_data_by_name(map_name, session):
     map_info = MapDao.get_map_by_name(session, map_name)
     if not map_info:
         return None, None, None
-    map_id = map_info.id
-    cities = CityDao.get_cities_by_map_id(map_id, session)
-    connections = ConnectionDao.get_connections_by_map_id(map_id, session)
+    topology = get_map_topology(map_info.id, session)
+    return map_info.to_dict(), topology.cities, topology.connections
+
+
+def service_get_encoded_map_data_by_name(map_name, etag, session) -> EncodedBody:
+    """
+    Fetch the serialized map data of service_get_map_data_by_name, serialized only once per
+    content hash (etag) of the map
+    """
+
+    def build():
+        map_data, cities_data, connections_data = service_get_map_data_by_name(map_name, session)
+        return {"map": map_data, "cities": cities_data, "connections": connections_data}
+
+    return map_response_cache.get_or_build(("map", etag), build)
 
-    cities_data = [city.to_dict() for city in cities]
-    connections_data = [
-        {"parent_city_id": conn.parent_city_id, "child_city_id": conn.child_city_id}
-        for conn in connections
-    ]
-    map_data = map_info.to_dict()
-    return map_data, cities_data, connections_data
 
+def service_get_cities_data(map_id, session, bbox=None):
+    """Fetch cities data for controller, optionally only inside a bounding box"""
+    if bbox is None:
+        return fetch_cities_as_dicts(map_id, session)
+    if SPATIAL_INDEX_ENABLED:
+        index = get_spatial_index(map_id, session)
+        return _without_ids(index.cities[i] for i in sorted(index.grid.within(*bbox)))
 
-def service_get_cities_data(map_id, session):
-    """Fetch cities data for controller"""
-    cities = CityDao.get_cities_by_map_id(map_id, session)
     return [
         {
             "name": city.name,
             "position_x": city.position_x,
             "position_y": city.position_y,
         }
-        for city in cities
+        for city in CityDao.get_cities_in_bbox(map_id, bbox, session)
     ]
 
 
@@ -157,6 +195,149 @@ def service_get_maps(session):
 
 
 def service_get_city_suggestions(map_id, session, query):
-    """Fetch city suggestions for controller"""
-    cities = CityDao.get_city_suggestions(session, map_id, query)
-    return [{"name": city.name} for city in cities]
+    """
+    Fetch up to MAX_CITY_SUGGESTIONS cities whose name contains query, names starting with it
+    first, then shorter names first
+    """
+    if NAME_INDEX_ENABLED:
+        names = get_map_topology(map_id, session).name_index.suggest(query, MAX_CITY_SUGGESTIONS)
+    else:
+        names = [
+            city.name
+            for city in CityDao.get_city_suggestions(session, map_id, query, MAX_CITY_SUGGESTIONS)
+        ]
+    return [{"name": name} for name in names]
+
+
+def service_get_map_components(map_id, session):
+    """Fetch the connected components of a map for data quality checks, None if unknown map"""
+    topology = get_map_topology(map_id, session)
+    if topology.map is None:
+        return None
+
+    components = compute_components(
+        [city["id"] for city in topology.cities],
+        ((conn["parent_city_id"], conn["child_city_id"]) for conn in topology.connections),
+    )
+    return summarize_components(components, {city["id"]: city["name"] for city in topology.cities})
+
+
+def get_spatial_index(map_id, session) -> CitySpatialIndex:
+    """Return the in-memory spatial index of a map, built once per cached map topology"""
+    return get_map_topology(map_id, session).spatial_index
+
+
+def service_get_nearest_cities(map_id, x, y, k, session):
+    """Fetch the k cities closest to (x, y) with their distance, nearest first"""
+    k = max(1, min(k, MAX_NEAREST_CITIES))
+    if SPATIAL_INDEX_ENABLED:
+        return get_spatial_index(map_id, session).nearest_cities(x, y, k)
+
+    return [
+        {
+            **city.to_dict(),
+            "distance": round(math.hypot(city.position_x - x, city.position_y - y), 2),
+        }
+        for city in CityDao.get_nearest_cities(map_id, x, y, k, session)
+    ]
+
+
+def service_snap_to_nearest_city(map_id, x, y, session):
+    """Return the name of the city closest to (x, y), None if the map has no cities"""
+    nearest = service_get_nearest_cities(map_id, x, y, 1, session)
+    return nearest[0]["name"] if nearest else None
+
+
+def service_get_viewport(map_id, bbox, session):
+    """
+    Fetch the cities inside the bounding box (min_x, min_y, max_x, max_y) and the
+    connections touching them, see CitySpatialIndex.viewport for the result format
+    """
+    if SPATIAL_INDEX_ENABLED:
+        return get_spatial_index(map_id, session).viewport(*bbox, limit=MAX_VIEWPORT_CITIES)
+
+    cities = CityDao.get_cities_in_bbox(map_id, bbox, session, limit=MAX_VIEWPORT_CITIES + 1)
+    truncated = len(cities) > MAX_VIEWPORT_CITIES
+    cities = cities[:MAX_VIEWPORT_CITIES]
+    inside = {city.id for city in cities}
+    connections = ConnectionDao.get_connections_of_cities(map_id, inside, session)
+    neighbour_ids = {
+        city_id
+        for conn in connections
+        for city_id in (conn.parent_city_id, conn.child_city_id)
+        if city_id not in inside
+    }
+    return {
+        "cities": [city.to_dict() for city in cities],
+        "neighbours": [
+            city.to_dict() for city in CityDao.get_cities_by_ids(neighbour_ids, session)
+        ],
+        "connections": [
+            {"parent_city_id": conn.parent_city_id, "child_city_id": conn.child_city_id}
+            for conn in connections
+        ],
+        "truncated": truncated,
+    }
+
+
+def service_get_map_lod(map_id, zoom, session):
+    """
+    Fetch the clustered cities and connections of one zoom level of a map,
+    None if the map does not exist. Raises ValueError for unknown zoom levels.
+    """
+    if not 0 <= zoom < LEVEL_COUNT:
+        raise ValueError(f"Zoom level must be between 0 and {LEVEL_COUNT - 1}")
+    topology = get_map_topology(map_id, session)
+    if topology.map is None:
+        return None
+    return topology.lod_levels[zoom]
+
+
+def service_get_map_etag(map_id, session):
+    """ETag for responses derived from the content of a map, None for unknown maps"""
+    return get_map_content_hash(map_id, session)
+
+
+def service_get_map_etag_by_name(map_name, session):
+    """ETag for responses derived from the content of a map, None for unknown maps"""
+    map_info = MapDao.get_map_by_name(session, map_name)
+    return service_get_map_etag(map_info.id, session) if map_info else None
+
+
+def service_export_map(map_id, session, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Generate the NDJSON export of a map in chunks of up to batch_size lines: one "map" line,
+    followed by one "city" line per city and one "connection" line per connection.
+    Generates nothing for unknown maps.
+
+    Cities and connections are streamed from the database, so memory stays bounded regardless
+    of the size of the map. The session must stay open until the generator is exhausted.
+    """
+    map_info = MapDao.get_map_by_id(map_id, session)
+    if map_info is None:
+        return
+    yield _ndjson_line({"type": "map", **map_info.to_dict()})
+
+    chunk = []
+    for city in CityDao.stream_cities_by_map_id(map_id, session, batch_size):
+        chunk.append(_ndjson_line({"type": "city", **city._asdict()}))
+        if len(chunk) >= batch_size:
+            yield "".join(chunk)
+            chunk = []
+    for connection in ConnectionDao.stream_connections_by_map_id(map_id, session, batch_size):
+        chunk.append(_ndjson_line({"type": "connection", **connection._asdict()}))
+        if len(chunk) >= batch_size:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+def _ndjson_line(record: dict) -> str:
+    """one line of an NDJSON document"""
+    return json.dumps(record, separators=(",", ":")) + "\n"
+
+
+def service_import_map_file(stream, file_format, session, update=False):
+    """Import a map file read from a binary stream, see map_file_import.import_map_file"""
+    return import_map_file(wrap_binary_stream(stream), file_format, session, update=update)